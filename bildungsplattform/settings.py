@@ -154,9 +154,34 @@ DATABASES = {
                 "PGSSLMODE", "disable" if ENVIRONMENT == "test" else "require"
             ),  # Disable SSL for test environment
         },
+        # Reuse connections across requests instead of paying a new TLS
+        # handshake each time; health checks drop connections that died
+        "CONN_MAX_AGE": (
+            None
+            if os.getenv("DB_CONN_MAX_AGE", "60").lower() == "none"
+            else int(os.getenv("DB_CONN_MAX_AGE", "60"))
+        ),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "true").lower()
+        in ("true", "1", "yes"),
     }
 }
 
+# psycopg connection pool (one per process, needs psycopg[pool]) instead of
+# persistent connections, Django requires CONN_MAX_AGE = 0 with a pool
+DB_POOL = os.getenv("DB_POOL", "false").lower() in ("true", "1", "yes")
+if DB_POOL:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        # Seconds a request waits for a free connection
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    }
+elif os.getenv("GUNICORN_WORKER_CLASS") == "uvicorn":
+    # Under ASGI every sync view and async ORM call runs in a fresh thread,
+    # persistent connections would pile up, Django advises against them
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+
 # Use sqlite for tests, by default Django would use the same engine for testing
 if "test" in sys.argv or "test_coverage" in sys.argv:
     DATABASES["default"] = {
@@ -164,6 +189,40 @@ if "test" in sys.argv or "test_coverage" in sys.argv:
         "NAME": ":memory:",
     }
 
+# Cache shared by all gunicorn workers: Redis if REDIS_URL is set (needs the
+# redis package), otherwise CACHE_BACKEND "file" (per host), "db" (shared via
+# Postgres, table created by createcachetable) or "locmem" (per process)
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file").lower()
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "bildungsplattform")
+if REDIS_URL:
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
+elif CACHE_BACKEND == "db":
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+    }
+elif CACHE_BACKEND == "locmem":
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+else:
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_DIR", os.path.join(BASE_DIR, "cache", "django")),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+CACHES = {
+    "default": {
+        **_default_cache,
+        "KEY_PREFIX": CACHE_KEY_PREFIX,
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", "300")),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -215,11 +274,47 @@ DEFAULT_FILE_STORAGE = "core.storage.ScalewayObjectStorage"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Seconds the Person of a logged-in user (incl. activation state) is cached
+PERSON_CACHE_TIMEOUT = int(os.getenv("PERSON_CACHE_TIMEOUT", "60"))
+# Seconds the anonymous index page (and its ETag) is served from the cache
+INDEX_CACHE_TIMEOUT = int(os.getenv("INDEX_CACHE_TIMEOUT", "30"))
+
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
 
 # Email configuration
 SCALEWAY_EMAIL_API_TOKEN = os.getenv("SCALEWAY_EMAIL_API_TOKEN")
+SCALEWAY_EMAIL_API_URL = os.getenv(
+    "SCALEWAY_EMAIL_API_URL",
+    "https://api.scaleway.com/transactional-email/v1alpha1/regions/fr-par/emails",
+)
+# (connect, read) timeout in seconds for the pooled email API session
+SCALEWAY_EMAIL_TIMEOUT = (
+    float(os.getenv("SCALEWAY_EMAIL_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("SCALEWAY_EMAIL_READ_TIMEOUT", "30")),
+)
+# Retries with exponential backoff on connection errors, 429 and 5xx
+SCALEWAY_EMAIL_MAX_RETRIES = int(os.getenv("SCALEWAY_EMAIL_MAX_RETRIES", "3"))
+SCALEWAY_EMAIL_BACKOFF_FACTOR = float(os.getenv("SCALEWAY_EMAIL_BACKOFF_FACTOR", "0.5"))
+# How queued emails (EmailOutbox) are delivered after commit:
+# "thread" (background thread in the web process), "sync" (in the commit
+# hook) or "worker" (only by the process_email_outbox management command)
+EMAIL_OUTBOX_DISPATCH = os.getenv("EMAIL_OUTBOX_DISPATCH", "thread")
+# Concurrent email API calls when delivering a batch (e.g. reminders)
+EMAIL_OUTBOX_MAX_WORKERS = int(os.getenv("EMAIL_OUTBOX_MAX_WORKERS", "8"))
+
+# Cache for generated Teilnahmebestätigung PDFs: "local" (directory below),
+# "s3" (private prefix in the Scaleway bucket) or "none"
+CERTIFICATE_CACHE = os.getenv("CERTIFICATE_CACHE", "local")
+CERTIFICATE_CACHE_DIR = os.getenv(
+    "CERTIFICATE_CACHE_DIR", os.path.join(BASE_DIR, "cache", "certificates")
+)
+# Certificate background: 0 (default) embeds the original PNG, decoded once
+# and reused. A DPI flattens it to an in-memory JPEG instead: smaller PDFs and
+# faster rendering, but lossy
+CERTIFICATE_BACKGROUND_DPI = int(os.getenv("CERTIFICATE_BACKGROUND_DPI", "0"))
+# Processes rendering batch certificate downloads, 0 = one per CPU core
+CERTIFICATE_BATCH_WORKERS = int(os.getenv("CERTIFICATE_BATCH_WORKERS", "0"))
 
 # django-extensions (generate diagrams for all applications)
 GRAPH_MODELS = {
@@ -231,6 +326,8 @@ GRAPH_MODELS = {
 if IS_PRODUCTION:
     # HTTPS/SSL Settings
     SECURE_SSL_REDIRECT = True
+    # Health probes of the platform talk plain HTTP to the container
+    SECURE_REDIRECT_EXEMPT = [r"^healthz/$"]
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     SECURE_BROWSER_XSS_FILTER = True
@@ -84,6 +84,18 @@ SCALEWAY_SECRET_KEY = None
 SCALEWAY_BUCKET_NAME = None
 SCALEWAY_REGION = "fr-par"
 SCALEWAY_EMAIL_API_TOKEN = "test-token"
+EMAIL_OUTBOX_DISPATCH = "sync"
+CERTIFICATE_CACHE = "none"
+# In-process stand-in for the shared cache, cleared before every test
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "KEY_PREFIX": "test",
+    }
+}
+# Tests share one process cache, enable per test where needed
+PERSON_CACHE_TIMEOUT = 0
+INDEX_CACHE_TIMEOUT = 0
 
 # Use default file storage for tests
 DEFAULT_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
@@ -1,13 +1,15 @@
-import csv
-
 from django.contrib import admin, messages
-from django.http import HttpResponse
+from django.http import FileResponse
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.html import format_html
 
 from core.models import (
     Bestellung,
     Betrieb,
     Document,
+    EmailOutbox,
+    EmailVersand,
     Funktion,
     Organisation,
     Person,
@@ -18,7 +20,9 @@ from core.models import (
     SchulungsTeilnehmer,
     SchulungsTermin,
     SchulungsUnterlage,
+    TeilnahmebestaetigungAuftrag,
 )
+from core.services.csv_export import EXPORT_CHUNK_SIZE, streaming_csv_response
 
 
 def export_schulungsteilnehmer_to_csv(modeladmin, request, queryset):
@@ -29,31 +33,64 @@ def export_schulungsteilnehmer_to_csv(modeladmin, request, queryset):
     - Participants with linked Person and Betrieb
     - Participants with linked Person but no Betrieb
     - External participants (no linked Person)
+
+    The rows come from one query over all selected Termine, read in chunks
+    while the response is streamed, so a year of Termine needs neither one
+    query per participant nor the whole file in memory.
     """
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="schulungsteilnehmer.csv"'
-    writer = csv.writer(response)
-    # Write CSV headers
-    writer.writerow(["Person", "Betrieb", "Email", "Telefon", "DSV akzeptiert"])
-    # Gather related SchulungsTeilnehmer instances and write them to the CSV
-    for schulungstermin in queryset:
-        for stp in schulungstermin.schulungsteilnehmer_set.all():
-            if stp.person:
-                # Participant has a linked Person record
-                person_name = f"{stp.person.vorname} {stp.person.nachname}"
-                betrieb = stp.person.betrieb.name if stp.person.betrieb else ""
-                email = stp.person.email or ""
-                telefon = stp.person.telefon or ""
-                dsv_akzeptiert = "Ja" if stp.person.dsv_akzeptiert else "Nein"
-            else:
-                # External participant (no Person record)
-                person_name = f"{stp.vorname} {stp.nachname}"
-                betrieb = ""
-                email = stp.email or ""
-                telefon = ""
-                dsv_akzeptiert = ""
-            writer.writerow([person_name, betrieb, email, telefon, dsv_akzeptiert])
-    return response
+    teilnehmer = (
+        SchulungsTeilnehmer.objects.filter(schulungstermin__in=queryset.values("pk"))
+        .select_related("person__betrieb", "schulungstermin__schulung")
+        .order_by("schulungstermin__datum_von", "schulungstermin_id", "pk")
+    )
+    return streaming_csv_response(
+        "schulungsteilnehmer.csv",
+        [
+            "Schulung",
+            "Datum",
+            "Person",
+            "Betrieb",
+            "Email",
+            "Telefon",
+            "DSV akzeptiert",
+            "Status",
+            "Verpflegung",
+        ],
+        (
+            schulungsteilnehmer_csv_row(stp)
+            for stp in teilnehmer.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        ),
+        request,
+    )
+
+
+def schulungsteilnehmer_csv_row(stp):
+    schulungstermin = stp.schulungstermin
+    if stp.person:
+        # Participant has a linked Person record
+        person_name = f"{stp.person.vorname} {stp.person.nachname}"
+        betrieb = stp.person.betrieb.name if stp.person.betrieb else ""
+        email = stp.person.email or ""
+        telefon = stp.person.telefon or ""
+        dsv_akzeptiert = "Ja" if stp.person.dsv_akzeptiert else "Nein"
+    else:
+        # External participant (no Person record)
+        person_name = f"{stp.vorname} {stp.nachname}"
+        betrieb = ""
+        email = stp.email or ""
+        telefon = ""
+        dsv_akzeptiert = ""
+    return [
+        schulungstermin.schulung.name,
+        schulungstermin.datum_von.strftime("%d.%m.%Y %H:%M"),
+        person_name,
+        betrieb,
+        email,
+        telefon,
+        dsv_akzeptiert,
+        stp.status,
+        stp.verpflegung,
+    ]
 
 
 export_schulungsteilnehmer_to_csv.short_description = "Schulungsteilnehmer CSV Export"
@@ -250,6 +287,58 @@ send_teilnahmebestaetigung_for_termin.short_description = (
 )
 
 
+def _download_teilnahmebestaetigungen(queryset, format):
+    from core.services.certificate import (
+        build_certificate_batch,
+        completed_teilnehmer_for_termine,
+    )
+
+    return FileResponse(
+        build_certificate_batch(
+            completed_teilnehmer_for_termine(queryset), format=format
+        ),
+        as_attachment=True,
+        filename=f"teilnahmebestaetigungen.{format}",
+    )
+
+
+def download_teilnahmebestaetigungen_zip(modeladmin, request, queryset):
+    """Admin action to download all certificates of the selected Termine."""
+    return _download_teilnahmebestaetigungen(queryset, "zip")
+
+
+download_teilnahmebestaetigungen_zip.short_description = (
+    "Teilnahmebestätigungen herunterladen (ZIP)"
+)
+
+
+def download_teilnahmebestaetigungen_pdf(modeladmin, request, queryset):
+    """Admin action to download all certificates as one merged PDF."""
+    return _download_teilnahmebestaetigungen(queryset, "pdf")
+
+
+download_teilnahmebestaetigungen_pdf.short_description = (
+    "Teilnahmebestätigungen herunterladen (ein PDF)"
+)
+
+
+def export_teilnehmerliste_pdf(modeladmin, request, queryset):
+    """Admin action: attendance lists of the selected Termine, a page each."""
+    from core.services.teilnehmerliste import build_teilnehmerliste
+
+    return FileResponse(
+        build_teilnehmerliste(
+            queryset.select_related("schulung").order_by("datum_von", "pk")
+        ),
+        as_attachment=True,
+        filename="teilnehmerlisten.pdf",
+        content_type="application/pdf",
+    )
+
+
+export_teilnehmerliste_pdf.short_description = "Teilnehmerlisten herunterladen (PDF)"
+
+
 class PersonInline(admin.TabularInline):
     model = Person
     extra = 0
@@ -415,11 +504,22 @@ class SchulungsTerminAdmin(admin.ModelAdmin):
     )
     inlines = (SchulungsTeilnehmerInline,)
     ordering = ("-datum_von",)
-    actions = [export_schulungsteilnehmer_to_csv, send_teilnahmebestaetigung_for_termin]
+    actions = [
+        export_schulungsteilnehmer_to_csv,
+        export_teilnehmerliste_pdf,
+        send_teilnahmebestaetigung_for_termin,
+        download_teilnahmebestaetigungen_zip,
+        download_teilnahmebestaetigungen_pdf,
+    ]
 
     class Media:
         js = ("js/schulungsteilnehmer_admin.js",)
 
+    def get_queryset(self, request):
+        return (
+            super().get_queryset(request).select_related("schulung").with_availability()
+        )
+
 
 class BetriebAdmin(admin.ModelAdmin):
     inlines = [
@@ -529,3 +629,119 @@ class SchulungsTeilnehmerAdmin(admin.ModelAdmin):
 
 
 admin.site.register(SchulungsTeilnehmer, SchulungsTeilnehmerAdmin)
+
+
+def resend_outbox_emails(modeladmin, request, queryset):
+    """Admin action to deliver selected outbox emails again."""
+    from core.services.email import dispatch_outbox_emails, resendable
+
+    selected = queryset.count()
+    queryset = resendable(queryset)
+    outbox_ids = list(queryset.values_list("pk", flat=True))
+    queryset.update(status="Offen", fehler=None)
+    dispatch_outbox_emails(outbox_ids)
+    messages.success(
+        request, f"{len(outbox_ids)} E-Mail(s) zum erneuten Versand eingereiht."
+    )
+    if selected > len(outbox_ids):
+        messages.warning(
+            request,
+            f"{selected - len(outbox_ids)} E-Mail(s) werden gerade zugestellt "
+            f"und wurden übersprungen.",
+        )
+
+
+resend_outbox_emails.short_description = "Erneut versenden"
+
+
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        "betreff",
+        "empfaenger",
+        "status",
+        "versuche",
+        "created",
+        "versendet_am",
+    )
+    list_filter = ("status",)
+    search_fields = ("betreff", "empfaenger")
+    readonly_fields = (
+        "empfaenger",
+        "betreff",
+        "html",
+        "status",
+        "versuche",
+        "fehler",
+        "versendet_am",
+    )
+    actions = [resend_outbox_emails]
+
+
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
+
+
+def resend_teilnahmebestaetigung_auftraege(modeladmin, request, queryset):
+    """Admin action to deliver selected certificate jobs again."""
+    from core.services.email import dispatch_teilnahmebestaetigungen, resendable
+
+    selected = queryset.count()
+    queryset = resendable(queryset)
+    auftrag_ids = list(queryset.values_list("pk", flat=True))
+    queryset.update(status="Offen", fehler=None)
+    dispatch_teilnahmebestaetigungen(auftrag_ids)
+    messages.success(
+        request,
+        f"{len(auftrag_ids)} Teilnahmebestätigung(en) zum erneuten Versand "
+        f"eingereiht.",
+    )
+    if selected > len(auftrag_ids):
+        messages.warning(
+            request,
+            f"{selected - len(auftrag_ids)} Teilnahmebestätigung(en) werden "
+            f"gerade zugestellt und wurden übersprungen.",
+        )
+
+
+resend_teilnahmebestaetigung_auftraege.short_description = "Erneut versenden"
+
+
+class TeilnahmebestaetigungAuftragAdmin(admin.ModelAdmin):
+    list_display = (
+        "schulungsteilnehmer",
+        "empfaenger",
+        "status",
+        "versuche",
+        "created",
+        "versendet_am",
+    )
+    list_filter = ("status",)
+    search_fields = ("empfaenger",)
+    readonly_fields = (
+        "schulungsteilnehmer",
+        "empfaenger",
+        "status",
+        "versuche",
+        "fehler",
+        "versendet_am",
+    )
+    actions = [resend_teilnahmebestaetigung_auftraege]
+
+
+admin.site.register(TeilnahmebestaetigungAuftrag, TeilnahmebestaetigungAuftragAdmin)
+
+
+class EmailVersandAdmin(admin.ModelAdmin):
+    list_display = ("betreff", "schulungstermin", "gestartet_von", "created", "status")
+    list_select_related = ("schulungstermin__schulung", "gestartet_von")
+    readonly_fields = ("betreff", "schulungstermin", "gestartet_von")
+
+    def status(self, obj):
+        return format_html(
+            '<a href="{}">Status anzeigen</a>',
+            reverse("email_versand_status", args=(obj.pk,)),
+        )
+
+    status.short_description = "Status"
+
+
+admin.site.register(EmailVersand, EmailVersandAdmin)
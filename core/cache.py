@@ -0,0 +1,148 @@
+"""
+Namespaced helpers for the shared cache.
+
+Every cached value lives in a namespace (Termin listings, document lists,
+availability, ...). Keys are built as ``<namespace>:<version>:<parts>``, so a
+whole namespace can be dropped by bumping its version, which works the same on
+the Redis, file and database backends (none of them needs key patterns).
+"""
+
+import contextlib
+import inspect
+import time
+
+from django.core.cache import caches
+
+_NOT_CACHED = object()
+
+
+class CacheNamespace:
+    """
+    A group of cache keys that are built, timed out and invalidated together.
+
+    Usage::
+
+        termine_cache = CacheNamespace("termine", timeout=300)
+        termine = termine_cache.get_or_set(("index", funktion_id), load_termine)
+        termine_cache.invalidate_all()
+
+    Args:
+        name: Prefix of all keys in this namespace
+        timeout: Default timeout in seconds, None keeps values until invalidated
+        alias: Entry of settings.CACHES to use
+    """
+
+    def __init__(self, name, timeout=300, alias="default"):
+        self.name = name
+        self.timeout = timeout
+        self.alias = alias
+
+    def __repr__(self):
+        return f"<CacheNamespace {self.name}>"
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def version_key(self):
+        return f"{self.name}:version"
+
+    def version(self):
+        """
+        Current version of the namespace, created on first use. New versions
+        start at the current time, so a version key that was evicted never
+        comes back with a number whose entries are still cached.
+        """
+        version = self.cache.get(self.version_key)
+        if version is None:
+            version = time.time_ns()
+            if not self.cache.add(self.version_key, version, None):
+                version = self.cache.get(self.version_key, version)
+        return version
+
+    async def aversion(self):
+        version = await self.cache.aget(self.version_key)
+        if version is None:
+            version = time.time_ns()
+            if not await self.cache.aadd(self.version_key, version, None):
+                version = await self.cache.aget(self.version_key, version)
+        return version
+
+    def key(self, *parts, version=None):
+        if version is None:
+            version = self.version()
+        return ":".join([self.name, str(version), *(str(part) for part in parts)])
+
+    def get(self, *parts, default=None):
+        return self.cache.get(self.key(*parts), default)
+
+    def set(self, *parts, value, timeout=_NOT_CACHED):
+        if timeout is _NOT_CACHED:
+            timeout = self.timeout
+        self.cache.set(self.key(*parts), value, timeout)
+
+    def get_or_set(self, parts, default, timeout=_NOT_CACHED):
+        """
+        Return the cached value for ``parts``, or compute it by calling
+        ``default()`` and cache it. ``None`` results are cached as well.
+        """
+        if not isinstance(parts, (list, tuple)):
+            parts = (parts,)
+        key = self.key(*parts)
+        value = self.cache.get(key, _NOT_CACHED)
+        if value is _NOT_CACHED:
+            value = default() if callable(default) else default
+            if timeout is _NOT_CACHED:
+                timeout = self.timeout
+            self.cache.set(key, value, timeout)
+        return value
+
+    async def aget_or_set(self, parts, default, timeout=_NOT_CACHED):
+        """Async get_or_set, ``default`` may be a coroutine function."""
+        if not isinstance(parts, (list, tuple)):
+            parts = (parts,)
+        key = self.key(*parts, version=await self.aversion())
+        value = await self.cache.aget(key, _NOT_CACHED)
+        if value is _NOT_CACHED:
+            value = default() if callable(default) else default
+            if inspect.isawaitable(value):
+                value = await value
+            if timeout is _NOT_CACHED:
+                timeout = self.timeout
+            await self.cache.aset(key, value, timeout)
+        return value
+
+    def delete(self, *parts):
+        self.cache.delete(self.key(*parts))
+
+    def delete_many(self, keys):
+        """Delete several entries, each given as a part or a tuple of parts."""
+        version = self.version()
+        self.cache.delete_many(
+            [
+                self.key(
+                    *(key if isinstance(key, (list, tuple)) else (key,)),
+                    version=version,
+                )
+                for key in keys
+            ]
+        )
+
+    def invalidate_all(self):
+        """Drop every entry of the namespace by moving to a new version."""
+        # Not stored yet (or evicted): the next access starts a new version
+        with contextlib.suppress(ValueError):
+            self.cache.incr(self.version_key)
+
+
+# Person of a logged-in user (activation state, Betrieb, Funktion)
+person_cache = CacheNamespace("person", timeout=60)
+# SchulungsTermin listings and rendered course cards
+termine_cache = CacheNamespace("termine", timeout=300)
+# Document lists per Funktion
+dokumente_cache = CacheNamespace("dokumente", timeout=3600)
+# Computed seat availability per SchulungsTermin
+verfuegbarkeit_cache = CacheNamespace("verfuegbarkeit", timeout=30)
+# Rendered pages for anonymous visitors
+seiten_cache = CacheNamespace("seiten", timeout=60)
@@ -1,9 +1,6 @@
 import os
 
-from django.db.models import Q
-
-from core.models import Person
-from core.utils import get_site_domain
+from core.utils import get_request_person, get_site_domain
 
 
 def test_system(request):
@@ -11,13 +8,7 @@ def test_system(request):
 
 
 def person_context(request):
-    if request.user.is_authenticated:
-        try:
-            person = Person.objects.get(Q(benutzer=request.user))
-            return {"person": person}
-        except Person.DoesNotExist:
-            pass
-    return {"person": None}
+    return {"person": get_request_person(request)}
 
 
 def site_domain(request):
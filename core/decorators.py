@@ -5,6 +5,7 @@ from django.shortcuts import redirect
 from django.utils.decorators import method_decorator
 
 from .models import Person
+from .utils import get_request_person
 
 
 def activation_required(view_func):
@@ -19,14 +20,10 @@ def activation_required(view_func):
         if not request.user.is_authenticated:
             return redirect("login")
 
-        # Check if user is activated
-        try:
-            person = Person.objects.get(benutzer=request.user)
-            if not person.is_activated:
-                # Redirect to activation pending page
-                return redirect("activation_pending")
-        except Person.DoesNotExist:
-            # User has no Person record, redirect to activation pending
+        # Check if user is activated. A user without Person record is
+        # redirected to activation pending as well
+        person = get_request_person(request)
+        if person is None or not person.is_activated:
             return redirect("activation_pending")
 
         # User is authenticated and activated, proceed
@@ -1,9 +1,11 @@
+from datetime import timedelta
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
-from .models import Person
+from .models import Person, SchulungsArt, SchulungsOrt, termin_zeitraum
 
 
 class UserRegistrationForm(UserCreationForm):
@@ -75,7 +77,8 @@ class UserRegistrationForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data["email"]
-        if User.objects.filter(email=email).exists():
+        # Case-insensitive, served by the UPPER(email) index (migration 0053)
+        if User.objects.filter(email__iexact=email).exists():
             raise ValidationError(
                 "Ein Benutzer mit dieser E-Mail-Adresse existiert bereits."
             )
@@ -208,3 +211,99 @@ class CombinedRegistrationForm:
         errors.update(self.user_form.errors)
         errors.update(self.person_form.errors)
         return errors
+
+
+class TerminFilterForm(forms.Form):
+    """Filters of the course listing on the index page (GET parameters)."""
+
+    art = forms.ModelChoiceField(
+        queryset=SchulungsArt.objects.order_by("name"),
+        required=False,
+        empty_label="Alle Schulungsarten",
+        widget=forms.Select(attrs={"class": "form-select"}),
+        label="Schulungsart",
+    )
+    ort = forms.ModelChoiceField(
+        queryset=SchulungsOrt.objects.order_by("name"),
+        required=False,
+        empty_label="Alle Orte",
+        widget=forms.Select(attrs={"class": "form-select"}),
+        label="Ort",
+    )
+    monat = forms.DateField(
+        required=False,
+        input_formats=["%Y-%m"],
+        widget=forms.DateInput(
+            format="%Y-%m", attrs={"type": "month", "class": "form-control"}
+        ),
+        label="Monat",
+    )
+    passend = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+        label="Nur für meine Funktion",
+    )
+
+    def __init__(self, *args, funktion=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.funktion = funktion
+        if funktion is None:
+            del self.fields["passend"]
+
+    def filter(self, queryset):
+        """Apply the valid filters to a SchulungsTermin queryset."""
+        if not self.is_valid():
+            return queryset
+        data = self.cleaned_data
+        if data["art"]:
+            queryset = queryset.filter(schulung__art=data["art"])
+        if data["ort"]:
+            queryset = queryset.filter(ort=data["ort"])
+        if data["monat"]:
+            start = data["monat"].replace(day=1)
+            end = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            queryset = queryset.filter(
+                termin_zeitraum("", start, end - timedelta(days=1))
+            )
+        if data.get("passend"):
+            queryset = queryset.suitable_for(self.funktion)
+        return queryset
+
+    @property
+    def is_filtered(self):
+        return self.is_valid() and any(self.cleaned_data.values())
+
+
+class ReportForm(forms.Form):
+    """Parameters of a report in the admin ("Auswertungen")."""
+
+    report = forms.ChoiceField(label="Auswertung")
+    format = forms.ChoiceField(
+        label="Format",
+        choices=[("csv", "CSV"), ("xlsx", "Excel (XLSX)"), ("parquet", "Parquet")],
+    )
+    von = forms.DateField(
+        required=False,
+        widget=forms.DateInput(format="%Y-%m-%d", attrs={"type": "date"}),
+        label="Termine ab",
+    )
+    bis = forms.DateField(
+        required=False,
+        widget=forms.DateInput(format="%Y-%m-%d", attrs={"type": "date"}),
+        label="Termine bis",
+    )
+
+    def __init__(self, *args, **kwargs):
+        from .services.reporting import REPORTS
+
+        super().__init__(*args, **kwargs)
+        self.fields["report"].choices = [
+            (report.name, report.title) for report in REPORTS.values()
+        ]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        von, bis = cleaned_data.get("von"), cleaned_data.get("bis")
+        if von and bis and von > bis:
+            raise ValidationError("Das Ende liegt vor dem Beginn.")
+        return cleaned_data
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reportlab import rl_config
+
+from core.services.certificate import (
+    _load_background,
+    get_template_path,
+    render_teilnahmebestaetigung,
+)
+
+SAMPLE_DATA = {
+    "name": "Maximilian Mustermann",
+    "datum": "17.10.2026",
+    "schulung_name": "Kehrtechnik und Messtechnik Grundkurs",
+    "dauer": "8 LE",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure ms per certificate and bytes per PDF for the certificate "
+        "background variants"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=20,
+            help="Certificates rendered per variant (default: 20)",
+        )
+        parser.add_argument(
+            "--dpi",
+            type=int,
+            action="append",
+            help="JPEG background DPI to measure, repeatable (default: 150)",
+        )
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        template_path = get_template_path()
+        png = _load_background(template_path, 0)
+        if png is None:
+            raise CommandError(f"Vorlage nicht gefunden: {template_path}")
+
+        variants = [
+            # Previous behaviour: PNG read and decoded per PDF, ASCII85 streams
+            ("Vorher (PNG, ASCII85)", template_path, 1),
+            ("PNG-Pfad pro Aufruf", template_path, 0),
+            ("PNG einmal dekodiert", png, 0),
+        ]
+        for dpi in options["dpi"] or [150]:
+            variants.append(
+                (f"JPEG {dpi} DPI", _load_background(template_path, dpi), 0)
+            )
+
+        self.stdout.write(f"{'Variante':<24}{'ms/Zertifikat':>16}{'Bytes/PDF':>12}")
+        use_a85 = rl_config.useA85
+        try:
+            for label, background, ascii85 in variants:
+                rl_config.useA85 = ascii85
+                size = 0
+                start = time.perf_counter()
+                for _ in range(count):
+                    pdf = render_teilnahmebestaetigung(
+                        background=background, **SAMPLE_DATA
+                    )
+                    size = len(pdf.getvalue())
+                elapsed_ms = (time.perf_counter() - start) * 1000 / count
+                self.stdout.write(f"{label:<24}{elapsed_ms:>16.1f}{size:>12}")
+        finally:
+            rl_config.useA85 = use_a85
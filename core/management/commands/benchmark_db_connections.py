@@ -0,0 +1,120 @@
+import statistics
+import time
+from copy import deepcopy
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.test import RequestFactory
+
+from core.views.views import render_index
+
+
+def pool_available():
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the latency of index page requests with a new database "
+        "connection per request, persistent connections and the psycopg pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Timed requests per mode (default: 200)",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to benchmark (default: default)",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1.")
+        connection = connections[options["database"]]
+        original = deepcopy(connection.settings_dict)
+
+        modes = [
+            ("ohne Persistenz (CONN_MAX_AGE=0)", {"CONN_MAX_AGE": 0}, None),
+            ("persistent (CONN_MAX_AGE=60)", {"CONN_MAX_AGE": 60}, None),
+        ]
+        if connection.vendor != "postgresql":
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Pool übersprungen: {connection.vendor} hat keinen Pool, "
+                    "für aussagekräftige Zahlen gegen PostgreSQL messen."
+                )
+            )
+        elif not pool_available():
+            self.stdout.write(
+                self.style.WARNING(
+                    "Pool übersprungen: psycopg_pool ist nicht installiert "
+                    "(pip install 'psycopg[pool]')."
+                )
+            )
+        else:
+            modes.append(
+                (
+                    "Pool (psycopg_pool)",
+                    {"CONN_MAX_AGE": 0},
+                    {"min_size": 1, "max_size": 4, "timeout": 10},
+                )
+            )
+
+        try:
+            for label, settings, pool in modes:
+                self.reset(connection, original)
+                connection.settings_dict.update(settings)
+                if pool:
+                    connection.settings_dict["OPTIONS"]["pool"] = pool
+                timings = self.measure(options["requests"])
+                self.report(label, timings)
+        finally:
+            self.reset(connection, original)
+
+    def reset(self, connection, settings_dict):
+        connection.close()
+        if connection.settings_dict.get("OPTIONS", {}).get("pool"):
+            connection.close_pool()
+        connection.settings_dict = deepcopy(settings_dict)
+
+    def measure(self, count):
+        """
+        Time ``count`` index page requests. The request signals are sent like
+        the WSGI handler does, so connections are closed, kept or returned
+        to the pool exactly as in production. The first request is a warm-up.
+        """
+        factory = RequestFactory()
+        timings = []
+        for i in range(count + 1):
+            request = factory.get("/")
+            request.user = AnonymousUser()
+            start = time.perf_counter()
+            request_started.send(sender=WSGIHandler, environ=request.META)
+            try:
+                render_index(request)
+            finally:
+                request_finished.send(sender=WSGIHandler)
+            if i:
+                timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+        self.stdout.write(
+            f"{label}: Mittel {statistics.mean(timings):.2f} ms, "
+            f"Median {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms "
+            f"({len(timings)} Requests)"
+        )
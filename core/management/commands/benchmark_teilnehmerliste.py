@@ -0,0 +1,119 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    Betrieb,
+    Person,
+    Schulung,
+    SchulungsTeilnehmer,
+    SchulungsTermin,
+)
+from core.services.teilnehmerliste import (
+    build_teilnehmerliste,
+    teilnehmerliste_teilnehmer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure ms, queries and bytes per attendance list PDF on generated "
+        "participants (rolled back afterwards)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--teilnehmer",
+            type=int,
+            default=200,
+            help="Participants per Termin (default: 200)",
+        )
+        parser.add_argument(
+            "--termine",
+            type=int,
+            default=1,
+            help="Termine in one PDF, more than one is the batch mode (default: 1)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="PDFs built per variant (default: 3)",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            termine = self.create_termine(options["termine"], options["teilnehmer"])
+            variants = [
+                # Previous behaviour: Person and Betrieb loaded per row
+                (
+                    "Vorher (pro Zeile)",
+                    lambda: SchulungsTeilnehmer.objects.filter(
+                        schulungstermin__in=termine
+                    ).order_by(
+                        "schulungstermin__datum_von", "schulungstermin_id", "pk"
+                    ),
+                ),
+                ("select_related", lambda: teilnehmerliste_teilnehmer(termine)),
+            ]
+            self.stdout.write(
+                f"{len(termine)} Termin(e) × {options['teilnehmer']} Teilnehmer"
+            )
+            self.stdout.write(
+                f"{'Variante':<22}{'ms/PDF':>10}{'Queries':>10}{'Bytes':>10}"
+            )
+            for label, teilnehmer in variants:
+                self.measure(label, termine, teilnehmer, options["repeat"])
+            transaction.set_rollback(True)
+
+    def measure(self, label, termine, teilnehmer, repeat):
+        size = 0
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(repeat):
+                pdf = build_teilnehmerliste(termine, teilnehmer())
+                size = len(pdf.read())
+        elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+        self.stdout.write(
+            f"{label:<22}{elapsed_ms:>10.1f}{len(queries) // repeat:>10}{size:>10}"
+        )
+
+    def create_termine(self, count, teilnehmer_count):
+        schulung = Schulung.objects.create(name="Benchmark Teilnehmerliste")
+        betriebe = Betrieb.objects.bulk_create(
+            Betrieb(name=f"Betrieb {i}") for i in range(10)
+        )
+        termine = []
+        start = datetime(2030, 1, 7, 9, 0)
+        for t in range(count):
+            termin = SchulungsTermin.objects.create(
+                schulung=schulung,
+                datum_von=start + timedelta(days=t),
+                datum_bis=start + timedelta(days=t, hours=8),
+                max_teilnehmer=teilnehmer_count,
+            )
+            personen = Person.objects.bulk_create(
+                Person(
+                    vorname=f"Vorname{i}",
+                    nachname=f"Nachname{t}-{i}",
+                    email=f"benchmark{t}-{i}@example.com",
+                    telefon="+43 664 0000000",
+                    betrieb=betriebe[i % len(betriebe)],
+                    dsv_akzeptiert=bool(i % 2),
+                )
+                for i in range(teilnehmer_count)
+            )
+            SchulungsTeilnehmer.objects.bulk_create(
+                SchulungsTeilnehmer(
+                    schulungstermin=termin,
+                    person=person,
+                    vorname=person.vorname,
+                    nachname=person.nachname,
+                )
+                for person in personen
+            )
+            termine.append(termin)
+        return termine
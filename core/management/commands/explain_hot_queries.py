@@ -0,0 +1,218 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import (
+    Bestellung,
+    Betrieb,
+    Person,
+    Schulung,
+    SchulungsTeilnehmer,
+    SchulungsTermin,
+)
+
+# Index access in PostgreSQL and SQLite plans, group 1 is the index name
+INDEX_USAGE = re.compile(
+    r"(?:Index (?:Only )?Scan(?: Backward)? using|Bitmap Index Scan on"
+    r"|USING (?:COVERING )?INDEX) (\S+)"
+)
+
+STATUS = ["Angemeldet", "Teilgenommen", "Entschuldigt", "Unentschuldigt"]
+
+
+def hot_queries():
+    """(label, queryset) of the lookups the indexes of migration 0053 serve."""
+    person = (
+        Person.objects.filter(benutzer__isnull=False, betrieb__isnull=False)
+        .select_related("benutzer")
+        .order_by("pk")
+        .first()
+    )
+    termin = SchulungsTermin.objects.order_by("pk").first()
+    person_id = person.pk if person else 0
+    return [
+        (
+            "SchulungsTeilnehmer(schulungstermin, person)",
+            SchulungsTeilnehmer.objects.filter(
+                schulungstermin_id=termin.pk if termin else 0, person_id=person_id
+            ),
+        ),
+        (
+            "SchulungsTeilnehmer(person, status)",
+            SchulungsTeilnehmer.objects.filter(
+                person_id=person_id, status="Teilgenommen"
+            ),
+        ),
+        ("Bestellung(person)", Bestellung.objects.filter(person_id=person_id)),
+        (
+            "Person(benutzer)",
+            Person.objects.filter(benutzer_id=person.benutzer_id if person else 0),
+        ),
+        (
+            "Person(betrieb)",
+            Person.objects.filter(betrieb_id=person.betrieb_id if person else 0),
+        ),
+        # PostgreSQL compares UPPER(email); SQLite uses LIKE and scans
+        (
+            "User(UPPER(email))",
+            User.objects.filter(
+                email__iexact=person.benutzer.email if person else "x@example.com"
+            ),
+        ),
+        (
+            "SchulungsTermin(datum_von)",
+            SchulungsTermin.objects.filter(datum_von__gte=timezone.now()).order_by(
+                "datum_von"
+            ),
+        ),
+        (
+            "SchulungsTermin(buchbar, datum_von)",
+            SchulungsTermin.objects.bookable_upcoming().order_by("datum_von"),
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Show with EXPLAIN whether the hot lookups use an index, optionally "
+        "on a seeded dataset that is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Create this many Personen (with Users, Betriebe, Termine, "
+            "Teilnehmer and Bestellungen) before explaining",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the seeded data instead of rolling it back",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail if a query does not use an index",
+        )
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print the full plan of every query",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["seed"]:
+                self.seed(options["seed"])
+            with connection.cursor() as cursor:
+                # Fresh statistics, otherwise the planner guesses table sizes
+                cursor.execute("ANALYZE")
+            results = [(label, queryset.explain()) for label, queryset in hot_queries()]
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+        missing = []
+        for label, plan in results:
+            match = INDEX_USAGE.search(plan)
+            if match:
+                self.stdout.write(f"✓ {label}: {match.group(1)}")
+            else:
+                missing.append(label)
+                self.stdout.write(self.style.WARNING(f"✗ {label}: kein Index"))
+            if options["verbose_plans"] or not match:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+        if missing and options["check"]:
+            raise CommandError(f"Ohne Index: {', '.join(missing)}")
+
+    def seed(self, count):
+        """
+        Bulk-create ``count`` Personen with Users, 10 per Betrieb, three
+        Teilnahmen each and Termine spread over five years of history.
+        """
+        now = timezone.now()
+        betriebe = Betrieb.objects.bulk_create(
+            [Betrieb(name=f"Seed Betrieb {i}") for i in range(max(count // 10, 1))],
+            batch_size=1000,
+        )
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"seed-{i}",
+                    email=f"seed-{i}@example.com",
+                    password="!",
+                )
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+        personen = Person.objects.bulk_create(
+            [
+                Person(
+                    benutzer=user,
+                    betrieb=betriebe[i // 10 % len(betriebe)],
+                    vorname="Seed",
+                    nachname=str(i),
+                    email=user.email,
+                )
+                for i, user in enumerate(users)
+            ],
+            batch_size=1000,
+        )
+        schulungen = Schulung.objects.bulk_create(
+            [Schulung(name=f"Seed Schulung {i}", beschreibung="") for i in range(20)]
+        )
+        termin_count = max(count // 20, 50)
+        termine = SchulungsTermin.objects.bulk_create(
+            [
+                SchulungsTermin(
+                    schulung=schulungen[i % len(schulungen)],
+                    # Mostly history, the last tenth lies in the future
+                    datum_von=now + timedelta(days=(i - termin_count * 0.9) * 2),
+                    datum_bis=now + timedelta(days=(i - termin_count * 0.9) * 2),
+                    max_teilnehmer=20,
+                    buchbar=i % 3 != 0,
+                )
+                for i in range(termin_count)
+            ],
+            batch_size=1000,
+        )
+        Bestellung.objects.bulk_create(
+            [
+                Bestellung(
+                    person=person,
+                    schulungstermin=termine[i % termin_count],
+                    anzahl=1,
+                    einzelpreis=0,
+                    gesamtpreis=0,
+                    status="Bestellt",
+                )
+                for i, person in enumerate(personen[::5])
+            ],
+            batch_size=1000,
+        )
+        SchulungsTeilnehmer.objects.bulk_create(
+            [
+                SchulungsTeilnehmer(
+                    schulungstermin=termine[(i * 7 + k * 13) % termin_count],
+                    person=person,
+                    vorname=person.vorname,
+                    nachname=person.nachname,
+                    status=STATUS[(i + k) % len(STATUS)],
+                )
+                for i, person in enumerate(personen)
+                for k in range(3)
+            ],
+            batch_size=1000,
+        )
+        self.stdout.write(
+            f"{count} Personen, {termin_count} Termine und "
+            f"{count * 3} Teilnahmen angelegt."
+        )
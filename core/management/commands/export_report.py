@@ -0,0 +1,67 @@
+import argparse
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.reporting import (
+    FORMATS,
+    REPORTS,
+    FormatNotAvailable,
+    require_format,
+    write_report,
+)
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"Ungültiges Datum {value!r}, erwartet JJJJ-MM-TT."
+        ) from e
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a report (participants per Schulung/Betrieb/Funktion, revenue "
+        "per Organisation, attendance) as CSV, XLSX or Parquet"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("report", choices=sorted(REPORTS))
+        parser.add_argument(
+            "--format",
+            choices=sorted(FORMATS),
+            default="csv",
+            help="Output format (default: csv)",
+        )
+        parser.add_argument(
+            "--von", type=parse_date, help="Only Termine from this date (JJJJ-MM-TT)"
+        )
+        parser.add_argument(
+            "--bis", type=parse_date, help="Only Termine up to this date (JJJJ-MM-TT)"
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            help="File to write, '-' for stdout (default: <report>[_von_…].<format>)",
+        )
+
+    def handle(self, *args, **options):
+        report = REPORTS[options["report"]]
+        format = options["format"]
+        von, bis = options["von"], options["bis"]
+        output = options["output"] or report.filename(format, von, bis)
+
+        try:
+            require_format(format)
+        except FormatNotAvailable as e:
+            raise CommandError(str(e)) from e
+
+        if output == "-":
+            write_report(report, format, sys.stdout.buffer, von, bis)
+            return
+        with open(output, "wb") as file:
+            write_report(report, format, file, von, bis)
+        self.stdout.write(f"{report.title} geschrieben: {output}")
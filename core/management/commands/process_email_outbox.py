@@ -0,0 +1,84 @@
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+
+from core.services.email import (
+    adeliver_outbox_emails,
+    claimable_outbox_emails,
+    claimable_teilnahmebestaetigungen,
+    deliver_outbox_emails,
+    deliver_teilnahmebestaetigungen,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver pending emails from the outbox (EmailOutbox) and queued "
+        "Teilnahmebestätigungen"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll the outbox every --interval seconds",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=30,
+            help="Seconds between two polls in --loop mode (default: 30)",
+        )
+        parser.add_argument(
+            "--max-versuche",
+            type=int,
+            default=5,
+            help="Give up on an email after this many failed attempts (default: 5)",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="use_async",
+            help="Send the outbox emails concurrently on an event loop "
+            "(native with httpx installed) instead of a thread pool",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.process(options["max_versuche"], options["use_async"])
+            if not options["loop"]:
+                break
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                break
+
+    def process(self, max_versuche, use_async=False):
+        outbox_ids = list(
+            claimable_outbox_emails(max_versuche)
+            .order_by("created")
+            .values_list("pk", flat=True)
+        )
+        if outbox_ids:
+            deliver = (
+                async_to_sync(adeliver_outbox_emails)
+                if use_async
+                else deliver_outbox_emails
+            )
+            sent, failed = deliver(outbox_ids, max_versuche=max_versuche)
+            self.stdout.write(f"{sent} E-Mail(s) versendet, {failed} fehlgeschlagen.")
+
+        auftrag_ids = list(
+            claimable_teilnahmebestaetigungen(max_versuche)
+            .order_by("created")
+            .values_list("pk", flat=True)
+        )
+        if auftrag_ids:
+            sent, failed = deliver_teilnahmebestaetigungen(
+                auftrag_ids, max_versuche=max_versuche
+            )
+            self.stdout.write(
+                f"{sent} Teilnahmebestätigung(en) versendet, "
+                f"{failed} fehlgeschlagen."
+            )
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from core.cache import verfuegbarkeit_cache
+from core.models import SchulungsTermin
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the participants of every SchulungsTermin and fix drift in "
+        "the belegte_plaetze counter"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift, do not update the counters",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        drifted = 0
+
+        termine = SchulungsTermin.objects.annotate(
+            gezaehlt=Count("schulungsteilnehmer")
+        ).select_related("schulung")
+        for termin in termine.iterator():
+            if termin.belegte_plaetze == termin.gezaehlt:
+                continue
+            drifted += 1
+            self.stdout.write(
+                f"{termin}: belegte_plaetze={termin.belegte_plaetze}, "
+                f"tatsächlich={termin.gezaehlt}"
+            )
+            if not dry_run:
+                with transaction.atomic():
+                    # Recount under a row lock so concurrent bookings are not lost
+                    locked = SchulungsTermin.objects.select_for_update().get(
+                        pk=termin.pk
+                    )
+                    SchulungsTermin.objects.filter(pk=locked.pk).update(
+                        belegte_plaetze=locked.schulungsteilnehmer_set.count()
+                    )
+
+        if drifted and not dry_run:
+            verfuegbarkeit_cache.invalidate_all()
+
+        if drifted == 0:
+            self.stdout.write(self.style.SUCCESS("Alle Zähler sind korrekt."))
+        elif dry_run:
+            self.stdout.write(
+                self.style.WARNING(f"{drifted} Schulungstermin(e) mit Abweichung.")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"{drifted} Schulungstermin(e) korrigiert.")
+            )
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_belegte_plaetze(apps, schema_editor):
+    """Initialize the seat counter from the existing participants."""
+    SchulungsTermin = apps.get_model("core", "SchulungsTermin")
+    SchulungsTeilnehmer = apps.get_model("core", "SchulungsTeilnehmer")
+
+    teilnehmer_count = (
+        SchulungsTeilnehmer.objects.filter(schulungstermin=OuterRef("pk"))
+        .order_by()
+        .values("schulungstermin")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    SchulungsTermin.objects.update(
+        belegte_plaetze=Coalesce(Subquery(teilnehmer_count), 0)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0047_person_adresse_person_firmenanschrift_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="schulungstermin",
+            name="belegte_plaetze",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="Belegte Plätze"
+            ),
+        ),
+        migrations.RunPython(count_belegte_plaetze, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0048_schulungstermin_belegte_plaetze"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                (
+                    "empfaenger",
+                    models.EmailField(max_length=254, verbose_name="Empfänger"),
+                ),
+                ("betreff", models.CharField(max_length=255, verbose_name="Betreff")),
+                ("html", models.TextField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Offen", "Offen"),
+                            ("In Zustellung", "In Zustellung"),
+                            ("Versendet", "Versendet"),
+                            ("Fehlgeschlagen", "Fehlgeschlagen"),
+                        ],
+                        default="Offen",
+                        max_length=50,
+                    ),
+                ),
+                ("versuche", models.IntegerField(default=0)),
+                ("fehler", models.TextField(blank=True, null=True)),
+                ("versendet_am", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "E-Mail im Postausgang",
+                "verbose_name_plural": "E-Mail-Postausgang",
+                "ordering": ["-created"],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0049_emailoutbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailVersand",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("betreff", models.CharField(max_length=255, verbose_name="Betreff")),
+                (
+                    "gestartet_von",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "schulungstermin",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="email_versand_set",
+                        to="core.schulungstermin",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "E-Mail-Versand",
+                "verbose_name_plural": "E-Mail-Versände",
+                "ordering": ["-created"],
+            },
+        ),
+        migrations.AddField(
+            model_name="emailoutbox",
+            name="versand",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="emails",
+                to="core.emailversand",
+            ),
+        ),
+    ]
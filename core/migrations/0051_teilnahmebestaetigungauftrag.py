@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0050_emailversand"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TeilnahmebestaetigungAuftrag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Offen", "Offen"),
+                            ("In Zustellung", "In Zustellung"),
+                            ("Versendet", "Versendet"),
+                            ("Fehlgeschlagen", "Fehlgeschlagen"),
+                        ],
+                        default="Offen",
+                        max_length=50,
+                    ),
+                ),
+                ("versuche", models.IntegerField(default=0)),
+                ("fehler", models.TextField(blank=True, null=True)),
+                ("versendet_am", models.DateTimeField(blank=True, null=True)),
+                (
+                    "schulungsteilnehmer",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="teilnahmebestaetigung_auftrag",
+                        to="core.schulungsteilnehmer",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Teilnahmebestätigung-Versand",
+                "verbose_name_plural": "Teilnahmebestätigung-Versände",
+                "ordering": ["-created"],
+            },
+        ),
+    ]
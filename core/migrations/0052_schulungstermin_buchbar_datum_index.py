@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0051_teilnahmebestaetigungauftrag"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="schulungstermin",
+            index=models.Index(
+                fields=["buchbar", "datum_von"], name="schulungstermin_buchbar_datum"
+            ),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.1 on 2026-10-17 14:40
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+USER_EMAIL_INDEX = models.Index(Upper("email"), name="auth_user_email_upper_idx")
+
+
+def check_duplicate_teilnehmer(apps, schema_editor):
+    """
+    The unique constraint fails on existing duplicates. List them instead
+    of deleting one of them, the status may differ.
+    """
+    SchulungsTeilnehmer = apps.get_model("core", "SchulungsTeilnehmer")
+    duplicates = list(
+        SchulungsTeilnehmer.objects.filter(person__isnull=False)
+        .values("schulungstermin_id", "person_id")
+        .annotate(anzahl=Count("pk"))
+        .filter(anzahl__gt=1)
+    )
+    if duplicates:
+        raise RuntimeError(
+            "SchulungsTeilnehmer mit derselben Person mehrfach pro Termin, "
+            f"bitte vor der Migration bereinigen: {duplicates}"
+        )
+
+
+def add_user_email_index(apps, schema_editor):
+    # auth.User belongs to Django, so the expression index on UPPER(email)
+    # (email__iexact) is created here instead of in a model Meta
+    schema_editor.add_index(apps.get_model("auth", "User"), USER_EMAIL_INDEX)
+
+
+def remove_user_email_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model("auth", "User"), USER_EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("core", "0052_schulungstermin_buchbar_datum_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="schulungsteilnehmer",
+            index=models.Index(
+                condition=models.Q(("person__isnull", False)),
+                fields=["person", "status"],
+                name="teilnehmer_person_status",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schulungstermin",
+            index=models.Index(fields=["datum_von"], name="schulungstermin_datum_von"),
+        ),
+        migrations.RunPython(check_duplicate_teilnehmer, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="schulungsteilnehmer",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("person__isnull", False)),
+                fields=("schulungstermin", "person"),
+                name="teilnehmer_termin_person_uniq",
+                violation_error_message=(
+                    "Diese Person ist für den Schulungstermin bereits angemeldet."
+                ),
+            ),
+        ),
+        migrations.RunPython(add_user_email_index, remove_user_email_index),
+    ]
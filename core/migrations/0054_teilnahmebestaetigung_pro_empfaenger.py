@@ -0,0 +1,71 @@
+# Generated by Django 5.2.1 on 2026-10-17 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PLATTFORM_KOPIE = "bildungsplattform@rauchfangkehrer.or.at"
+
+
+def split_per_empfaenger(apps, schema_editor):
+    """
+    Existing jobs covered the participant and the platform copy at once:
+    keep them for the participant and add the copy with the same state.
+    """
+    TeilnahmebestaetigungAuftrag = apps.get_model(
+        "core", "TeilnahmebestaetigungAuftrag"
+    )
+    kopien = []
+    for auftrag in TeilnahmebestaetigungAuftrag.objects.select_related(
+        "schulungsteilnehmer__person"
+    ):
+        teilnehmer = auftrag.schulungsteilnehmer
+        if teilnehmer.person_id:
+            auftrag.empfaenger = teilnehmer.person.email or ""
+        else:
+            auftrag.empfaenger = teilnehmer.email or ""
+        auftrag.save(update_fields=["empfaenger"])
+        kopien.append(
+            TeilnahmebestaetigungAuftrag(
+                schulungsteilnehmer=teilnehmer,
+                empfaenger=PLATTFORM_KOPIE,
+                status=auftrag.status,
+                versuche=auftrag.versuche,
+                fehler=auftrag.fehler,
+                versendet_am=auftrag.versendet_am,
+            )
+        )
+    TeilnahmebestaetigungAuftrag.objects.bulk_create(kopien)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0053_hot_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="teilnahmebestaetigungauftrag",
+            name="schulungsteilnehmer",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="teilnahmebestaetigung_auftraege",
+                to="core.schulungsteilnehmer",
+            ),
+        ),
+        migrations.AddField(
+            model_name="teilnahmebestaetigungauftrag",
+            name="empfaenger",
+            field=models.EmailField(
+                default="", max_length=254, verbose_name="Empfänger"
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(split_per_empfaenger, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="teilnahmebestaetigungauftrag",
+            constraint=models.UniqueConstraint(
+                fields=("schulungsteilnehmer", "empfaenger"),
+                name="teilnahmebestaetigung_teilnehmer_empfaenger_uniq",
+            ),
+        ),
+    ]
@@ -1,9 +1,13 @@
 import os
 import uuid
+from datetime import datetime, time, timedelta
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils import timezone
 
+from core.cache import verfuegbarkeit_cache
 from core.storage import ScalewayObjectStorage
 
 
@@ -92,6 +96,71 @@ class Schulung(BaseModel):
         verbose_name_plural = "Schulungen"
 
 
+def termin_zeitraum(prefix, von, bis):
+    """
+    Q object for Termine starting between ``von`` and ``bis`` (dates, both
+    included). ``prefix`` is the lookup path to the SchulungsTermin, e.g.
+    "schulungstermin__", or "" on SchulungsTermin itself.
+    """
+    q = Q()
+    # A range instead of __date, so the datum_von index is used
+    if von:
+        q &= Q(**{f"{prefix}datum_von__gte": datetime.combine(von, time.min)})
+    if bis:
+        q &= Q(
+            **{
+                f"{prefix}datum_von__lt": datetime.combine(
+                    bis + timedelta(days=1), time.min
+                )
+            }
+        )
+    return q
+
+
+class SchulungsTerminQuerySet(models.QuerySet):
+    def bookable_upcoming(self):
+        """Bookable Termine that have not started yet (index buchbar_datum)."""
+        return self.filter(buchbar=True, datum_von__gte=timezone.now())
+
+    def suitable_for(self, funktion):
+        """
+        Termine whose Schulung is open to everyone (no suitable Funktionen
+        set) or lists the given Funktion.
+        """
+        restrictions = Schulung.suitable_for_funktionen.through.objects.filter(
+            schulung_id=OuterRef("schulung_id")
+        )
+        return self.filter(
+            ~Exists(restrictions) | Exists(restrictions.filter(funktion=funktion))
+        )
+
+    def after(self, datum_von, pk):
+        """Keyset pagination: Termine ordered after (datum_von, pk)."""
+        return self.filter(
+            Q(datum_von__gt=datum_von) | Q(datum_von=datum_von, pk__gt=pk)
+        )
+
+    def with_availability(self, betrieb=None):
+        """
+        Prefetch the suitable Funktionen, so listing Termine costs a constant
+        number of queries. Seat counts come from the ``belegte_plaetze``
+        column and need no extra query.
+
+        If a Betrieb is given, ``betrieb_angemeldet`` tells whether one of its
+        Personen is already registered for the Termin.
+        """
+        queryset = self
+        if betrieb is not None:
+            queryset = queryset.annotate(
+                betrieb_angemeldet=Exists(
+                    SchulungsTeilnehmer.objects.filter(
+                        schulungstermin=OuterRef("pk"), person__betrieb=betrieb
+                    )
+                )
+            )
+        return queryset.prefetch_related("schulung__suitable_for_funktionen")
+
+
 class SchulungsTermin(BaseModel):
     datum_von = models.DateTimeField()
     datum_bis = models.DateTimeField()
@@ -112,10 +181,46 @@ class SchulungsTermin(BaseModel):
         default=0, verbose_name="Mininum Teilnehmeranzahl"
     )
     buchbar = models.BooleanField(default=1)
+    # Maintained with F() updates by the SchulungsTeilnehmer signals,
+    # see core.signals and the reconcile_belegte_plaetze command
+    belegte_plaetze = models.IntegerField(
+        default=0, editable=False, verbose_name="Belegte Plätze"
+    )
+
+    objects = SchulungsTerminQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        """
+        Saving an existing Termin never writes ``belegte_plaetze``, the
+        in-memory counter may be stale. Change it with adjust_belegte_plaetze,
+        reset it with the reconcile_belegte_plaetze command or name it in
+        ``update_fields``. A copy saved with ``pk = None`` starts at 0, it has
+        no participants yet.
+        """
+        if self.pk is None:
+            self.belegte_plaetze = 0
+        elif not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "belegte_plaetze"
+            ]
+        super().save(*args, **kwargs)
+
+    def adjust_belegte_plaetze(self, delta):
+        """Atomically change the seat counter by ``delta``."""
+        SchulungsTermin.objects.filter(pk=self.pk).update(
+            belegte_plaetze=F("belegte_plaetze") + delta
+        )
+        self.belegte_plaetze += delta
+        # update() sends no signal, drop cached seat counts explicitly. Only
+        # after commit: before it, a concurrent request would still read the
+        # old count and cache it under the new version
+        transaction.on_commit(verfuegbarkeit_cache.invalidate_all)
 
     @property
     def freie_plaetze(self):
-        return self.max_teilnehmer - self.schulungsteilnehmer_set.count()
+        return self.max_teilnehmer - self.belegte_plaetze
 
     @property
     def registrierte_betriebe(self):
@@ -139,13 +244,20 @@ class SchulungsTermin(BaseModel):
 
     @property
     def teilnehmer_count(self):
-        return self.schulungsteilnehmer_set.count()
+        return self.belegte_plaetze
 
     def __str__(self):
         return f"{self.schulung.name} am {self.datum_von}"
 
     class Meta:
         verbose_name_plural = "Schulungstermine"
+        indexes = [
+            models.Index(
+                fields=["buchbar", "datum_von"],
+                name="schulungstermin_buchbar_datum",
+            ),
+            models.Index(fields=["datum_von"], name="schulungstermin_datum_von"),
+        ]
 
 
 class Betrieb(BaseModel):
@@ -318,8 +430,35 @@ class SchulungsTeilnehmer(BaseModel):
         default="Angemeldet",
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so signals can detect changes without
+        # querying the previous row
+        instance._loaded_values = dict(zip(field_names, values, strict=True))
+        return instance
+
     class Meta:
         verbose_name_plural = "Schulungsteilnehmer"
+        constraints = [
+            # External participants have no Person and may repeat
+            models.UniqueConstraint(
+                fields=["schulungstermin", "person"],
+                condition=Q(person__isnull=False),
+                name="teilnehmer_termin_person_uniq",
+                violation_error_message=(
+                    "Diese Person ist für den Schulungstermin bereits angemeldet."
+                ),
+            ),
+        ]
+        indexes = [
+            # "Meine Schulungen" and the certificate downloads
+            models.Index(
+                fields=["person", "status"],
+                condition=Q(person__isnull=False),
+                name="teilnehmer_person_status",
+            ),
+        ]
 
 
 class SchulungsArtFunktion(BaseModel):
@@ -409,3 +548,119 @@ class SchulungsUnterlage(BaseModel):
     class Meta:
         verbose_name = "Schulungsunterlage"
         verbose_name_plural = "Schulungsunterlagen"
+
+
+class TeilnahmebestaetigungAuftrag(BaseModel):
+    """
+    Queued certificate email for a participant who reached "Teilgenommen".
+    One per participant and recipient (the participant and the platform
+    copy), so each certificate is issued only once and a retry resends only
+    the copy that failed; delivered after commit like the EmailOutbox, see
+    core.services.email.
+    """
+
+    schulungsteilnehmer = models.ForeignKey(
+        SchulungsTeilnehmer,
+        on_delete=models.CASCADE,
+        related_name="teilnahmebestaetigung_auftraege",
+    )
+    empfaenger = models.EmailField(verbose_name="Empfänger")
+    STATUS_CHOICES = [
+        ("Offen", "Offen"),
+        ("In Zustellung", "In Zustellung"),
+        ("Versendet", "Versendet"),
+        ("Fehlgeschlagen", "Fehlgeschlagen"),
+    ]
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="Offen")
+    versuche = models.IntegerField(default=0)
+    fehler = models.TextField(null=True, blank=True)
+    versendet_am = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return (
+            f"Teilnahmebestätigung für {self.schulungsteilnehmer} an {self.empfaenger}"
+        )
+
+    class Meta:
+        ordering = ["-created"]
+        verbose_name = "Teilnahmebestätigung-Versand"
+        verbose_name_plural = "Teilnahmebestätigung-Versände"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schulungsteilnehmer", "empfaenger"],
+                name="teilnahmebestaetigung_teilnehmer_empfaenger_uniq",
+            ),
+        ]
+
+
+class EmailVersand(BaseModel):
+    """
+    One bulk dispatch (e.g. a reminder to all participants of a Termin). The
+    per-recipient results are the EmailOutbox rows pointing to it.
+    """
+
+    betreff = models.CharField(max_length=255, verbose_name="Betreff")
+    schulungstermin = models.ForeignKey(
+        SchulungsTermin,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="email_versand_set",
+    )
+    gestartet_von = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True
+    )
+
+    def __str__(self):
+        return f"{self.betreff} ({self.created:%d.%m.%Y %H:%M})"
+
+    def statistik(self):
+        """Count the recipients per result in a single query."""
+        return self.emails.aggregate(
+            gesamt=Count("pk"),
+            offen=Count("pk", filter=Q(status__in=["Offen", "In Zustellung"])),
+            versendet=Count("pk", filter=Q(status="Versendet")),
+            wiederholt=Count("pk", filter=Q(status="Versendet", versuche__gt=1)),
+            fehlgeschlagen=Count("pk", filter=Q(status="Fehlgeschlagen")),
+        )
+
+    class Meta:
+        ordering = ["-created"]
+        verbose_name = "E-Mail-Versand"
+        verbose_name_plural = "E-Mail-Versände"
+
+
+class EmailOutbox(BaseModel):
+    """
+    Transactional outbox for emails: rows are written inside the business
+    transaction and delivered after commit, see core.services.email.
+    """
+
+    versand = models.ForeignKey(
+        EmailVersand,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="emails",
+    )
+    empfaenger = models.EmailField(verbose_name="Empfänger")
+    betreff = models.CharField(max_length=255, verbose_name="Betreff")
+    html = models.TextField()
+    STATUS_CHOICES = [
+        ("Offen", "Offen"),
+        ("In Zustellung", "In Zustellung"),
+        ("Versendet", "Versendet"),
+        ("Fehlgeschlagen", "Fehlgeschlagen"),
+    ]
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="Offen")
+    versuche = models.IntegerField(default=0)
+    fehler = models.TextField(null=True, blank=True)
+    versendet_am = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.betreff} an {self.empfaenger}"
+
+    class Meta:
+        ordering = ["-created"]
+        verbose_name = "E-Mail im Postausgang"
+        verbose_name_plural = "E-Mail-Postausgang"
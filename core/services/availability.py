@@ -0,0 +1,72 @@
+"""
+Seat availability of the bookable upcoming SchulungsTermine.
+
+The JSON document is built with one query and cached in verfuegbarkeit_cache
+together with its ETag. It is dropped whenever the seat counter changes
+(SchulungsTermin.adjust_belegte_plaetze) or a Termin is edited (termine_cache
+version), so polling clients mostly get a cache hit or a 304.
+"""
+
+import hashlib
+import json
+
+from core.cache import termine_cache, verfuegbarkeit_cache
+from core.models import SchulungsTermin
+
+
+def bookable_termine_rows():
+    return (
+        SchulungsTermin.objects.bookable_upcoming()
+        .order_by("datum_von", "pk")
+        .values_list("id", "max_teilnehmer", "belegte_plaetze")
+    )
+
+
+def availability_document(rows):
+    return {
+        "termine": [
+            {
+                "id": termin_id,
+                "max_teilnehmer": max_teilnehmer,
+                "belegte_plaetze": belegte_plaetze,
+                "freie_plaetze": max(max_teilnehmer - belegte_plaetze, 0),
+            }
+            for termin_id, max_teilnehmer, belegte_plaetze in rows
+        ]
+    }
+
+
+def build_termine_availability():
+    """Free seats of all bookable upcoming Termine, ordered by date."""
+    return availability_document(bookable_termine_rows())
+
+
+async def abuild_termine_availability():
+    return availability_document([row async for row in bookable_termine_rows()])
+
+
+def encode_availability(document):
+    content = json.dumps(document).encode()
+    return hashlib.md5(content).hexdigest(), content
+
+
+def get_termine_availability():
+    """
+    Returns:
+        tuple: (etag, JSON content as bytes), from the cache if possible
+    """
+    return verfuegbarkeit_cache.get_or_set(
+        ("termine", termine_cache.version()),
+        lambda: encode_availability(build_termine_availability()),
+    )
+
+
+async def aget_termine_availability():
+    """Async get_termine_availability for the ASGI view."""
+
+    async def compute():
+        return encode_availability(await abuild_termine_availability())
+
+    return await verfuegbarkeit_cache.aget_or_set(
+        ("termine", await termine_cache.aversion()), compute
+    )
@@ -1,29 +1,47 @@
+import hashlib
+import logging
+import multiprocessing
 import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from io import BytesIO
+from itertools import repeat
 
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from PIL import Image
+from reportlab import rl_config
 from reportlab.lib.colors import HexColor
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
+from reportlab.lib.units import cm, inch
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
+logger = logging.getLogger(__name__)
 
-def generate_teilnahmebestaetigung(schulungsteilnehmer):
-    """
-    Generate a Teilnahmebestätigung (completion certificate) PDF for a
-    SchulungsTeilnehmer using the template image as background.
+# Write binary PDF streams instead of ASCII85 text: ReportLab's pure Python
+# encoder dominated certificate rendering and grows every embedded image by a
+# quarter. rl_config is process-wide, so the other ReportLab documents (e.g.
+# the Teilnehmerlisten) get binary streams too once this module is imported,
+# which every PDF reader handles. Pool workers import this module as well.
+rl_config.useA85 = 0
 
-    Args:
-        schulungsteilnehmer: SchulungsTeilnehmer instance
+# Bump when the layout or the template image changes, so that cached
+# certificates are rendered again
+CERTIFICATE_LAYOUT_VERSION = "v1"
+
+# Batches smaller than this are rendered inline, starting the process pool
+# costs more than it saves
+CERTIFICATE_BATCH_MIN_POOL_SIZE = 8
+# Batch downloads stay in memory up to this size, then spill to disk
+CERTIFICATE_BATCH_SPOOL_SIZE = 10 * 1024 * 1024
 
-    Returns:
-        BytesIO: PDF file buffer
-    """
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
 
-    # Get data from schulungsteilnehmer
+def get_certificate_data(schulungsteilnehmer):
+    """Collect the values printed on the certificate."""
     if schulungsteilnehmer.person:
         vorname = schulungsteilnehmer.person.vorname
         nachname = schulungsteilnehmer.person.nachname
@@ -31,21 +49,187 @@ def generate_teilnahmebestaetigung(schulungsteilnehmer):
         vorname = schulungsteilnehmer.vorname or ""
         nachname = schulungsteilnehmer.nachname or ""
 
-    schulung = schulungsteilnehmer.schulungstermin.schulung
     schulungstermin = schulungsteilnehmer.schulungstermin
-    datum = schulungstermin.datum_von.strftime("%d.%m.%Y")
-    schulung_name = schulung.name
-    dauer = schulungstermin.dauer or ""
+    return {
+        "name": f"{vorname} {nachname}",
+        "datum": schulungstermin.datum_von.strftime("%d.%m.%Y"),
+        "schulung_name": schulungstermin.schulung.name,
+        "dauer": schulungstermin.dauer or "",
+    }
+
+
+def certificate_cache_key(schulungsteilnehmer, data=None):
+    """
+    Storage path of the cached certificate. The hash covers every printed
+    value, so a changed name, date, Schulung or dauer is a cache miss.
+    """
+    data = data or get_certificate_data(schulungsteilnehmer)
+    dpi = getattr(settings, "CERTIFICATE_BACKGROUND_DPI", 0)
+    content = "\x1f".join(
+        [
+            f"{CERTIFICATE_LAYOUT_VERSION}-{dpi or 'png'}",
+            data["name"],
+            data["datum"],
+            data["schulung_name"],
+            data["dauer"],
+        ]
+    )
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"teilnahmebestaetigung/{schulungsteilnehmer.pk}/{digest}.pdf"
+
+
+def get_certificate_storage():
+    """Storage for cached certificates, or None if caching is disabled."""
+    backend = getattr(settings, "CERTIFICATE_CACHE", "local")
+    if backend == "local":
+        return FileSystemStorage(location=settings.CERTIFICATE_CACHE_DIR)
+    if backend == "s3":
+        from core.storage import CertificateObjectStorage
+
+        return CertificateObjectStorage()
+    return None
+
+
+def generate_teilnahmebestaetigung(schulungsteilnehmer):
+    """
+    Return the Teilnahmebestätigung PDF for a SchulungsTeilnehmer, from the
+    certificate cache if it was rendered before with the same content.
 
-    # Load and draw the background template image (clean version)
-    template_path = os.path.join(
+    Args:
+        schulungsteilnehmer: SchulungsTeilnehmer instance
+
+    Returns:
+        BytesIO: PDF file buffer
+    """
+    data = get_certificate_data(schulungsteilnehmer)
+    storage = get_certificate_storage()
+    if storage is None or schulungsteilnehmer.pk is None:
+        return render_teilnahmebestaetigung(**data)
+
+    key = certificate_cache_key(schulungsteilnehmer, data)
+    pdf = _read_cached_certificate(storage, key)
+    if pdf is not None:
+        return BytesIO(pdf)
+
+    buffer = render_teilnahmebestaetigung(**data)
+    _store_cached_certificate(storage, key, buffer.getvalue())
+    return buffer
+
+
+def _read_cached_certificate(storage, key):
+    """Cached PDF bytes, or None on a miss or storage error."""
+    try:
+        if storage.exists(key):
+            with storage.open(key, "rb") as f:
+                return f.read()
+    except Exception as e:
+        logger.warning(f"Reading cached certificate {key} failed: {str(e)}")
+    return None
+
+
+def _store_cached_certificate(storage, key, pdf):
+    try:
+        _delete_stale_certificates(storage, key)
+        storage.save(key, ContentFile(pdf))
+    except Exception as e:
+        logger.warning(f"Caching certificate {key} failed: {str(e)}")
+
+
+def _delete_stale_certificates(storage, key):
+    """Remove certificates of the participant rendered with old content."""
+    directory, filename = key.rsplit("/", 1)
+    try:
+        _, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        if name != filename:
+            storage.delete(f"{directory}/{name}")
+
+
+def get_template_path():
+    return os.path.join(
         settings.BASE_DIR, "attached_assets", "Teilnahmebestätigung_template_v1.png"
     )
 
-    if os.path.exists(template_path):
+
+class _JpegImageReader(ImageReader):
+    """
+    ImageReader over in-memory JPEG bytes. ReportLab embeds the JPEG stream
+    as is instead of recompressing the pixels, and every PDF gets its own
+    file handle so the reader can be shared between threads.
+    """
+
+    def __init__(self, jpeg):
+        super().__init__(BytesIO(jpeg))
+        self._jpeg = jpeg
+
+    def jpeg_fh(self):
+        return BytesIO(self._jpeg)
+
+
+@lru_cache(maxsize=None)
+def _load_background(template_path, dpi):
+    """
+    Decode the template image once per process.
+
+    With a DPI the image is flattened to an A4 sized JPEG in memory,
+    without the decoded PNG is embedded.
+
+    Returns:
+        ImageReader or None if the template is missing
+    """
+    if not os.path.exists(template_path):
+        return None
+    if not dpi:
+        reader = ImageReader(template_path)
+    else:
+        size = (round(A4[0] / inch * dpi), round(A4[1] / inch * dpi))
+        with Image.open(template_path) as image:
+            flattened = image.convert("RGB").resize(size, Image.LANCZOS)
+        jpeg = BytesIO()
+        flattened.save(jpeg, format="JPEG", quality=85, optimize=True, dpi=(dpi, dpi))
+        reader = _JpegImageReader(jpeg.getvalue())
+    # Decode now and keep the pixels, drawImage hashes them on every call
+    reader.getRGBData()
+    return reader
+
+
+def get_certificate_background():
+    """Template image for drawImage, loaded once per process."""
+    dpi = getattr(settings, "CERTIFICATE_BACKGROUND_DPI", 0)
+    return _load_background(get_template_path(), dpi)
+
+
+def render_teilnahmebestaetigung(name, datum, schulung_name, dauer, background=None):
+    """
+    Render a Teilnahmebestätigung (completion certificate) PDF using the
+    template image as background.
+
+    Args:
+        background: Image for drawImage, defaults to the cached template
+
+    Returns:
+        BytesIO: PDF file buffer
+    """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    if background is None:
+        background = get_certificate_background()
+    draw_teilnahmebestaetigung(c, name, datum, schulung_name, dauer, background)
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+def draw_teilnahmebestaetigung(c, name, datum, schulung_name, dauer, background):
+    """Draw one certificate as a new page of the canvas."""
+    width, height = A4
+
+    if background is not None:
         # Draw the template as background, scaled to fit A4
         c.drawImage(
-            template_path,
+            background,
             0,
             0,
             width=width,
@@ -60,7 +244,7 @@ def generate_teilnahmebestaetigung(schulungsteilnehmer):
 
     # --- PARTICIPANT NAME (italic) ---
     # Position: centered, above "hat am" (~37% from top)
-    name_text = f"{vorname} {nachname}"
+    name_text = name
     c.setFont("Helvetica-Oblique", 26)
     name_width = c.stringWidth(name_text, "Helvetica-Oblique", 26)
     name_y = height - 11.0 * cm
@@ -89,8 +273,128 @@ def generate_teilnahmebestaetigung(schulungsteilnehmer):
         umfang_y = height - 18.4 * cm
         c.drawString((width - umfang_width) / 2, umfang_y, umfang_text)
 
-    # Finalize PDF
+    # Finalize page
     c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer
+
+
+def certificate_filename(data):
+    """Download name of a certificate, e.g. in a batch ZIP."""
+    return (
+        f"Teilnahmebestaetigung_{data['schulung_name'].replace(' ', '_')}"
+        f"_{data['name'].replace(' ', '_')}_{data['datum']}.pdf"
+    )
+
+
+def _render_in_worker(data, template_path, dpi):
+    """
+    Process pool entry point. Gets plain values only, so the worker needs
+    neither Django settings nor a database connection.
+    """
+    background = _load_background(template_path, dpi)
+    return render_teilnahmebestaetigung(background=background, **data).getvalue()
+
+
+def _render_many(data_list):
+    """
+    Render certificates, in a process pool across cores when there are
+    enough of them. Yields the PDF bytes in input order as they finish.
+    """
+    if not data_list:
+        return
+    template_path = get_template_path()
+    dpi = getattr(settings, "CERTIFICATE_BACKGROUND_DPI", 0)
+    workers = getattr(settings, "CERTIFICATE_BATCH_WORKERS", None) or os.cpu_count()
+    if workers <= 1 or len(data_list) < CERTIFICATE_BATCH_MIN_POOL_SIZE:
+        for data in data_list:
+            yield _render_in_worker(data, template_path, dpi)
+        return
+
+    # spawn instead of fork: the web process may run several threads
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(data_list)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        yield from executor.map(
+            _render_in_worker,
+            data_list,
+            repeat(template_path),
+            repeat(dpi),
+            chunksize=4,
+        )
+
+
+def completed_teilnehmer_for_termine(schulungstermine):
+    """Participants with a certificate, loaded for build_certificate_batch."""
+    from core.models import SchulungsTeilnehmer
+
+    return (
+        SchulungsTeilnehmer.objects.filter(
+            schulungstermin__in=schulungstermine, status="Teilgenommen"
+        )
+        .select_related("schulungstermin__schulung", "person")
+        .order_by("schulungstermin__datum_von", "schulungstermin_id", "pk")
+    )
+
+
+def build_certificate_batch(schulungsteilnehmer_list, format="zip"):
+    """
+    Bundle the certificates of many participants into one download.
+
+    "zip" contains one PDF per participant (a folder per SchulungsTermin),
+    taken from the certificate cache or rendered in a process pool. "pdf"
+    is a single multi-page PDF drawn on one canvas, so the background image
+    is embedded only once.
+
+    Args:
+        schulungsteilnehmer_list: SchulungsTeilnehmer with schulungstermin,
+            schulung and person loaded
+        format: "zip" or "pdf"
+
+    Returns:
+        SpooledTemporaryFile: positioned at the start, spills to disk for
+        large courses
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=CERTIFICATE_BATCH_SPOOL_SIZE)
+
+    if format == "pdf":
+        c = canvas.Canvas(spool, pagesize=A4)
+        background = get_certificate_background()
+        for teilnehmer in schulungsteilnehmer_list:
+            draw_teilnahmebestaetigung(
+                c, background=background, **get_certificate_data(teilnehmer)
+            )
+        c.save()
+        spool.seek(0)
+        return spool
+
+    storage = get_certificate_storage()
+    missing = []
+    with zipfile.ZipFile(spool, "w", zipfile.ZIP_DEFLATED) as archive:
+        for teilnehmer in schulungsteilnehmer_list:
+            data = get_certificate_data(teilnehmer)
+            key = certificate_cache_key(teilnehmer, data)
+            pdf = None
+            if storage is not None:
+                pdf = _read_cached_certificate(storage, key)
+            if pdf is None:
+                missing.append((teilnehmer, data, key))
+            else:
+                archive.writestr(_archive_name(teilnehmer, data), pdf)
+
+        # Written one by one as they arrive, never all held in memory
+        rendered = _render_many([data for _, data, _ in missing])
+        for (teilnehmer, data, key), pdf in zip(missing, rendered, strict=True):
+            archive.writestr(_archive_name(teilnehmer, data), pdf)
+            if storage is not None:
+                _store_cached_certificate(storage, key, pdf)
+
+    spool.seek(0)
+    return spool
+
+
+def _archive_name(teilnehmer, data):
+    termin = teilnehmer.schulungstermin
+    return (
+        f"{termin.datum_von:%Y-%m-%d}_{termin.pk}/"
+        f"{teilnehmer.pk}_{certificate_filename(data)}"
+    )
@@ -1,12 +1,37 @@
+import asyncio
 import base64
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from urllib.parse import quote
 
-import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
 from django.template.loader import render_to_string
-
-from ..models import SchulungsTermin
+from django.utils import timezone
+
+from ..models import (
+    EmailOutbox,
+    EmailVersand,
+    SchulungsTermin,
+    TeilnahmebestaetigungAuftrag,
+)
 from ..utils import get_site_domain
+from .email_transport import (
+    close_async_email_transport,
+    get_async_email_transport,
+    get_email_transport,
+)
+
+logger = logging.getLogger(__name__)
+
+# Outbox emails still "In Zustellung" after this time were abandoned (e.g.
+# the process died while sending) and may be claimed again
+OUTBOX_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+_outbox_executor = None
 
 
 def get_google_maps_url(schulungsort):
@@ -36,37 +61,85 @@ def get_google_maps_url(schulungsort):
 
 
 def send_reminder_to_all_teilnehmer(schulungsterminId, request=None):
-    schulungstermin = SchulungsTermin.objects.get(pk=schulungsterminId)
-    site_domain = get_site_domain(request)
+    """
+    Queue the reminder for every participant with an email address as one
+    EmailVersand. The emails are sent concurrently after commit, the admin
+    follows the progress on the dispatch status page.
 
+    Returns:
+        EmailVersand: The dispatch run with one outbox email per recipient
+    """
+    schulungstermin = SchulungsTermin.objects.select_related("schulung", "ort").get(
+        pk=schulungsterminId
+    )
     emails = list(
         schulungstermin.schulungsteilnehmer_set.exclude(email__isnull=True).values_list(
             "email", flat=True
         )
     )
+    subject, html_content = reminder_message(schulungstermin, request)
+
+    versand = EmailVersand.objects.create(
+        betreff=subject,
+        schulungstermin=schulungstermin,
+        gestartet_von=(
+            request.user if request and request.user.is_authenticated else None
+        ),
+    )
+    queue_email(subject, html_content, emails, versand=versand)
+    return versand
+
+
+async def asend_reminder_to_all_teilnehmer(schulungsterminId, request=None):
+    """send_reminder_to_all_teilnehmer for async views."""
+    schulungstermin = await SchulungsTermin.objects.select_related(
+        "schulung", "ort"
+    ).aget(pk=schulungsterminId)
+    emails = [
+        email
+        async for email in schulungstermin.schulungsteilnehmer_set.exclude(
+            email__isnull=True
+        ).values_list("email", flat=True)
+    ]
+    subject, html_content = reminder_message(schulungstermin, request)
+
+    user = await request.auser() if request else None
+    versand = await EmailVersand.objects.acreate(
+        betreff=subject,
+        schulungstermin=schulungstermin,
+        gestartet_von=user if user and user.is_authenticated else None,
+    )
+    # Needs a transaction and on_commit, which the async ORM does not offer
+    await sync_to_async(queue_email)(subject, html_content, emails, versand=versand)
+    return versand
+
+
+def reminder_message(schulungstermin, request=None):
+    """
+    Subject and HTML of the reminder email. ``schulungstermin`` needs its
+    Schulung and Ort loaded, rendering does not query.
+    """
     schulung_beginn = schulungstermin.datum_von.strftime("%d.%m.%Y um %H:%M")
     subject = (
         f"Schulungserinnerung: {schulungstermin.schulung} " f"am {schulung_beginn}"
     )
-
-    # Generate Google Maps URL if location exists
-    google_maps_url = get_google_maps_url(schulungstermin.ort)
-
-    # Render template with context
     html_content = render_to_string(
         "emails/schulungsterminerinnerung.html",
         {
             "schulungstermin": schulungstermin,
             "schulung_beginn": schulung_beginn,
-            "google_maps_url": google_maps_url,
-            "site_domain": site_domain,
+            "google_maps_url": get_google_maps_url(schulungstermin.ort),
+            "site_domain": get_site_domain(request),
         },
     )
-
-    send_email(subject, html_content, emails)
+    return subject, html_content
 
 
 def send_order_confirmation_email(to_email, bestellung, request=None):
+    """
+    Queue the order confirmation in the outbox. It is delivered after the
+    booking transaction commits, see queue_email.
+    """
     subject = "Bestellbestätigung"
     schulung_beginn = bestellung.schulungstermin.datum_von.strftime("%d.%m.%Y um %H:%M")
     site_domain = get_site_domain(request)
@@ -85,65 +158,360 @@ def send_order_confirmation_email(to_email, bestellung, request=None):
         },
     )
 
-    send_email(
+    queue_email(
         subject,
         html_message,
         [to_email, "bildungsplattform@rauchfangkehrer.or.at"],
     )
 
 
-def send_email(subject, message, to_emails):
-    headers = {
-        "X-Auth-Token": settings.SCALEWAY_EMAIL_API_TOKEN,
+def queue_email(subject, message, to_emails, versand=None):
+    """
+    Record one outbox email per recipient. Delivery starts once the
+    surrounding transaction commits, so a rolled back booking sends nothing
+    and the request never waits for the email API.
+
+    How delivery starts is controlled by settings.EMAIL_OUTBOX_DISPATCH:
+    "thread" (background thread), "sync" (in the commit hook) or "worker"
+    (only the process_email_outbox command delivers).
+    """
+    with transaction.atomic():
+        outbox_emails = EmailOutbox.objects.bulk_create(
+            [
+                EmailOutbox(
+                    versand=versand,
+                    empfaenger=email_address,
+                    betreff=subject,
+                    html=message,
+                )
+                for email_address in to_emails
+            ]
+        )
+    outbox_ids = [outbox_email.pk for outbox_email in outbox_emails]
+    transaction.on_commit(lambda: dispatch_outbox_emails(outbox_ids))
+    return outbox_ids
+
+
+def dispatch_outbox_emails(outbox_ids):
+    """Start delivering the given outbox emails according to the settings."""
+    _dispatch(deliver_outbox_emails, outbox_ids)
+
+
+def _dispatch(deliver, ids):
+    mode = getattr(settings, "EMAIL_OUTBOX_DISPATCH", "thread")
+    if mode == "sync":
+        deliver(ids)
+    elif mode == "thread":
+        _get_outbox_executor().submit(_deliver_in_background, deliver, ids)
+
+
+def _get_outbox_executor():
+    global _outbox_executor
+    if _outbox_executor is None:
+        _outbox_executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="email-outbox"
+        )
+    return _outbox_executor
+
+
+def _deliver_in_background(deliver, ids):
+    try:
+        deliver(ids)
+    except Exception:
+        logger.exception(f"Background delivery with {deliver.__name__} failed")
+    finally:
+        # The thread has its own database connection, don't leak it
+        connections.close_all()
+
+
+def _claimable(queryset, max_versuche):
+    return queryset.filter(
+        Q(status="Offen")
+        | Q(status="Fehlgeschlagen", versuche__lt=max_versuche)
+        | Q(
+            status="In Zustellung",
+            updated__lt=timezone.now() - OUTBOX_CLAIM_TIMEOUT,
+        )
+    )
+
+
+def resendable(queryset):
+    """
+    Rows the admin may queue again: all but those a worker is delivering
+    right now, a reset would let the next worker send them a second time.
+    """
+    return queryset.exclude(
+        status="In Zustellung",
+        updated__gte=timezone.now() - OUTBOX_CLAIM_TIMEOUT,
+    )
+
+
+def _claim(queryset, pk, max_versuche):
+    """
+    Claim a row with a conditional UPDATE so that the background thread and
+    the worker command never send the same email twice.
+    """
+    return _claimable(queryset, max_versuche).filter(pk=pk).update(**_claim_values())
+
+
+def _claim_values():
+    return {
+        "status": "In Zustellung",
+        "versuche": F("versuche") + 1,
+        "updated": timezone.now(),
     }
-    for email_address in to_emails:
-        data = {
-            "from": {
-                "email": "bildungsplattform@rauchfangkehrer.or.at",
-                "name": ("Bildungsplattform der burgenländischen " "Rauchfangkehrer"),
-            },
-            "to": [{"email": email_address}],
-            "subject": subject,
-            "html": message,
-            "project_id": "03bc621b-579e-4758-8b97-87f6406b2a38",
+
+
+def _result_values(error):
+    """Fields to update after a delivery attempt, ``error`` None on success."""
+    if error is None:
+        return {
+            "status": "Versendet",
+            "fehler": None,
+            "versendet_am": timezone.now(),
+            "updated": timezone.now(),
         }
-        print(data)
-        response = requests.post(
-            "https://api.scaleway.com/transactional-email"
-            "/v1alpha1/regions/fr-par/emails",
-            json=data,
-            headers=headers,
+    return {"status": "Fehlgeschlagen", "fehler": error, "updated": timezone.now()}
+
+
+def claimable_outbox_emails(max_versuche):
+    """Outbox emails that are due for a (new) delivery attempt."""
+    return _claimable(EmailOutbox.objects.all(), max_versuche)
+
+
+def deliver_outbox_emails(outbox_ids, max_versuche=5, max_workers=None):
+    """
+    Deliver outbox emails, each at most once even if several workers try.
+
+    The API calls run concurrently in a bounded thread pool of
+    settings.EMAIL_OUTBOX_MAX_WORKERS threads; claiming and recording the
+    results stays in the calling thread. A failing recipient does not stop
+    the others.
+
+    Returns:
+        tuple: (sent, failed) counts
+    """
+    claimed_ids = [
+        outbox_id
+        for outbox_id in outbox_ids
+        if _claim(EmailOutbox.objects.all(), outbox_id, max_versuche)
+    ]
+    if not claimed_ids:
+        return 0, 0
+
+    outbox_emails = EmailOutbox.objects.filter(pk__in=claimed_ids).only(
+        "pk", "empfaenger", "betreff", "html"
+    )
+    if max_workers is None:
+        max_workers = getattr(settings, "EMAIL_OUTBOX_MAX_WORKERS", 8)
+    max_workers = max(1, min(max_workers, len(claimed_ids)))
+    if max_workers == 1:
+        results = list(map(_send_outbox_email, outbox_emails))
+    else:
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="email-send"
+        ) as executor:
+            results = list(executor.map(_send_outbox_email, outbox_emails))
+
+    for outbox_id, error in results:
+        EmailOutbox.objects.filter(pk=outbox_id).update(**_result_values(error))
+    failed = sum(error is not None for _, error in results)
+    return len(results) - failed, failed
+
+
+async def adeliver_outbox_emails(outbox_ids, max_versuche=5, max_concurrency=None):
+    """
+    deliver_outbox_emails on the event loop: up to
+    settings.EMAIL_OUTBOX_MAX_WORKERS API calls overlap without a thread
+    each (with httpx installed, see get_async_email_transport). The HTTP
+    client of the loop is closed at the end: process_email_outbox runs every
+    poll on a new event loop, an open client would leak its connections.
+
+    Returns:
+        tuple: (sent, failed) counts
+    """
+    claimed_ids = [
+        outbox_id
+        for outbox_id in outbox_ids
+        if await _claimable(EmailOutbox.objects.all(), max_versuche)
+        .filter(pk=outbox_id)
+        .aupdate(**_claim_values())
+    ]
+    if not claimed_ids:
+        return 0, 0
+
+    if max_concurrency is None:
+        max_concurrency = getattr(settings, "EMAIL_OUTBOX_MAX_WORKERS", 8)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    transport = get_async_email_transport()
+
+    async def send(outbox_email):
+        async with semaphore:
+            try:
+                await transport.send(
+                    outbox_email.empfaenger, outbox_email.betreff, outbox_email.html
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to deliver outbox email {outbox_email.pk}: {str(e)}"
+                )
+                return outbox_email.pk, str(e)
+            return outbox_email.pk, None
+
+    outbox_emails = [
+        outbox_email
+        async for outbox_email in EmailOutbox.objects.filter(pk__in=claimed_ids).only(
+            "pk", "empfaenger", "betreff", "html"
         )
-        print(response.json())
-        response.raise_for_status()
+    ]
+    try:
+        results = await asyncio.gather(*(send(email) for email in outbox_emails))
+    finally:
+        await close_async_email_transport()
+
+    for outbox_id, error in results:
+        await EmailOutbox.objects.filter(pk=outbox_id).aupdate(**_result_values(error))
+    failed = sum(error is not None for _, error in results)
+    return len(results) - failed, failed
 
 
-def send_teilnahmebestaetigung_email(schulungsteilnehmer, request=None):
+def _send_outbox_email(outbox_email):
+    """Send one outbox email, returning (pk, error message or None)."""
+    try:
+        send_email(outbox_email.betreff, outbox_email.html, [outbox_email.empfaenger])
+    except Exception as e:
+        logger.error(f"Failed to deliver outbox email {outbox_email.pk}: {str(e)}")
+        return outbox_email.pk, str(e)
+    return outbox_email.pk, None
+
+
+def queue_teilnahmebestaetigung(schulungsteilnehmer):
+    """
+    Queue the certificate email of a participant, one job per recipient and
+    at most once per participant and recipient, so a failed copy is retried
+    without sending the other one again. Delivery starts after commit like
+    queue_email.
+
+    Returns:
+        list: the new TeilnahmebestaetigungAuftrag rows, empty if all were
+        queued before
+    """
+    auftraege = []
+    # Issued once, even if the email address changed in the meantime
+    if schulungsteilnehmer.teilnahmebestaetigung_auftraege.exists():
+        return auftraege
+    with transaction.atomic():
+        for empfaenger in teilnahmebestaetigung_empfaenger(schulungsteilnehmer):
+            auftrag, created = TeilnahmebestaetigungAuftrag.objects.get_or_create(
+                schulungsteilnehmer=schulungsteilnehmer, empfaenger=empfaenger
+            )
+            if created:
+                auftraege.append(auftrag)
+    if auftraege:
+        auftrag_ids = [auftrag.pk for auftrag in auftraege]
+        transaction.on_commit(lambda: dispatch_teilnahmebestaetigungen(auftrag_ids))
+    return auftraege
+
+
+def dispatch_teilnahmebestaetigungen(auftrag_ids):
+    """Start delivering queued certificates according to the settings."""
+    _dispatch(deliver_teilnahmebestaetigungen, auftrag_ids)
+
+
+def claimable_teilnahmebestaetigungen(max_versuche):
+    """Certificate jobs that are due for a (new) delivery attempt."""
+    return _claimable(TeilnahmebestaetigungAuftrag.objects.all(), max_versuche)
+
+
+def deliver_teilnahmebestaetigungen(auftrag_ids, max_versuche=5):
+    """
+    Render and email queued certificates, each at most once. The PDF is
+    rendered once per participant and attached to all of its recipient jobs.
+
+    Returns:
+        tuple: (sent, failed) counts
+    """
+    from .certificate import generate_teilnahmebestaetigung
+
+    sent = failed = 0
+    pdfs = {}
+    auftraege = TeilnahmebestaetigungAuftrag.objects.all()
+    for auftrag_id in auftrag_ids:
+        if not _claim(auftraege, auftrag_id, max_versuche):
+            continue
+        auftrag = auftraege.select_related(
+            "schulungsteilnehmer__person",
+            "schulungsteilnehmer__schulungstermin__schulung",
+        ).get(pk=auftrag_id)
+        teilnehmer = auftrag.schulungsteilnehmer
+        try:
+            if teilnehmer.pk not in pdfs:
+                pdfs[teilnehmer.pk] = generate_teilnahmebestaetigung(teilnehmer).read()
+            send_teilnahmebestaetigung_email(
+                teilnehmer,
+                recipients=[auftrag.empfaenger],
+                pdf_content=pdfs[teilnehmer.pk],
+            )
+        except Exception as e:
+            logger.error(f"Failed to deliver Teilnahmebestätigung {auftrag_id}: {e}")
+            auftraege.filter(pk=auftrag_id).update(**_result_values(str(e)))
+            failed += 1
+        else:
+            auftraege.filter(pk=auftrag_id).update(**_result_values(None))
+            sent += 1
+    return sent, failed
+
+
+def send_email(subject, message, to_emails):
+    transport = get_email_transport()
+    for email_address in to_emails:
+        transport.send(email_address, subject, message)
+
+
+def teilnahmebestaetigung_empfaenger(schulungsteilnehmer):
+    """
+    Recipients of the certificate: the participant and the platform copy.
+
+    Raises:
+        ValueError: if the participant has no email address
+    """
+    if schulungsteilnehmer.person:
+        email_address = schulungsteilnehmer.person.email
+    else:
+        email_address = schulungsteilnehmer.email
+    if not email_address:
+        raise ValueError("Keine E-Mail-Adresse für Teilnehmer verfügbar")
+    return [email_address, "bildungsplattform@rauchfangkehrer.or.at"]
+
+
+def send_teilnahmebestaetigung_email(
+    schulungsteilnehmer, request=None, recipients=None, pdf_content=None
+):
     """
     Send Teilnahmebestätigung (completion certificate) email with PDF attachment.
 
     Args:
         schulungsteilnehmer: SchulungsTeilnehmer instance
         request: Optional request object for domain context
+        recipients: Email addresses, defaults to the participant and the
+            platform copy
+        pdf_content: Rendered certificate (bytes), generated if not given
     """
     from .certificate import generate_teilnahmebestaetigung
 
-    # Get email address
+    if recipients is None:
+        recipients = teilnahmebestaetigung_empfaenger(schulungsteilnehmer)
+
     if schulungsteilnehmer.person:
-        email_address = schulungsteilnehmer.person.email
         vorname = schulungsteilnehmer.person.vorname
         nachname = schulungsteilnehmer.person.nachname
         name = f"{vorname} {nachname}"
     else:
-        email_address = schulungsteilnehmer.email
         name = f"{schulungsteilnehmer.vorname} {schulungsteilnehmer.nachname}"
 
-    if not email_address:
-        raise ValueError("Keine E-Mail-Adresse für Teilnehmer verfügbar")
-
     # Generate PDF certificate
-    pdf_buffer = generate_teilnahmebestaetigung(schulungsteilnehmer)
-    pdf_content = pdf_buffer.read()
+    if pdf_content is None:
+        pdf_content = generate_teilnahmebestaetigung(schulungsteilnehmer).read()
     pdf_base64 = base64.b64encode(pdf_content).decode("utf-8")
 
     # Prepare email data
@@ -165,44 +533,22 @@ def send_teilnahmebestaetigung_email(schulungsteilnehmer, request=None):
         },
     )
 
-    # Send email with attachment to participant and platform
-    headers = {
-        "X-Auth-Token": settings.SCALEWAY_EMAIL_API_TOKEN,
-    }
-
-    recipients = [email_address, "bildungsplattform@rauchfangkehrer.or.at"]
-
-    for recipient in recipients:
-        data = {
-            "from": {
-                "email": "bildungsplattform@rauchfangkehrer.or.at",
-                "name": "Bildungsplattform der burgenländischen Rauchfangkehrer",
-            },
-            "to": [{"email": recipient}],
-            "subject": subject,
-            "html": html_content,
-            "project_id": "03bc621b-579e-4758-8b97-87f6406b2a38",
-            "attachments": [
-                {
-                    "name": (
-                        f"Teilnahmebestaetigung_{schulung.name.replace(' ', '_')}"
-                        f"_{datum}.pdf"
-                    ),
-                    "type": "application/pdf",
-                    "content": pdf_base64,
-                }
-            ],
+    # Send email with attachment to each recipient
+    transport = get_email_transport()
+    attachments = [
+        {
+            "name": (
+                f"Teilnahmebestaetigung_{schulung.name.replace(' ', '_')}"
+                f"_{datum}.pdf"
+            ),
+            "type": "application/pdf",
+            "content": pdf_base64,
         }
+    ]
 
-        print(f"Sending Teilnahmebestätigung to {recipient}")
-        response = requests.post(
-            "https://api.scaleway.com/transactional-email"
-            "/v1alpha1/regions/fr-par/emails",
-            json=data,
-            headers=headers,
-        )
-        print(response.json())
-        response.raise_for_status()
+    for recipient in recipients:
+        logger.info(f"Sending Teilnahmebestätigung to {recipient}")
+        transport.send(recipient, subject, html_content, attachments=attachments)
 
 
 def send_admin_registration_notification(person, request=None):
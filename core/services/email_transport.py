@@ -0,0 +1,282 @@
+"""
+HTTP transport for the Scaleway Transactional Email API.
+
+All outgoing emails share one pooled ``requests.Session`` per process, so
+consecutive messages reuse the same keep-alive TLS connection instead of
+doing a fresh handshake per recipient.
+
+Async code (ASGI views, adeliver_outbox_emails) uses get_async_email_transport
+instead: an ``httpx.AsyncClient`` per event loop if httpx is installed, so many
+API calls overlap on one loop, otherwise the sync transport in worker threads.
+"""
+
+import asyncio
+import datetime
+import email.utils
+import logging
+import threading
+import time
+import weakref
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+SCALEWAY_EMAIL_API_URL = (
+    "https://api.scaleway.com/transactional-email/v1alpha1/regions/fr-par/emails"
+)
+SCALEWAY_PROJECT_ID = "03bc621b-579e-4758-8b97-87f6406b2a38"
+SENDER = {
+    "email": "bildungsplattform@rauchfangkehrer.or.at",
+    "name": "Bildungsplattform der burgenländischen Rauchfangkehrer",
+}
+
+# Rate limiting and transient server errors are retried with backoff
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class ScalewayEmailTransport:
+    """
+    Send emails through the Scaleway API over a pooled keep-alive session
+    with timeouts and retry/backoff on 429 and 5xx responses.
+
+    Args:
+        api_url: Endpoint to post emails to (default: settings or Scaleway)
+        token: API token (default: settings.SCALEWAY_EMAIL_API_TOKEN)
+        timeout: (connect, read) timeout in seconds
+        max_retries: Retries for connection errors, 429 and 5xx responses
+        backoff_factor: Base delay for the exponential backoff in seconds
+        pool_maxsize: Connections kept open per host
+    """
+
+    def __init__(
+        self,
+        api_url=None,
+        token=None,
+        timeout=None,
+        max_retries=None,
+        backoff_factor=None,
+        pool_maxsize=None,
+    ):
+        self.api_url = api_url or getattr(
+            settings, "SCALEWAY_EMAIL_API_URL", SCALEWAY_EMAIL_API_URL
+        )
+        self.token = token or settings.SCALEWAY_EMAIL_API_TOKEN
+        self.timeout = timeout or getattr(settings, "SCALEWAY_EMAIL_TIMEOUT", (5, 30))
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else getattr(settings, "SCALEWAY_EMAIL_MAX_RETRIES", 3)
+        )
+        self.backoff_factor = (
+            backoff_factor
+            if backoff_factor is not None
+            else getattr(settings, "SCALEWAY_EMAIL_BACKOFF_FACTOR", 0.5)
+        )
+        self.pool_maxsize = pool_maxsize or getattr(
+            settings, "SCALEWAY_EMAIL_POOL_MAXSIZE", 10
+        )
+        self.session = self._build_session()
+
+    def _build_session(self):
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            # POST is not idempotent by default, but Scaleway rejects a 429
+            # or fails with 5xx before accepting the email
+            allowed_methods=frozenset(["POST"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=retry
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"X-Auth-Token": self.token or ""})
+        return session
+
+    def build_message(self, to_email, subject, html, attachments=None):
+        data = {
+            "from": SENDER,
+            "to": [{"email": to_email}],
+            "subject": subject,
+            "html": html,
+            "project_id": getattr(
+                settings, "SCALEWAY_EMAIL_PROJECT_ID", SCALEWAY_PROJECT_ID
+            ),
+        }
+        if attachments:
+            data["attachments"] = attachments
+        return data
+
+    def send(self, to_email, subject, html, attachments=None):
+        """
+        Send one email to a single recipient.
+
+        Returns:
+            dict: Parsed API response
+
+        Raises:
+            requests.exceptions.RequestException: if the email could not be
+                delivered after all retries
+        """
+        data = self.build_message(to_email, subject, html, attachments)
+        response = self.session.post(self.api_url, json=data, timeout=self.timeout)
+        response.raise_for_status()
+        logger.info(f"Email '{subject}' sent to {to_email}")
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncScalewayEmailTransport(ScalewayEmailTransport):
+    """
+    ScalewayEmailTransport on ``httpx.AsyncClient``, with the same timeouts
+    and retry/backoff on connection errors, 429 and 5xx responses. The client
+    belongs to the event loop it was created on.
+    """
+
+    def _build_session(self):
+        import httpx
+
+        connect, read = (
+            self.timeout if isinstance(self.timeout, tuple) else (self.timeout,) * 2
+        )
+        return httpx.AsyncClient(
+            headers={"X-Auth-Token": self.token or ""},
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(
+                max_connections=self.pool_maxsize,
+                max_keepalive_connections=self.pool_maxsize,
+            ),
+        )
+
+    def retry_delay(self, attempt, response=None):
+        """
+        Exponential backoff, a valid Retry-After header of the API wins
+        (seconds or an HTTP date, GMT if it has no timezone).
+        """
+        if response is not None and "Retry-After" in response.headers:
+            retry_after = response.headers["Retry-After"].strip()
+            if retry_after.isdigit():
+                return int(retry_after)
+            try:
+                parsed = email.utils.parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring invalid Retry-After header {retry_after!r}")
+            else:
+                if parsed.tzinfo is None:
+                    parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+                return max(parsed.timestamp() - time.time(), 0)
+        return self.backoff_factor * (2**attempt)
+
+    async def send(self, to_email, subject, html, attachments=None):
+        """
+        Send one email to a single recipient.
+
+        Returns:
+            dict: Parsed API response
+
+        Raises:
+            httpx.HTTPError: if the email could not be delivered after all
+                retries
+        """
+        import httpx
+
+        data = self.build_message(to_email, subject, html, attachments)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await self.session.post(self.api_url, json=data)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self.retry_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                break
+            await asyncio.sleep(self.retry_delay(attempt, response))
+        response.raise_for_status()
+        logger.info(f"Email '{subject}' sent to {to_email}")
+        return response.json()
+
+    async def close(self):
+        await self.session.aclose()
+
+
+class ThreadedAsyncEmailTransport:
+    """Awaitable wrapper that sends through the sync transport in threads."""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def send(self, to_email, subject, html, attachments=None):
+        return await sync_to_async(self.transport.send, thread_sensitive=False)(
+            to_email, subject, html, attachments
+        )
+
+    async def close(self):
+        pass
+
+
+def httpx_available():
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_transport = None
+_transport_lock = threading.Lock()
+_async_transports = weakref.WeakKeyDictionary()
+
+
+def get_email_transport():
+    """Return the process-wide shared transport, creating it on first use."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = ScalewayEmailTransport()
+    return _transport
+
+
+def reset_email_transport():
+    """Close the shared transport, e.g. after settings changed in tests."""
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = None
+        _async_transports.clear()
+
+
+def get_async_email_transport():
+    """
+    Return the async transport of the running event loop, creating it on
+    first use: native httpx if installed, the shared sync transport in
+    worker threads otherwise.
+    """
+    if not httpx_available():
+        return ThreadedAsyncEmailTransport(get_email_transport())
+    loop = asyncio.get_running_loop()
+    transport = _async_transports.get(loop)
+    if transport is None:
+        transport = _async_transports[loop] = AsyncScalewayEmailTransport()
+    return transport
+
+
+async def close_async_email_transport():
+    """Close the async transport of the running event loop, if it has one."""
+    transport = _async_transports.pop(asyncio.get_running_loop(), None)
+    if transport is not None:
+        await transport.close()
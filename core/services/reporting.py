@@ -0,0 +1,326 @@
+"""
+Yearly statistics of the association office.
+
+Every report is one aggregated query (GROUP BY in the database), optionally
+limited to the Termine between ``von`` and ``bis``. The rows are written as
+CSV (streamed), XLSX (openpyxl) or Parquet (pyarrow) and can be
+downloaded in the admin ("Auswertungen") or written with
+``python manage.py export_report``.
+"""
+
+import importlib
+import tempfile
+
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+from django.http import FileResponse
+
+from core.models import Bestellung, SchulungsTeilnehmer, termin_zeitraum
+from core.services.csv_export import (
+    EXPORT_CHUNK_SIZE,
+    iter_csv,
+    streaming_csv_response,
+)
+
+
+class FormatNotAvailable(Exception):
+    """The optional library of an export format is not installed."""
+
+
+class Report:
+    """
+    A report definition.
+
+    Args:
+        name: Identifier on the command line and in the admin
+        title: Human readable title
+        columns: (header, type) per column, type is "text", "int",
+            "decimal" or "float"
+        query: Function (von, bis) returning a values_list queryset whose
+            rows match ``columns``
+    """
+
+    def __init__(self, name, title, columns, query):
+        self.name = name
+        self.title = title
+        self.columns = columns
+        self.query = query
+
+    def __repr__(self):
+        return f"<Report {self.name}>"
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def rows(self, von=None, bis=None):
+        """Rows of the report, read from the database in chunks."""
+        return self.query(von, bis).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def filename(self, format, von=None, bis=None):
+        zeitraum = "".join(
+            f"_{label}_{datum.isoformat()}"
+            for label, datum in (("von", von), ("bis", bis))
+            if datum
+        )
+        return f"{self.name}{zeitraum}.{format}"
+
+
+def teilnehmer_pro(group_field, empty_label):
+    """Participants per value of ``group_field``, one row per group."""
+
+    def query(von, bis):
+        return (
+            SchulungsTeilnehmer.objects.filter(
+                termin_zeitraum("schulungstermin__", von, bis)
+            )
+            # Group by the id, entries with the same name stay apart
+            .values(
+                f"{group_field}_id",
+                gruppe=Coalesce(F(f"{group_field}__name"), Value(empty_label)),
+            )
+            .annotate(
+                termine=Count("schulungstermin", distinct=True),
+                teilnehmer=Count("pk"),
+                teilgenommen=Count("pk", filter=Q(status="Teilgenommen")),
+            )
+            .order_by("gruppe", f"{group_field}_id")
+            .values_list("gruppe", "termine", "teilnehmer", "teilgenommen")
+        )
+
+    return query
+
+
+def anwesenheit(von, bis):
+    """Participants per status and Schulung with the attendance rate."""
+    abgeschlossen = ("Teilgenommen", "Entschuldigt", "Unentschuldigt")
+    return (
+        SchulungsTeilnehmer.objects.filter(
+            termin_zeitraum("schulungstermin__", von, bis)
+        )
+        .values(
+            "schulungstermin__schulung_id", gruppe=F("schulungstermin__schulung__name")
+        )
+        .annotate(
+            angemeldet=Count("pk", filter=Q(status="Angemeldet")),
+            teilgenommen=Count("pk", filter=Q(status="Teilgenommen")),
+            entschuldigt=Count("pk", filter=Q(status="Entschuldigt")),
+            unentschuldigt=Count("pk", filter=Q(status="Unentschuldigt")),
+            abgeschlossen=Count("pk", filter=Q(status__in=abgeschlossen)),
+        )
+        # Share of the participants whose Termin is over that attended,
+        # NULL while no status was recorded yet
+        .annotate(
+            quote=Round(
+                Cast(F("teilgenommen"), FloatField())
+                * 100
+                / NullIf(F("abgeschlossen"), 0),
+                1,
+            )
+        )
+        .order_by("gruppe", "schulungstermin__schulung_id")
+        .values_list(
+            "gruppe",
+            "angemeldet",
+            "teilgenommen",
+            "entschuldigt",
+            "unentschuldigt",
+            "quote",
+        )
+    )
+
+
+def umsatz_pro_organisation(von, bis):
+    """Orders, booked seats and revenue per Organisation, without cancellations."""
+    return (
+        Bestellung.objects.filter(termin_zeitraum("schulungstermin__", von, bis))
+        .exclude(status="Storniert")
+        .values(
+            "person__organisation_id",
+            gruppe=Coalesce(
+                F("person__organisation__name"), Value("Ohne Organisation")
+            ),
+        )
+        .annotate(
+            bestellungen=Count("pk"),
+            plaetze=Coalesce(Sum("anzahl"), 0),
+            umsatz=Sum("gesamtpreis"),
+        )
+        .order_by("gruppe", "person__organisation_id")
+        .values_list("gruppe", "bestellungen", "plaetze", "umsatz")
+    )
+
+
+TEILNEHMER_SPALTEN = [
+    ("Termine", "int"),
+    ("Teilnehmer", "int"),
+    ("Teilgenommen", "int"),
+]
+
+REPORTS = {
+    report.name: report
+    for report in [
+        Report(
+            "teilnehmer_pro_schulung",
+            "Teilnehmer pro Schulung",
+            [("Schulung", "text"), *TEILNEHMER_SPALTEN],
+            teilnehmer_pro("schulungstermin__schulung", "Ohne Schulung"),
+        ),
+        Report(
+            "teilnehmer_pro_betrieb",
+            "Teilnehmer pro Betrieb",
+            [("Betrieb", "text"), *TEILNEHMER_SPALTEN],
+            teilnehmer_pro("person__betrieb", "Ohne Betrieb"),
+        ),
+        Report(
+            "teilnehmer_pro_funktion",
+            "Teilnehmer pro Funktion",
+            [("Funktion", "text"), *TEILNEHMER_SPALTEN],
+            teilnehmer_pro("person__funktion", "Ohne Funktion"),
+        ),
+        Report(
+            "umsatz_pro_organisation",
+            "Umsatz pro Organisation",
+            [
+                ("Organisation", "text"),
+                ("Bestellungen", "int"),
+                ("Plätze", "int"),
+                ("Umsatz", "decimal"),
+            ],
+            umsatz_pro_organisation,
+        ),
+        Report(
+            "anwesenheit",
+            "Anwesenheitsquote pro Schulung",
+            [
+                ("Schulung", "text"),
+                ("Angemeldet", "int"),
+                ("Teilgenommen", "int"),
+                ("Entschuldigt", "int"),
+                ("Unentschuldigt", "int"),
+                ("Anwesenheitsquote %", "float"),
+            ],
+            anwesenheit,
+        ),
+    ]
+}
+
+
+def write_csv(report, rows, output):
+    for line in iter_csv(report.headers, rows):
+        output.write(line.encode("utf-8"))
+
+
+def write_xlsx(report, rows, output):
+    from openpyxl import Workbook
+
+    # Write-only mode streams the rows to the file instead of keeping cells
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(report.title[:31])
+    sheet.append(report.headers)
+    for row in rows:
+        sheet.append(list(row))
+    workbook.save(output)
+
+
+def write_parquet(report, rows, output):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "text": pa.string(),
+        "int": pa.int64(),
+        "decimal": pa.decimal128(12, 2),
+        "float": pa.float64(),
+    }
+    schema = pa.schema([(header, types[kind]) for header, kind in report.columns])
+    with pq.ParquetWriter(output, schema) as writer:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == EXPORT_CHUNK_SIZE:
+                writer.write_batch(record_batch(schema, chunk))
+                chunk = []
+        if chunk:
+            writer.write_batch(record_batch(schema, chunk))
+
+
+def record_batch(schema, rows):
+    import pyarrow as pa
+
+    return pa.record_batch(
+        [
+            pa.array(column, type=field.type)
+            for column, field in zip(zip(*rows, strict=True), schema, strict=True)
+        ],
+        schema=schema,
+    )
+
+
+# format: (writer, content type, optional library it needs)
+FORMATS = {
+    "csv": (write_csv, "text/csv", None),
+    "xlsx": (
+        write_xlsx,
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "openpyxl",
+    ),
+    "parquet": (write_parquet, "application/vnd.apache.parquet", "pyarrow"),
+}
+
+
+def require_format(format):
+    """
+    Raises:
+        FormatNotAvailable: if the library of the format is not installed
+    """
+    library = FORMATS[format][2]
+    if library is None:
+        return
+    try:
+        importlib.import_module(library)
+    except ImportError as e:
+        raise FormatNotAvailable(
+            f"{format.upper()} braucht {library} (pip install {library})."
+        ) from e
+
+
+def write_report(report, format, output, von=None, bis=None):
+    """
+    Write ``report`` as ``format`` into the binary file object ``output``.
+
+    Raises:
+        FormatNotAvailable: if the library of the format is not installed
+    """
+    require_format(format)
+    FORMATS[format][0](report, report.rows(von, bis), output)
+
+
+def report_response(report, format, von=None, bis=None, request=None):
+    """
+    Download response: CSV is streamed while the rows are read (pass the
+    request, see streaming_csv_response), XLSX and Parquet are written to a
+    temporary file first (both need the end of the data to finish the file).
+
+    Raises:
+        FormatNotAvailable: if the library of the format is not installed
+    """
+    require_format(format)
+    filename = report.filename(format, von, bis)
+    if format == "csv":
+        return streaming_csv_response(
+            filename, report.headers, report.rows(von, bis), request
+        )
+    output = tempfile.TemporaryFile()
+    try:
+        write_report(report, format, output, von, bis)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=filename,
+        content_type=FORMATS[format][1],
+    )
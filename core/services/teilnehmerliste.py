@@ -0,0 +1,159 @@
+"""
+Attendance lists (Teilnehmerliste) to print and sign at the Schulung.
+
+All participants of all requested Termine are read in one query with their
+Person and Betrieb, and a list of many Termine is one PDF with a page per
+Termin.
+"""
+
+import tempfile
+from collections import defaultdict
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import (
+    PageBreak,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+from core.models import SchulungsTeilnehmer
+
+# Lists of a few Termine stay in memory, a batch of many spills to disk
+TEILNEHMERLISTE_SPOOL_SIZE = 10 * 1024 * 1024
+
+HEADER = ["Name", "Betrieb", "Email", "Telefon", "Unterschrift", "DSV*"]
+COLUMN_WIDTHS = [160, 160, 170, 120, 120, 70]
+
+TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 14),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 1), (-1, -1), 12),
+        ("TOPPADDING", (0, 1), (-1, -1), 12),
+        ("BOTTOMPADDING", (0, 1), (-1, -1), 12),
+    ]
+)
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """
+    Paragraph styles of the list, built once per process. Derived from the
+    sample stylesheet instead of changing its styles in place.
+    """
+    sample = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            "TeilnehmerlisteTitle", parent=sample["Heading2"], alignment=TA_CENTER
+        ),
+        "footnote": ParagraphStyle(
+            "TeilnehmerlisteFootnote", parent=sample["Normal"], fontSize=8
+        ),
+    }
+
+
+def teilnehmerliste_teilnehmer(schulungstermine):
+    """Participants of the Termine, loaded for build_teilnehmerliste."""
+    return (
+        SchulungsTeilnehmer.objects.filter(schulungstermin__in=schulungstermine)
+        .select_related("person__betrieb")
+        .order_by("schulungstermin__datum_von", "schulungstermin_id", "pk")
+    )
+
+
+def teilnehmerliste_row(teilnehmer):
+    person = teilnehmer.person
+    if person:
+        return [
+            f"{person.vorname} {person.nachname}",
+            str(person.betrieb) if person.betrieb else "",
+            person.email or "",
+            person.telefon or "",
+            "",  # Signature
+            "Ja" if person.dsv_akzeptiert else "Nein",
+        ]
+    # External participant without a Person
+    return [
+        f"{teilnehmer.vorname} {teilnehmer.nachname}",
+        "",
+        teilnehmer.email or "",
+        "",
+        "",
+        "",
+    ]
+
+
+def teilnehmerliste_page(schulungstermin, teilnehmer):
+    """Flowables of the list of one SchulungsTermin."""
+    styles = get_styles()
+    title = Paragraph(
+        f"{schulungstermin.schulung.name} - "
+        f"{schulungstermin.datum_von.strftime('%d.%m.%Y')}",
+        styles["title"],
+    )
+    data = [HEADER, *(teilnehmerliste_row(t) for t in teilnehmer)]
+    # Empty row for walk-ins
+    data.append([""] * len(HEADER))
+    table = Table(data, colWidths=COLUMN_WIDTHS, repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return [
+        title,
+        table,
+        Spacer(0, 24),
+        Paragraph("* DSV = Datenschutzvereinbarung akzeptiert", styles["footnote"]),
+    ]
+
+
+def build_teilnehmerliste(schulungstermine, teilnehmer=None):
+    """
+    Attendance list of the SchulungsTermine, a page (or more for long
+    lists) per Termin in the given order, landscape A4.
+
+    Args:
+        schulungstermine: SchulungsTermine with schulung loaded
+        teilnehmer: Participants of the Termine, defaults to
+            teilnehmerliste_teilnehmer(schulungstermine)
+
+    Returns:
+        SpooledTemporaryFile: positioned at the start
+    """
+    schulungstermine = list(schulungstermine)
+    if teilnehmer is None:
+        teilnehmer = teilnehmerliste_teilnehmer(schulungstermine)
+    per_termin = defaultdict(list)
+    for t in teilnehmer:
+        per_termin[t.schulungstermin_id].append(t)
+
+    elements = []
+    for schulungstermin in schulungstermine:
+        if elements:
+            elements.append(PageBreak())
+        elements += teilnehmerliste_page(
+            schulungstermin, per_termin[schulungstermin.pk]
+        )
+
+    spool = tempfile.SpooledTemporaryFile(max_size=TEILNEHMERLISTE_SPOOL_SIZE)
+    doc = SimpleDocTemplate(
+        spool,
+        pagesize=landscape(A4),
+        rightMargin=15,
+        leftMargin=15,
+        topMargin=30,
+        bottomMargin=30,
+    )
+    doc.build(elements)
+    spool.seek(0)
+    return spool
@@ -1,48 +1,154 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from core.models import SchulungsTeilnehmer
+from core.cache import dokumente_cache, person_cache, termine_cache
+from core.models import (
+    Betrieb,
+    Document,
+    Funktion,
+    Organisation,
+    Person,
+    Schulung,
+    SchulungsArt,
+    SchulungsOrt,
+    SchulungsTeilnehmer,
+    SchulungsTermin,
+)
+from core.utils import invalidate_person_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _adjust_belegte_plaetze(instance, schulungstermin_id, delta):
+    """
+    Change the seat counter of a SchulungsTermin. The Termin cached on the
+    participant (if any) is kept in sync, so callers holding it see the new
+    value without reloading.
+    """
+    cached = SchulungsTeilnehmer.schulungstermin.is_cached(instance)
+    if cached and instance.schulungstermin.pk == schulungstermin_id:
+        instance.schulungstermin.adjust_belegte_plaetze(delta)
+    else:
+        SchulungsTermin(pk=schulungstermin_id).adjust_belegte_plaetze(delta)
 
 
 @receiver(post_save, sender=SchulungsTeilnehmer)
-def send_certificate_on_completion(sender, instance, created, **kwargs):
-    """
-    Send Teilnahmebestätigung email when a participant's status is changed to
-    'Teilgenommen'.
-
-    This signal is triggered after a SchulungsTeilnehmer is saved.
-    It checks if the status is 'Teilgenommen' and sends an email with the
-    certificate PDF attachment.
-    """
-    # Only send email if status is "Teilgenommen"
-    if instance.status == "Teilgenommen":
-        # Check if this is an update (not creation) and status changed to Teilgenommen
-        # We use update_fields to detect if status was actually changed
-        # For admin saves, update_fields is None, so we check the previous state
-
-        # Import here to avoid circular imports
-        from core.services.email import send_teilnahmebestaetigung_email
-
-        # Only send if there's an email address
-        email_address = None
-        if instance.person:
-            email_address = instance.person.email
-        elif instance.email:
-            email_address = instance.email
-
-        if email_address:
-            try:
-                # Send the certificate email
-                send_teilnahmebestaetigung_email(instance)
-                print(
-                    f"Teilnahmebestätigung sent to {email_address} for "
-                    f"{instance.schulungstermin.schulung.name}"
-                )
-            except Exception as e:
-                # Log error but don't raise to avoid breaking the save operation
-                print(f"Error sending Teilnahmebestätigung: {e}")
-        else:
-            print(
-                f"No email address for SchulungsTeilnehmer {instance.id}, "
-                f"skipping Teilnahmebestätigung"
-            )
+def update_belegte_plaetze_on_save(sender, instance, created, raw=False, **kwargs):
+    """Count a new participant, or move it when its Termin was changed."""
+    if raw:
+        return
+    loaded_values = getattr(instance, "_loaded_values", {})
+    previous_termin_id = loaded_values.get("schulungstermin_id")
+    if created:
+        _adjust_belegte_plaetze(instance, instance.schulungstermin_id, 1)
+    elif previous_termin_id and previous_termin_id != instance.schulungstermin_id:
+        _adjust_belegte_plaetze(instance, previous_termin_id, -1)
+        _adjust_belegte_plaetze(instance, instance.schulungstermin_id, 1)
+    instance._loaded_values = {
+        **loaded_values,
+        "schulungstermin_id": instance.schulungstermin_id,
+    }
+
+
+@receiver(post_delete, sender=SchulungsTeilnehmer)
+def update_belegte_plaetze_on_delete(sender, instance, **kwargs):
+    """Release the seat of a deleted participant."""
+    _adjust_belegte_plaetze(instance, instance.schulungstermin_id, -1)
+
+
+@receiver(post_save, sender=SchulungsTeilnehmer)
+def send_certificate_on_completion(sender, instance, created, raw=False, **kwargs):
+    """
+    Queue the Teilnahmebestätigung email when a participant's status changes
+    to 'Teilgenommen'.
+
+    Only the transition counts, compared with the status the instance was
+    loaded with, so re-saving a completed participant (e.g. with the admin
+    inline formset) sends nothing. The certificate is rendered and sent
+    after commit, outside the save, and at most once per participant.
+
+    Participants created with bulk_create (confirm_order) do not send
+    post_save; they always start as 'Angemeldet', so no certificate is due.
+    """
+    if raw:
+        return
+    loaded_values = getattr(instance, "_loaded_values", {})
+    previous_status = None if created else loaded_values.get("status")
+    instance._loaded_values = {**loaded_values, "status": instance.status}
+    if instance.status != "Teilgenommen" or previous_status == "Teilgenommen":
+        return
+
+    email_address = instance.person.email if instance.person else instance.email
+    if not email_address:
+        logger.info(
+            f"No email address for SchulungsTeilnehmer {instance.id}, "
+            f"skipping Teilnahmebestätigung"
+        )
+        return
+
+    # Import here to avoid circular imports
+    from core.services.email import queue_teilnahmebestaetigung
+
+    queue_teilnahmebestaetigung(instance)
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def invalidate_cached_person(sender, instance, **kwargs):
+    """Drop the cached Person, e.g. after (de)activation in the admin."""
+    invalidate_person_cache([instance.benutzer_id])
+
+
+@receiver(post_save, sender=Betrieb)
+def invalidate_cached_betrieb_persons(sender, instance, **kwargs):
+    """The cached Persons carry their Betrieb (e.g. the Geschäftsführer)."""
+    invalidate_person_cache(
+        Person.objects.filter(betrieb=instance).values_list("benutzer_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Organisation)
+@receiver(post_delete, sender=Organisation)
+def invalidate_cached_organisation_persons(sender, **kwargs):
+    """
+    The cached Persons carry their Organisation, whose preisrabatt prices
+    orders. Drop all of them: deleting an Organisation has already cleared
+    the Persons' foreign key (SET_NULL) without a signal.
+    """
+    person_cache.invalidate_all()
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+@receiver(m2m_changed, sender=Document.allowed_funktionen.through)
+@receiver(post_delete, sender=Funktion)
+def invalidate_cached_documents(sender, **kwargs):
+    """
+    The document lists are cached per Funktion, drop all of them. Deleting
+    a Funktion removes its allowed_funktionen rows without m2m_changed.
+    """
+    dokumente_cache.invalidate_all()
+
+
+@receiver(post_save, sender=Schulung)
+@receiver(post_delete, sender=Schulung)
+@receiver(post_save, sender=SchulungsTermin)
+@receiver(post_delete, sender=SchulungsTermin)
+@receiver(post_save, sender=SchulungsOrt)
+@receiver(post_delete, sender=SchulungsOrt)
+@receiver(post_save, sender=SchulungsArt)
+@receiver(post_delete, sender=SchulungsArt)
+@receiver(post_save, sender=Funktion)
+@receiver(post_delete, sender=Funktion)
+@receiver(m2m_changed, sender=Schulung.suitable_for_funktionen.through)
+def invalidate_cached_termine(sender, raw=False, **kwargs):
+    """
+    Drop the cached Termin listings and course cards. Seat counts are not
+    part of them: the counter is changed with update(), which sends no
+    signal, and the card footer is always rendered fresh.
+    """
+    if raw:
+        return
+    termine_cache.invalidate_all()
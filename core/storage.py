@@ -10,3 +10,12 @@ class ScalewayObjectStorage(S3Boto3Storage):
     endpoint_url = f"https://s3.{settings.SCALEWAY_REGION}.scw.cloud"
     object_parameters = {"ACL": "public-read"}
     querystring_auth = False
+
+
+class CertificateObjectStorage(ScalewayObjectStorage):
+    """Private bucket prefix for cached certificate PDFs (personal data)."""
+
+    location = "certificates"
+    default_acl = "private"
+    object_parameters = {}
+    querystring_auth = True
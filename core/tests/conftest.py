@@ -0,0 +1,23 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty caches (the in-process LocMem stand-in)."""
+    for cache in caches.all():
+        cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def test_defaults(settings):
+    """
+    Settings every test starts from, independent of the settings module: CI
+    runs with bildungsplattform.settings, not test_settings. Tests that need
+    a cache or another dispatch mode enable it themselves.
+    """
+    settings.PERSON_CACHE_TIMEOUT = 0
+    settings.INDEX_CACHE_TIMEOUT = 0
+    settings.EMAIL_OUTBOX_DISPATCH = "sync"
+    settings.CERTIFICATE_CACHE = "none"
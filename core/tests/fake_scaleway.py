@@ -0,0 +1,97 @@
+"""
+Local stand-in for the Scaleway Transactional Email API.
+
+Runs a keep-alive HTTP/1.1 server in a background thread and records every
+request with the client port it arrived on, so tests can check connection
+reuse, retries and per-message latency without touching the network.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with server.lock:
+            server.requests.append(
+                {
+                    "client_port": self.client_address[1],
+                    "token": self.headers.get("X-Auth-Token"),
+                    "json": body,
+                    "received": time.perf_counter(),
+                }
+            )
+            status = server.responses.pop(0) if server.responses else 200
+
+        if server.delay:
+            time.sleep(server.delay)
+
+        payload = json.dumps({"emails": [{"id": str(len(server.requests))}]})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(payload.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out close the socket before the reply is written
+        pass
+
+
+class FakeScalewayServer:
+    """
+    Usage::
+
+        with FakeScalewayServer(responses=[429, 200]) as server:
+            transport = ScalewayEmailTransport(api_url=server.url, ...)
+
+    Args:
+        responses: Status codes returned for the first requests, 200 after
+        delay: Seconds the server waits before answering each request
+    """
+
+    def __init__(self, responses=None, delay=0):
+        self.httpd = _Server(("127.0.0.1", 0), _Handler)
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = []
+        self.httpd.responses = list(responses or [])
+        self.httpd.delay = delay
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/emails"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    @property
+    def connections(self):
+        """Number of distinct TCP connections the requests arrived on."""
+        return len({request["client_port"] for request in self.requests})
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
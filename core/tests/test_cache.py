@@ -0,0 +1,170 @@
+"""
+Tests for the namespaced cache helpers.
+
+The helpers run against the in-process LocMem stand-in configured in
+test_settings and against the file backend used without Redis.
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import Client
+from django.urls import reverse
+
+from core.cache import CacheNamespace, dokumente_cache, termine_cache
+from core.models import Document, Funktion, Person, SchulungsArt
+
+
+@pytest.fixture(params=["locmem", "file"])
+def namespace(request, settings, tmp_path):
+    if request.param == "file":
+        settings.CACHES = {
+            **settings.CACHES,
+            "file": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": str(tmp_path),
+            },
+        }
+        yield CacheNamespace("test", alias="file")
+        caches["file"].clear()
+    else:
+        yield CacheNamespace("test")
+
+
+class TestCacheNamespace:
+    def test_get_or_set_computes_once(self, namespace):
+        calls = []
+
+        def load():
+            calls.append(1)
+            return ["a", "b"]
+
+        assert namespace.get_or_set(("liste", 1), load) == ["a", "b"]
+        assert namespace.get_or_set(("liste", 1), load) == ["a", "b"]
+        assert len(calls) == 1
+
+    def test_none_is_cached(self, namespace):
+        calls = []
+        namespace.get_or_set(7, lambda: calls.append(1))
+        namespace.get_or_set(7, lambda: calls.append(1))
+        assert len(calls) == 1
+
+    def test_keys_are_namespaced(self, namespace):
+        other = CacheNamespace("other", alias=namespace.alias)
+        namespace.set(1, value="test")
+        other.set(1, value="other")
+        assert namespace.get(1) == "test"
+        assert other.get(1) == "other"
+        assert namespace.key(1).startswith("test:")
+
+    def test_delete(self, namespace):
+        namespace.set(1, value="a")
+        namespace.set(2, value="b")
+        namespace.set(3, "x", value="c")
+        namespace.delete(1)
+        namespace.delete_many([2, (3, "x")])
+        assert namespace.get(1) is None
+        assert namespace.get(2) is None
+        assert namespace.get(3, "x") is None
+
+    def test_invalidate_all_drops_namespace_only(self, namespace):
+        other = CacheNamespace("other", alias=namespace.alias)
+        namespace.set(1, value="a")
+        other.set(1, value="b")
+
+        namespace.invalidate_all()
+
+        assert namespace.get(1) is None
+        assert other.get(1) == "b"
+        namespace.set(1, value="c")
+        assert namespace.get(1) == "c"
+
+    def test_invalidate_before_first_use(self, namespace):
+        namespace.invalidate_all()
+        namespace.set(1, value="a")
+        assert namespace.get(1) == "a"
+
+    def test_evicted_version_does_not_revive_old_entries(self, namespace):
+        namespace.set(1, value="alt")
+        old_key = namespace.key(1)
+        namespace.invalidate_all()
+        namespace.cache.delete(namespace.version_key)
+
+        assert namespace.key(1) != old_key
+        assert namespace.get(1) is None
+
+    def test_async_get_or_set_shares_entries(self, namespace):
+        calls = []
+
+        async def load():
+            calls.append(1)
+            return "wert"
+
+        assert async_to_sync(namespace.aget_or_set)("a", load) == "wert"
+        assert async_to_sync(namespace.aget_or_set)("a", load) == "wert"
+        assert namespace.get("a") == "wert"
+        assert len(calls) == 1
+
+        namespace.invalidate_all()
+        assert async_to_sync(namespace.aget_or_set)("a", "neu") == "neu"
+
+
+@pytest.mark.django_db
+class TestDocumentListCache:
+    def setup_method(self):
+        self.client = Client()
+        user = User.objects.create_user(username="testuser", password="testpass")
+        self.funktion = Funktion.objects.create(name="Meister")
+        Person.objects.create(
+            benutzer=user,
+            vorname="Test",
+            nachname="User",
+            funktion=self.funktion,
+            is_activated=True,
+        )
+        self.client.login(username="testuser", password="testpass")
+
+    def test_document_list_is_cached(self, django_assert_max_num_queries):
+        Document.objects.create(name="Merkblatt")
+        self.client.get(reverse("documents"))
+        assert dokumente_cache.get(self.funktion.pk) is not None
+
+        with django_assert_max_num_queries(3) as queries:
+            response = self.client.get(reverse("documents"))
+        assert not any("core_document" in q["sql"] for q in queries.captured_queries)
+        assert [d.name for d in response.context["documents"]] == ["Merkblatt"]
+
+    def test_document_changes_invalidate(self):
+        document = Document.objects.create(name="Merkblatt")
+        self.client.get(reverse("documents"))
+
+        other = Funktion.objects.create(name="Geselle")
+        document.allowed_funktionen.add(other)
+        response = self.client.get(reverse("documents"))
+        assert list(response.context["documents"]) == []
+
+        Document.objects.create(name="Neu")
+        response = self.client.get(reverse("documents"))
+        assert [d.name for d in response.context["documents"]] == ["Neu"]
+
+
+@pytest.mark.django_db
+class TestDeleteInvalidates:
+    @pytest.mark.parametrize("model", [Funktion, SchulungsArt])
+    def test_delete_drops_cached_termine(self, model):
+        instance = model.objects.create(name="Meister")
+        termine_cache.set("liste", value=["Termin"])
+
+        instance.delete()
+
+        assert termine_cache.get("liste") is None
+
+    def test_funktion_delete_drops_cached_documents(self):
+        funktion = Funktion.objects.create(name="Meister")
+        Document.objects.create(name="Merkblatt").allowed_funktionen.add(funktion)
+        dokumente_cache.set(funktion.pk, value=["Merkblatt"])
+
+        funktion.delete()
+
+        assert dokumente_cache.get(funktion.pk) is None
@@ -0,0 +1,392 @@
+"""
+Tests for the transactional email outbox.
+
+This module tests:
+- Queueing the order confirmation inside the booking transaction
+- Delivery after commit
+- Retrying failed deliveries with the process_email_outbox command
+- Concurrent bulk reminder dispatch with a persisted EmailVersand
+- Async delivery on an event loop
+"""
+
+import asyncio
+import threading
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.models import EmailOutbox, EmailVersand
+from core.services.email import (
+    adeliver_outbox_emails,
+    deliver_outbox_emails,
+    queue_email,
+    send_reminder_to_all_teilnehmer,
+)
+
+from .factories import (
+    PersonFactory,
+    SchulungsTeilnehmerFactory,
+    SchulungsTerminFactory,
+    UserFactory,
+)
+
+
+@pytest.mark.django_db
+class TestQueueEmail:
+    @patch("core.services.email.send_email")
+    def test_queue_email_delivers_after_commit(
+        self, mock_send_email, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            outbox_ids = queue_email("Betreff", "<p>Hallo</p>", ["a@example.com"])
+
+        # Nothing is sent before the transaction commits
+        mock_send_email.assert_not_called()
+        assert EmailOutbox.objects.get(pk=outbox_ids[0]).status == "Offen"
+
+        for callback in callbacks:
+            callback()
+
+        mock_send_email.assert_called_once_with(
+            "Betreff", "<p>Hallo</p>", ["a@example.com"]
+        )
+        outbox_email = EmailOutbox.objects.get(pk=outbox_ids[0])
+        assert outbox_email.status == "Versendet"
+        assert outbox_email.versuche == 1
+        assert outbox_email.versendet_am is not None
+
+    @patch("core.services.email.send_email")
+    def test_delivered_email_is_not_sent_twice(self, mock_send_email):
+        outbox_email = EmailOutbox.objects.create(
+            empfaenger="a@example.com", betreff="Betreff", html="<p>Hallo</p>"
+        )
+
+        deliver_outbox_emails([outbox_email.pk])
+        deliver_outbox_emails([outbox_email.pk])
+
+        assert mock_send_email.call_count == 1
+
+    @patch("core.services.email.send_email", side_effect=Exception("API down"))
+    def test_failed_delivery_is_recorded(self, mock_send_email):
+        outbox_email = EmailOutbox.objects.create(
+            empfaenger="a@example.com", betreff="Betreff", html="<p>Hallo</p>"
+        )
+
+        sent, failed = deliver_outbox_emails([outbox_email.pk])
+
+        outbox_email.refresh_from_db()
+        assert (sent, failed) == (0, 1)
+        assert outbox_email.status == "Fehlgeschlagen"
+        assert outbox_email.fehler == "API down"
+
+
+@pytest.mark.django_db
+class TestProcessEmailOutboxCommand:
+    @patch("core.services.email.send_email")
+    def test_command_retries_failed_emails(self, mock_send_email):
+        failed = EmailOutbox.objects.create(
+            empfaenger="a@example.com",
+            betreff="Betreff",
+            html="<p>Hallo</p>",
+            status="Fehlgeschlagen",
+            versuche=1,
+        )
+        exhausted = EmailOutbox.objects.create(
+            empfaenger="b@example.com",
+            betreff="Betreff",
+            html="<p>Hallo</p>",
+            status="Fehlgeschlagen",
+            versuche=5,
+        )
+
+        out = StringIO()
+        call_command("process_email_outbox", stdout=out)
+
+        failed.refresh_from_db()
+        exhausted.refresh_from_db()
+        assert failed.status == "Versendet"
+        assert exhausted.status == "Fehlgeschlagen"
+        assert "1 E-Mail(s) versendet" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestResendOutboxAction:
+    @patch("core.services.email.dispatch_outbox_emails")
+    def test_emails_in_delivery_are_not_reset(self, mock_dispatch):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from core.services.email import OUTBOX_CLAIM_TIMEOUT
+
+        failed, in_delivery, stale = [
+            EmailOutbox.objects.create(
+                empfaenger=f"{status}@example.com",
+                betreff="Betreff",
+                html="<p>Hallo</p>",
+                status=status,
+            )
+            for status in ["Fehlgeschlagen", "In Zustellung", "In Zustellung"]
+        ]
+        # A worker that died while sending, its claim has expired
+        EmailOutbox.objects.filter(pk=stale.pk).update(
+            updated=timezone.now() - OUTBOX_CLAIM_TIMEOUT - timedelta(minutes=1)
+        )
+        client = Client()
+        client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "pw")
+        )
+
+        response = client.post(
+            reverse("admin:core_emailoutbox_changelist"),
+            {
+                "action": "resend_outbox_emails",
+                "_selected_action": [failed.pk, in_delivery.pk, stale.pk],
+            },
+            follow=True,
+        )
+
+        mock_dispatch.assert_called_once()
+        assert sorted(mock_dispatch.call_args.args[0]) == [failed.pk, stale.pk]
+        in_delivery.refresh_from_db()
+        assert in_delivery.status == "In Zustellung"
+        assert EmailOutbox.objects.get(pk=stale.pk).status == "Offen"
+        assert "1 E-Mail(s) werden gerade zugestellt" in response.content.decode()
+
+
+@pytest.mark.django_db
+class TestOrderConfirmationOutbox:
+    def setup_method(self):
+        self.client = Client()
+        self.person, self.user = PersonFactory.create_with_user(is_activated=True)
+        self.termin = SchulungsTerminFactory.create()
+        self.client.login(username="testuser", password="testpass123")
+
+    def _confirm_order(self):
+        return self.client.post(
+            reverse("confirm_order"),
+            {
+                "schulungstermin_id": self.termin.id,
+                "quantity": "1",
+                "firstname-0": "John",
+                "lastname-0": "Doe",
+                "email-0": "john@example.com",
+                "meal-0": "Standard",
+            },
+        )
+
+    @override_settings(EMAIL_OUTBOX_DISPATCH="worker")
+    @patch("core.services.email.send_email")
+    def test_booking_does_not_call_email_api(
+        self, mock_send_email, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self._confirm_order()
+
+        assert response.status_code == 200
+        mock_send_email.assert_not_called()
+        empfaenger = set(EmailOutbox.objects.values_list("empfaenger", flat=True))
+        assert empfaenger == {
+            "test@example.com",
+            "bildungsplattform@rauchfangkehrer.or.at",
+        }
+        assert set(EmailOutbox.objects.values_list("status", flat=True)) == {"Offen"}
+
+    @patch("core.services.email.send_email", side_effect=Exception("API down"))
+    def test_email_failure_does_not_affect_booking(
+        self, mock_send_email, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self._confirm_order()
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "success"
+        assert EmailOutbox.objects.filter(status="Fehlgeschlagen").count() == 2
+
+
+@pytest.mark.django_db
+class TestReminderDispatch:
+    def setup_method(self):
+        self.termin = SchulungsTerminFactory.create()
+        for i in range(3):
+            SchulungsTeilnehmerFactory.create_external_participant(
+                schulungstermin=self.termin, email=f"teilnehmer{i}@example.com"
+            )
+
+    def test_failure_does_not_abort_other_recipients(
+        self, django_capture_on_commit_callbacks
+    ):
+        def send(subject, message, to_emails):
+            if to_emails == ["teilnehmer1@example.com"]:
+                raise Exception("API down")
+
+        with patch("core.services.email.send_email", side_effect=send):
+            with django_capture_on_commit_callbacks(execute=True):
+                versand = send_reminder_to_all_teilnehmer(self.termin.pk)
+
+        assert versand.schulungstermin == self.termin
+        assert versand.statistik() == {
+            "gesamt": 3,
+            "offen": 0,
+            "versendet": 2,
+            "wiederholt": 0,
+            "fehlgeschlagen": 1,
+        }
+        failed = versand.emails.get(status="Fehlgeschlagen")
+        assert failed.empfaenger == "teilnehmer1@example.com"
+        assert failed.fehler == "API down"
+
+    def test_recipients_are_sent_concurrently(self):
+        # Only passes if all three API calls are in flight at the same time
+        barrier = threading.Barrier(3, timeout=5)
+        outbox_ids = [
+            EmailOutbox.objects.create(
+                empfaenger=f"a{i}@example.com", betreff="Betreff", html="<p>Hallo</p>"
+            ).pk
+            for i in range(3)
+        ]
+
+        with patch(
+            "core.services.email.send_email", side_effect=lambda *args: barrier.wait()
+        ):
+            sent, failed = deliver_outbox_emails(outbox_ids, max_workers=3)
+
+        assert (sent, failed) == (3, 0)
+
+    @patch("core.services.email.send_email")
+    def test_retried_recipient_is_counted(self, mock_send_email):
+        versand = EmailVersand.objects.create(betreff="Betreff")
+        outbox_email = EmailOutbox.objects.create(
+            versand=versand,
+            empfaenger="a@example.com",
+            betreff="Betreff",
+            html="<p>Hallo</p>",
+            status="Fehlgeschlagen",
+            versuche=1,
+        )
+
+        call_command("process_email_outbox", stdout=StringIO())
+
+        outbox_email.refresh_from_db()
+        assert outbox_email.versuche == 2
+        assert versand.statistik()["wiederholt"] == 1
+
+    @override_settings(EMAIL_OUTBOX_DISPATCH="worker")
+    def test_send_reminder_view_redirects_to_status(self):
+        UserFactory.create_staff()
+        client = Client()
+        client.login(username="staff", password="staffpass123")
+
+        response = client.get(reverse("send_reminder", args=(self.termin.pk,)))
+
+        versand = EmailVersand.objects.get()
+        assert response.status_code == 302
+        assert response.url == reverse("email_versand_status", args=(versand.pk,))
+
+        response = client.get(response.url)
+        assert response.status_code == 200
+        assert response.context["statistik"]["offen"] == 3
+        assert not response.context["abgeschlossen"]
+        assert b'http-equiv="refresh"' in response.content
+        assert b"teilnehmer0@example.com" in response.content
+
+    def test_send_reminder_requires_staff(self):
+        PersonFactory.create_with_user()
+        client = Client()
+        client.login(username="testuser", password="testpass123")
+
+        response = client.get(reverse("send_reminder", args=(self.termin.pk,)))
+
+        assert response.status_code == 302
+        assert not EmailVersand.objects.exists()
+
+
+class FakeAsyncTransport:
+    def __init__(self, parties=1, fail_for=()):
+        self.barrier = asyncio.Barrier(parties)
+        self.fail_for = fail_for
+        self.sent = []
+        self.closed = False
+
+    async def send(self, to_email, subject, html, attachments=None):
+        # Only passes if all sends are in flight on the loop at the same time
+        await asyncio.wait_for(self.barrier.wait(), timeout=5)
+        if to_email in self.fail_for:
+            raise Exception("API down")
+        self.sent.append(to_email)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.django_db
+class TestAsyncOutboxDelivery:
+    def setup_method(self):
+        self.outbox_ids = [
+            EmailOutbox.objects.create(
+                empfaenger=f"a{i}@example.com", betreff="Betreff", html="<p>Hallo</p>"
+            ).pk
+            for i in range(3)
+        ]
+
+    def test_recipients_are_sent_concurrently(self):
+        transport = FakeAsyncTransport(parties=3, fail_for=["a1@example.com"])
+
+        with patch(
+            "core.services.email.get_async_email_transport", return_value=transport
+        ):
+            sent, failed = async_to_sync(adeliver_outbox_emails)(self.outbox_ids)
+
+        assert (sent, failed) == (2, 1)
+        failed_email = EmailOutbox.objects.get(status="Fehlgeschlagen")
+        assert failed_email.empfaenger == "a1@example.com"
+        assert failed_email.fehler == "API down"
+        assert (
+            EmailOutbox.objects.filter(
+                status="Versendet", versendet_am__isnull=False
+            ).count()
+            == 2
+        )
+
+    def test_claimed_emails_are_not_sent_twice(self):
+        EmailOutbox.objects.filter(pk=self.outbox_ids[0]).update(status="Versendet")
+        transport = FakeAsyncTransport(parties=2)
+
+        with patch(
+            "core.services.email.get_async_email_transport", return_value=transport
+        ):
+            sent, failed = async_to_sync(adeliver_outbox_emails)(self.outbox_ids)
+
+        assert (sent, failed) == (2, 0)
+        assert sorted(transport.sent) == ["a1@example.com", "a2@example.com"]
+
+    def test_http_client_is_closed_after_delivery(self):
+        pytest.importorskip("httpx")
+        transport = FakeAsyncTransport(parties=3)
+
+        with patch(
+            "core.services.email_transport.AsyncScalewayEmailTransport",
+            return_value=transport,
+        ):
+            sent, failed = async_to_sync(adeliver_outbox_emails)(self.outbox_ids)
+
+        assert (sent, failed) == (3, 0)
+        assert transport.closed
+
+    def test_worker_command_async(self):
+        transport = FakeAsyncTransport(parties=3)
+        out = StringIO()
+
+        with patch(
+            "core.services.email.get_async_email_transport", return_value=transport
+        ):
+            call_command("process_email_outbox", "--async", stdout=out)
+
+        assert "3 E-Mail(s) versendet, 0 fehlgeschlagen." in out.getvalue()
+        assert not EmailOutbox.objects.exclude(status="Versendet").exists()
@@ -0,0 +1,219 @@
+"""
+Tests for the pooled Scaleway email transport.
+
+This module tests, against a local fake Scaleway endpoint:
+- Connection reuse across messages (keep-alive)
+- Retry with backoff on 429 and 5xx responses
+- Timeouts
+- Per-message latency of the shared session
+- The async transport (httpx, or the sync transport in threads)
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+from asgiref.sync import async_to_sync
+
+from core.services.email import send_email
+from core.services.email_transport import (
+    AsyncScalewayEmailTransport,
+    ScalewayEmailTransport,
+    ThreadedAsyncEmailTransport,
+    get_async_email_transport,
+)
+
+from .fake_scaleway import FakeScalewayServer
+
+
+def _transport(server, **kwargs):
+    kwargs.setdefault("backoff_factor", 0)
+    return ScalewayEmailTransport(api_url=server.url, token="test-token", **kwargs)
+
+
+class TestScalewayEmailTransport:
+    def test_messages_reuse_one_connection(self):
+        with FakeScalewayServer() as server:
+            transport = _transport(server)
+            for i in range(10):
+                transport.send(f"user{i}@example.com", "Betreff", "<p>Hallo</p>")
+            transport.close()
+
+        assert len(server.requests) == 10
+        assert server.connections == 1
+        assert server.requests[0]["token"] == "test-token"
+        assert server.requests[0]["json"]["to"] == [{"email": "user0@example.com"}]
+
+    def test_retries_rate_limit_and_server_errors(self):
+        with FakeScalewayServer(responses=[429, 503]) as server:
+            transport = _transport(server, max_retries=3)
+            transport.send("a@example.com", "Betreff", "<p>Hallo</p>")
+            transport.close()
+
+        assert len(server.requests) == 3
+
+    def test_raises_when_retries_are_exhausted(self):
+        with FakeScalewayServer(responses=[500, 500, 500]) as server:
+            transport = _transport(server, max_retries=2)
+            with pytest.raises(requests.exceptions.HTTPError):
+                transport.send("a@example.com", "Betreff", "<p>Hallo</p>")
+            transport.close()
+
+        assert len(server.requests) == 3
+
+    def test_client_errors_are_not_retried(self):
+        with FakeScalewayServer(responses=[400]) as server:
+            transport = _transport(server, max_retries=3)
+            with pytest.raises(requests.exceptions.HTTPError):
+                transport.send("a@example.com", "Betreff", "<p>Hallo</p>")
+            transport.close()
+
+        assert len(server.requests) == 1
+
+    def test_read_timeout(self):
+        with FakeScalewayServer(delay=0.5) as server:
+            transport = _transport(server, timeout=(1, 0.1), max_retries=0)
+            with pytest.raises(requests.exceptions.ConnectionError):
+                transport.send("a@example.com", "Betreff", "<p>Hallo</p>")
+            transport.close()
+
+    def test_per_message_latency(self):
+        """Keep-alive messages must not pay the connection setup again."""
+        with FakeScalewayServer() as server:
+            transport = _transport(server)
+            latencies = []
+            for i in range(20):
+                start = time.perf_counter()
+                transport.send(f"user{i}@example.com", "Betreff", "<p>Hallo</p>")
+                latencies.append(time.perf_counter() - start)
+            transport.close()
+
+        assert server.connections == 1
+        # Generous bound, the fake answers immediately on localhost
+        assert sum(latencies) / len(latencies) < 0.05
+
+
+class TestSendEmail:
+    def test_send_email_uses_shared_transport(self):
+        with FakeScalewayServer() as server:
+            transport = _transport(server)
+            with patch(
+                "core.services.email.get_email_transport", return_value=transport
+            ):
+                send_email(
+                    "Betreff", "<p>Hallo</p>", ["a@example.com", "b@example.com"]
+                )
+            transport.close()
+
+        assert [r["json"]["to"][0]["email"] for r in server.requests] == [
+            "a@example.com",
+            "b@example.com",
+        ]
+        assert server.connections == 1
+
+
+class TestAsyncScalewayEmailTransport:
+    @pytest.fixture(autouse=True)
+    def httpx(self):
+        return pytest.importorskip("httpx")
+
+    def _send_all(self, server, recipients, **kwargs):
+        kwargs.setdefault("backoff_factor", 0)
+
+        async def send_all():
+            transport = AsyncScalewayEmailTransport(
+                api_url=server.url, token="test-token", **kwargs
+            )
+            try:
+                return await asyncio.gather(
+                    *(
+                        transport.send(recipient, "Betreff", "<p>Hallo</p>")
+                        for recipient in recipients
+                    )
+                )
+            finally:
+                await transport.close()
+
+        return async_to_sync(send_all)()
+
+    def test_sends_overlap(self):
+        with FakeScalewayServer(delay=0.2) as server:
+            start = time.perf_counter()
+            self._send_all(server, [f"user{i}@example.com" for i in range(5)])
+            elapsed = time.perf_counter() - start
+
+        assert len(server.requests) == 5
+        assert server.requests[0]["token"] == "test-token"
+        # One after another would take a second
+        assert elapsed < 0.8
+
+    def test_retries_rate_limit_and_server_errors(self):
+        with FakeScalewayServer(responses=[429, 503]) as server:
+            self._send_all(server, ["a@example.com"], max_retries=3)
+
+        assert len(server.requests) == 3
+
+    def test_raises_when_retries_are_exhausted(self, httpx):
+        with FakeScalewayServer(responses=[500, 500, 500]) as server:
+            with pytest.raises(httpx.HTTPStatusError):
+                self._send_all(server, ["a@example.com"], max_retries=2)
+
+        assert len(server.requests) == 3
+
+    @pytest.mark.parametrize(
+        "retry_after, delay",
+        [
+            ("7", 7),
+            ("soon", 2.0),
+            ("", 2.0),
+            # No timezone, read as GMT
+            ("Thu, 01 Jan 1970 00:00:00", 0),
+            ("Thu, 01 Jan 2099 00:00:00 GMT", None),
+        ],
+    )
+    def test_retry_delay(self, httpx, retry_after, delay):
+        transport = AsyncScalewayEmailTransport(token="test-token", backoff_factor=0.5)
+        response = httpx.Response(429, headers={"Retry-After": retry_after})
+
+        result = transport.retry_delay(2, response)
+        async_to_sync(transport.close)()
+
+        if delay is None:
+            assert result > 0
+        else:
+            assert result == delay
+
+
+class TestGetAsyncEmailTransport:
+    def test_falls_back_to_threads_without_httpx(self):
+        with FakeScalewayServer() as server:
+            sync_transport = _transport(server)
+            with patch(
+                "core.services.email_transport.httpx_available", return_value=False
+            ), patch(
+                "core.services.email_transport.get_email_transport",
+                return_value=sync_transport,
+            ):
+
+                async def send():
+                    transport = get_async_email_transport()
+                    await transport.send("a@example.com", "Betreff", "<p>Hallo</p>")
+                    return transport
+
+                transport = async_to_sync(send)()
+            sync_transport.close()
+
+        assert isinstance(transport, ThreadedAsyncEmailTransport)
+        assert server.requests[0]["json"]["to"] == [{"email": "a@example.com"}]
+
+    def test_one_transport_per_event_loop(self):
+        pytest.importorskip("httpx")
+
+        async def get_twice():
+            return get_async_email_transport(), get_async_email_transport()
+
+        first, second = async_to_sync(get_twice)()
+        assert first is second
+        assert isinstance(first, AsyncScalewayEmailTransport)
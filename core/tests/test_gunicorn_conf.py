@@ -0,0 +1,78 @@
+import runpy
+import sys
+from pathlib import Path
+
+import pytest
+
+GUNICORN_CONF = Path(__file__).resolve().parents[2] / "gunicorn.conf.py"
+
+
+def load_conf(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(str(GUNICORN_CONF))
+
+
+class TestGunicornConf:
+    def test_defaults(self, monkeypatch):
+        conf = load_conf(monkeypatch)
+
+        assert conf["worker_class"] == "gthread"
+        assert 2 <= conf["workers"] <= 8
+        assert conf["threads"] == 4
+        assert conf["preload_app"] is True
+        assert conf["max_requests"] == 1000
+        assert conf["max_requests_jitter"] == 100
+
+    def test_worker_count_follows_cpus(self, monkeypatch):
+        conf = load_conf(monkeypatch)
+
+        assert conf["default_workers"]("sync", 2, 8) == 5
+        assert conf["default_workers"]("sync", 8, 8) == 8
+        assert conf["default_workers"]("gthread", 1, 8) == 2
+        assert conf["default_workers"]("gevent", 4, 8) == 4
+
+    def test_environment_overrides(self, monkeypatch):
+        conf = load_conf(
+            monkeypatch,
+            GUNICORN_WORKER_CLASS="sync",
+            GUNICORN_WORKERS="3",
+            GUNICORN_MAX_REQUESTS="500",
+            GUNICORN_PRELOAD="false",
+        )
+
+        assert conf["worker_class"] == "sync"
+        assert conf["workers"] == 3
+        assert conf["threads"] == 1
+        assert conf["max_requests_jitter"] == 50
+        assert conf["preload_app"] is False
+
+    def test_gevent_without_gevent_falls_back_to_gthread(self, monkeypatch):
+        # A None entry makes "import gevent" raise ImportError
+        monkeypatch.setitem(sys.modules, "gevent", None)
+
+        conf = load_conf(monkeypatch, GUNICORN_WORKER_CLASS="gevent")
+
+        assert conf["worker_class"] == "gthread"
+
+    def test_uvicorn_serves_asgi(self, monkeypatch):
+        pytest.importorskip("uvicorn")
+
+        conf = load_conf(monkeypatch, GUNICORN_WORKER_CLASS="uvicorn")
+
+        assert conf["worker_class"].endswith("UvicornWorker")
+        assert conf["wsgi_app"] == "bildungsplattform.asgi:application"
+        assert conf["threads"] == 1
+
+    def test_uvicorn_without_uvicorn_falls_back_to_gthread(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "uvicorn_worker", None)
+        monkeypatch.setitem(sys.modules, "uvicorn.workers", None)
+
+        conf = load_conf(monkeypatch, GUNICORN_WORKER_CLASS="uvicorn")
+
+        assert conf["worker_class"] == "gthread"
+        assert conf["wsgi_app"] == "bildungsplattform.wsgi:application"
+
+    def test_unknown_worker_class(self, monkeypatch):
+        with pytest.raises(ValueError):
+            load_conf(monkeypatch, GUNICORN_WORKER_CLASS="eventlet")
@@ -1,9 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
 import pytest
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import Client, TransactionTestCase
 from django.urls import reverse
 from django.utils import timezone
@@ -359,6 +361,7 @@ class TestCourseCapacityManagement:
             },
         )
         assert response.status_code == 200
+        self.termin.refresh_from_db()
         assert self.termin.freie_plaetze == 2
         assert self.termin.teilnehmer_count == 1
 
@@ -394,9 +397,41 @@ class TestCourseCapacityManagement:
             },
         )
 
-        # Should still succeed but should be handled gracefully
-        # In real implementation, you'd want to check capacity before confirming
+        # Capacity is enforced before anything is created
+        assert response.status_code == 409
+        assert response.json()["status"] == "error"
+        assert "Nicht genügend freie Plätze" in response.json()["message"]
+        assert not Bestellung.objects.filter(schulungstermin=self.termin).exists()
+        self.termin.refresh_from_db()
+        assert self.termin.belegte_plaetze == 3
+
+    @patch("core.views.checkout_view.send_order_confirmation_email")
+    def test_order_filling_remaining_seats_succeeds(self, mock_email):
+        """Test that the last free seats can still be booked"""
+        SchulungsTeilnehmer.objects.create(
+            schulungstermin=self.termin, person=self.persons[0]
+        )
+
+        self.client.login(username="user3", password="testpass")
+        response = self.client.post(
+            reverse("confirm_order"),
+            {
+                "schulungstermin_id": self.termin.id,
+                "quantity": "2",
+                "firstname-0": "Last1",
+                "lastname-0": "User",
+                "email-0": "last1@example.com",
+                "meal-0": "Standard",
+                "firstname-1": "Last2",
+                "lastname-1": "User",
+                "email-1": "last2@example.com",
+                "meal-1": "Standard",
+            },
+        )
+
         assert response.status_code == 200
+        self.termin.refresh_from_db()
+        assert self.termin.freie_plaetze == 0
 
     def test_minimum_participants_tracking(self):
         """Test tracking of minimum participant requirements"""
@@ -415,6 +450,65 @@ class TestCourseCapacityManagement:
         assert self.termin.teilnehmer_count >= self.termin.min_teilnehmer
 
 
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="Row locking needs PostgreSQL, SQLite serializes all writes",
+)
+class TestConcurrentBooking(TransactionTestCase):
+    """Fire parallel bookings at one Termin and check nothing is overbooked"""
+
+    max_teilnehmer = 10
+    buchungen = 40
+
+    def setUp(self):
+        schulung = Schulung.objects.create(
+            name="Beliebte Schulung",
+            beschreibung="Test",
+            preis_standard=Decimal("100.00"),
+        )
+        self.termin = SchulungsTermin.objects.create(
+            datum_von=timezone.now() + timedelta(days=7),
+            datum_bis=timezone.now() + timedelta(days=7, hours=2),
+            schulung=schulung,
+            max_teilnehmer=self.max_teilnehmer,
+            buchbar=True,
+        )
+        for i in range(self.buchungen):
+            user = User.objects.create_user(username=f"user{i}", password="testpass")
+            Person.objects.create(
+                benutzer=user, vorname=f"User{i}", nachname="Test", is_activated=True
+            )
+
+    def _book(self, index):
+        client = Client()
+        client.login(username=f"user{index}", password="testpass")
+        try:
+            return client.post(
+                reverse("confirm_order"),
+                {
+                    "schulungstermin_id": self.termin.id,
+                    "quantity": "1",
+                    "firstname-0": f"User{index}",
+                    "lastname-0": "Test",
+                    "email-0": f"user{index}@example.com",
+                    "meal-0": "Standard",
+                },
+            ).status_code
+        finally:
+            connection.close()
+
+    @patch("core.views.checkout_view.send_order_confirmation_email")
+    def test_parallel_bookings_do_not_overbook(self, mock_email):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            status_codes = list(pool.map(self._book, range(self.buchungen)))
+
+        self.termin.refresh_from_db()
+        assert status_codes.count(200) == self.max_teilnehmer
+        assert status_codes.count(409) == self.buchungen - self.max_teilnehmer
+        assert self.termin.belegte_plaetze == self.max_teilnehmer
+        assert self.termin.schulungsteilnehmer_set.count() == self.max_teilnehmer
+
+
 @pytest.mark.django_db
 class TestUserSchulungsHistory:
     """Test user's ability to view their training history"""
@@ -190,6 +190,104 @@ class TestSchulungsTermin:
         assert betrieb1 in betriebe
         assert betrieb2 in betriebe
 
+    def _create_termin(self, **kwargs):
+        schulung = Schulung.objects.create(
+            name="Test", beschreibung="Test", preis_standard=Decimal("100.00")
+        )
+        return SchulungsTermin.objects.create(
+            datum_von=timezone.now(),
+            datum_bis=timezone.now() + timedelta(hours=4),
+            schulung=schulung,
+            **kwargs,
+        )
+
+    def test_belegte_plaetze_follows_participants(self):
+        termin = self._create_termin(max_teilnehmer=10)
+        other_termin = self._create_termin(max_teilnehmer=10)
+        person = Person.objects.create(vorname="Test", nachname="Person")
+
+        teilnehmer = SchulungsTeilnehmer.objects.create(
+            schulungstermin_id=termin.id, person=person
+        )
+        SchulungsTeilnehmer.objects.create(
+            schulungstermin_id=termin.id, vorname="Ext", nachname="Ern"
+        )
+        termin.refresh_from_db()
+        assert termin.belegte_plaetze == 2
+
+        # Moving a participant to another Termin moves the seat
+        teilnehmer = SchulungsTeilnehmer.objects.get(pk=teilnehmer.pk)
+        teilnehmer.schulungstermin = other_termin
+        teilnehmer.save()
+        termin.refresh_from_db()
+        other_termin.refresh_from_db()
+        assert termin.belegte_plaetze == 1
+        assert other_termin.belegte_plaetze == 1
+
+        SchulungsTeilnehmer.objects.filter(schulungstermin=termin).delete()
+        termin.refresh_from_db()
+        assert termin.belegte_plaetze == 0
+        assert termin.freie_plaetze == 10
+
+    def test_save_does_not_overwrite_belegte_plaetze(self):
+        termin = self._create_termin(max_teilnehmer=10)
+        stale = SchulungsTermin.objects.get(pk=termin.pk)
+        SchulungsTeilnehmer.objects.create(
+            schulungstermin_id=termin.id, vorname="Ext", nachname="Ern"
+        )
+
+        stale.max_teilnehmer = 12
+        stale.save()
+
+        termin.refresh_from_db()
+        assert termin.max_teilnehmer == 12
+        assert termin.belegte_plaetze == 1
+
+    def test_copy_with_pk_none_is_inserted_without_participants(self):
+        termin = self._create_termin(max_teilnehmer=10)
+        SchulungsTeilnehmer.objects.create(
+            schulungstermin_id=termin.id, vorname="Ext", nachname="Ern"
+        )
+        termin.refresh_from_db()
+
+        termin.pk = None
+        termin.save()
+
+        assert SchulungsTermin.objects.count() == 2
+        termin.refresh_from_db()
+        assert termin.max_teilnehmer == 10
+        assert termin.belegte_plaetze == 0
+
+    def test_explicit_update_fields_write_belegte_plaetze(self):
+        termin = self._create_termin(max_teilnehmer=10)
+
+        termin.belegte_plaetze = 3
+        termin.save(update_fields=["belegte_plaetze"])
+
+        termin.refresh_from_db()
+        assert termin.belegte_plaetze == 3
+
+    def test_reconcile_belegte_plaetze_command(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        termin = self._create_termin(max_teilnehmer=10)
+        SchulungsTeilnehmer.objects.create(
+            schulungstermin=termin, vorname="Ext", nachname="Ern"
+        )
+        SchulungsTermin.objects.filter(pk=termin.pk).update(belegte_plaetze=5)
+
+        out = StringIO()
+        call_command("reconcile_belegte_plaetze", "--dry-run", stdout=out)
+        termin.refresh_from_db()
+        assert termin.belegte_plaetze == 5
+        assert "1 Schulungstermin(e) mit Abweichung" in out.getvalue()
+
+        call_command("reconcile_belegte_plaetze", stdout=StringIO())
+        termin.refresh_from_db()
+        assert termin.belegte_plaetze == 1
+
 
 @pytest.mark.django_db
 class TestBetrieb:
@@ -335,6 +433,72 @@ class TestSchulungsTeilnehmer:
             )
             assert teilnehmer.status == status
 
+    def test_person_only_once_per_termin(self):
+        from django.core.exceptions import ValidationError
+        from django.db import IntegrityError, transaction
+
+        schulung = Schulung.objects.create(
+            name="Test", beschreibung="Test", preis_standard=Decimal("100.00")
+        )
+        termin = SchulungsTermin.objects.create(
+            datum_von=timezone.now(),
+            datum_bis=timezone.now() + timedelta(hours=4),
+            schulung=schulung,
+        )
+        person = Person.objects.create(vorname="Max", nachname="Mustermann")
+        SchulungsTeilnehmer.objects.create(schulungstermin=termin, person=person)
+
+        duplicate = SchulungsTeilnehmer(schulungstermin=termin, person=person)
+        with pytest.raises(ValidationError, match="bereits angemeldet"):
+            duplicate.full_clean()
+        with pytest.raises(IntegrityError), transaction.atomic():
+            duplicate.save()
+
+        # External participants without Person are not restricted
+        for _ in range(2):
+            SchulungsTeilnehmer.objects.create(
+                schulungstermin=termin, vorname="Ext", nachname="Ern"
+            )
+
+
+@pytest.mark.django_db
+class TestHotQueryIndexes:
+    def test_explain_command_on_seeded_data(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("explain_hot_queries", seed=500, stdout=out)
+        output = out.getvalue()
+
+        assert "500 Personen" in output
+        for index in [
+            "teilnehmer_termin_person_uniq",
+            "teilnehmer_person_status",
+            "schulungstermin_datum_von",
+        ]:
+            assert index in output
+        for label in ["Bestellung(person)", "Person(benutzer)", "Person(betrieb)"]:
+            assert f"✓ {label}" in output
+        # The seeded rows are rolled back
+        assert not Person.objects.exists()
+        assert not User.objects.exists()
+
+    def test_explain_command_check_fails_without_index(self, monkeypatch):
+        import re
+        from io import StringIO
+
+        from django.core.management import CommandError, call_command
+
+        # A pattern that never matches: every plan counts as a full scan
+        monkeypatch.setattr(
+            "core.management.commands.explain_hot_queries.INDEX_USAGE",
+            re.compile(r"(?!)(.)"),
+        )
+        with pytest.raises(CommandError, match="Ohne Index"):
+            call_command("explain_hot_queries", check=True, stdout=StringIO())
+
 
 @pytest.mark.django_db
 class TestBestellung:
@@ -2,6 +2,7 @@ from unittest.mock import patch
 
 import pytest
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import Client
 from django.urls import reverse
 from django.utils import timezone
@@ -249,6 +250,36 @@ class TestCombinedRegistrationForm:
         assert not form.is_valid()
         assert "email" in form.user_form.errors
 
+    def test_invalid_form_duplicate_email_other_case(self):
+        """Test the duplicate check ignores the case of the email address."""
+        User.objects.create_user(
+            username="existing", email="Test@Example.com", password="password"
+        )
+
+        form_data = {
+            "username": "testuser123",
+            "first_name": "Test",
+            "last_name": "User",
+            "email": "test@example.com",
+            "password1": "complex_password_123",
+            "password2": "complex_password_123",
+            "telefon": "+43 123 456 7890",
+            "dsv_akzeptiert": True,
+        }
+
+        form = CombinedRegistrationForm(form_data)
+        assert not form.is_valid()
+        assert "email" in form.user_form.errors
+
+    def test_email_lookup_is_indexed(self):
+        """Test the UPPER(email) index of the duplicate check exists."""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, User._meta.db_table
+            )
+
+        assert constraints["auth_user_email_upper_idx"]["index"]
+
 
 @pytest.mark.django_db
 class TestAccessControlDecorators:
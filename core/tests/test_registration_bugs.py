@@ -14,13 +14,15 @@ Root cause: The `registrierte_betriebe` property in SchulungsTermin model:
   when ANY other user without Betrieb (or external participant) is registered
 """
 
-from datetime import timedelta
+import csv
+from datetime import datetime, timedelta
 from decimal import Decimal
 from io import StringIO
 
 import pytest
+from django.contrib import admin
 from django.contrib.auth.models import User
-from django.test import Client
+from django.test import Client, RequestFactory
 from django.urls import reverse
 from django.utils import timezone
 
@@ -410,6 +412,7 @@ class TestAdminCSVExportBugs:
             response = export_schulungsteilnehmer_to_csv(None, request, queryset)
             assert response.status_code == 200
             assert response["Content-Type"] == "text/csv"
+            b"".join(response.streaming_content)
         except AttributeError as e:
             pytest.fail(f"BUG: CSV export crashes with external participant: {e}")
 
@@ -472,7 +475,7 @@ class TestAdminCSVExportBugs:
 
         try:
             response = export_schulungsteilnehmer_to_csv(None, request, queryset)
-            content = response.content.decode("utf-8")
+            content = b"".join(response.streaming_content).decode("utf-8")
 
             # Verify all participants are included
             assert "With Betrieb" in content or "With,Betrieb" in content.replace(
@@ -488,6 +491,113 @@ class TestAdminCSVExportBugs:
             pytest.fail(f"BUG: CSV export crashes with mixed participants: {e}")
 
 
+@pytest.mark.django_db
+class TestSchulungsteilnehmerCSVExport:
+    def setup_method(self):
+        self.schulung = Schulung.objects.create(name="Kehrtechnik", beschreibung="")
+        betrieb = Betrieb.objects.create(name="Betrieb A")
+        self.termine = []
+        for i in range(5):
+            termin = SchulungsTermin.objects.create(
+                datum_von=datetime(2026, 3, i + 1, 9, 0),
+                datum_bis=datetime(2026, 3, i + 1, 17, 0),
+                schulung=self.schulung,
+                max_teilnehmer=20,
+            )
+            self.termine.append(termin)
+            for k in range(4):
+                person = Person.objects.create(
+                    vorname=f"V{i}{k}",
+                    nachname="N",
+                    email=f"p{i}{k}@example.com",
+                    betrieb=betrieb,
+                )
+                SchulungsTeilnehmer.objects.create(
+                    schulungstermin=termin,
+                    person=person,
+                    vorname=person.vorname,
+                    nachname=person.nachname,
+                    status="Teilgenommen" if k % 2 else "Angemeldet",
+                    verpflegung="Vegetarisch" if k == 3 else "Standard",
+                )
+
+    def export(self, queryset):
+        from core.admin import export_schulungsteilnehmer_to_csv
+
+        request = RequestFactory().get("/admin/")
+        return export_schulungsteilnehmer_to_csv(None, request, queryset)
+
+    def test_rows_and_columns(self):
+        response = self.export(SchulungsTermin.objects.filter(pk=self.termine[0].pk))
+
+        assert response.streaming
+        rows = list(
+            csv.reader(
+                b"".join(response.streaming_content).decode("utf-8").splitlines()
+            )
+        )
+        assert rows[0] == [
+            "Schulung",
+            "Datum",
+            "Person",
+            "Betrieb",
+            "Email",
+            "Telefon",
+            "DSV akzeptiert",
+            "Status",
+            "Verpflegung",
+        ]
+        assert rows[1] == [
+            "Kehrtechnik",
+            "01.03.2026 09:00",
+            "V00 N",
+            "Betrieb A",
+            "p00@example.com",
+            "",
+            "Nein",
+            "Angemeldet",
+            "Standard",
+        ]
+        assert rows[4][-2:] == ["Teilgenommen", "Vegetarisch"]
+        assert len(rows) == 5
+
+    def test_query_count_does_not_grow_with_termine(self, django_assert_num_queries):
+        from core.admin import SchulungsTerminAdmin
+
+        # The admin's own queryset, with its annotations
+        queryset = SchulungsTerminAdmin(SchulungsTermin, admin.site).get_queryset(
+            RequestFactory().get("/admin/")
+        )
+
+        with django_assert_num_queries(1):
+            content = b"".join(self.export(queryset).streaming_content)
+
+        assert content.decode("utf-8").count("Kehrtechnik") == 20
+
+    def test_asgi_request_streams_asynchronously(self):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory
+
+        from core.admin import export_schulungsteilnehmer_to_csv
+        from core.services.csv_export import aiter_csv
+
+        async def consume(iterator):
+            return [part async for part in iterator]
+
+        # Under ASGI Django would buffer a sync iterator completely
+        response = export_schulungsteilnehmer_to_csv(
+            None, AsyncRequestFactory().get("/admin/"), SchulungsTermin.objects.all()
+        )
+        assert response.is_async
+        parts = async_to_sync(consume)(response)
+        rows = list(csv.reader(b"".join(parts).decode("utf-8").splitlines()))
+        assert len(rows) == 21
+        assert rows[1][0] == "Kehrtechnik"
+
+        chunks = async_to_sync(consume)(aiter_csv(["a"], ([i] for i in range(5)), 2))
+        assert chunks == ["a\r\n0\r\n", "1\r\n2\r\n", "3\r\n4\r\n"]
+
+
 @pytest.mark.django_db
 class TestCheckoutForUsersWithoutBetrieb:
     """
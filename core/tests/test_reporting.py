@@ -0,0 +1,296 @@
+import csv
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, Client
+from django.urls import reverse
+
+from core.models import (
+    Bestellung,
+    Betrieb,
+    Funktion,
+    Organisation,
+    Person,
+    Schulung,
+    SchulungsTeilnehmer,
+    SchulungsTermin,
+)
+from core.services.reporting import (
+    REPORTS,
+    FormatNotAvailable,
+    report_response,
+    write_report,
+)
+
+
+@pytest.fixture
+def without_library(monkeypatch):
+    """Makes importing the given libraries fail as if not installed."""
+
+    def uninstall(*names):
+        for name in names:
+            monkeypatch.setitem(sys.modules, name, None)
+
+    return uninstall
+
+
+def csv_rows(data):
+    return list(csv.reader(data.decode("utf-8").splitlines()))
+
+
+@pytest.mark.django_db
+class TestReports:
+    def setup_method(self):
+        self.kehrtechnik = Schulung.objects.create(name="Kehrtechnik", beschreibung="")
+        self.brandschutz = Schulung.objects.create(name="Brandschutz", beschreibung="")
+        self.termin_maerz = SchulungsTermin.objects.create(
+            datum_von=datetime(2026, 3, 2, 9, 0),
+            datum_bis=datetime(2026, 3, 2, 17, 0),
+            schulung=self.kehrtechnik,
+        )
+        self.termin_april = SchulungsTermin.objects.create(
+            datum_von=datetime(2026, 4, 30, 9, 0),
+            datum_bis=datetime(2026, 4, 30, 17, 0),
+            schulung=self.kehrtechnik,
+        )
+        self.termin_mai = SchulungsTermin.objects.create(
+            datum_von=datetime(2026, 5, 4, 9, 0),
+            datum_bis=datetime(2026, 5, 4, 17, 0),
+            schulung=self.brandschutz,
+        )
+        betrieb = Betrieb.objects.create(name="Betrieb A")
+        meister = Funktion.objects.create(name="Meister")
+        innung = Organisation.objects.create(name="Innung")
+        self.personen = [
+            Person.objects.create(
+                vorname=f"V{i}",
+                nachname="N",
+                email=f"p{i}@example.com",
+                betrieb=betrieb if i < 2 else None,
+                funktion=meister if i < 3 else None,
+                organisation=innung if i < 2 else None,
+            )
+            for i in range(4)
+        ]
+        for termin, status in [
+            (self.termin_maerz, ["Teilgenommen", "Teilgenommen", "Entschuldigt"]),
+            (self.termin_april, ["Teilgenommen", "Unentschuldigt"]),
+            (self.termin_mai, ["Angemeldet", "Angemeldet"]),
+        ]:
+            for person, person_status in zip(self.personen, status, strict=False):
+                SchulungsTeilnehmer.objects.create(
+                    schulungstermin=termin,
+                    person=person,
+                    vorname=person.vorname,
+                    nachname=person.nachname,
+                    status=person_status,
+                )
+        for person, termin, anzahl, status in [
+            (self.personen[0], self.termin_maerz, 2, "Bestellt"),
+            (self.personen[1], self.termin_april, 1, "Bestellt"),
+            (self.personen[1], self.termin_mai, 3, "Storniert"),
+            (self.personen[3], self.termin_mai, 1, "Bestellt"),
+        ]:
+            Bestellung.objects.create(
+                person=person,
+                schulungstermin=termin,
+                anzahl=anzahl,
+                einzelpreis=Decimal("100.00"),
+                gesamtpreis=Decimal("100.00") * anzahl,
+                status=status,
+            )
+
+    def rows(self, name, **kwargs):
+        return list(REPORTS[name].rows(**kwargs))
+
+    def test_teilnehmer_pro_schulung(self):
+        assert self.rows("teilnehmer_pro_schulung") == [
+            ("Brandschutz", 1, 2, 0),
+            ("Kehrtechnik", 2, 5, 3),
+        ]
+
+    def test_teilnehmer_pro_betrieb_und_funktion(self):
+        assert self.rows("teilnehmer_pro_betrieb") == [
+            ("Betrieb A", 3, 6, 3),
+            ("Ohne Betrieb", 1, 1, 0),
+        ]
+        assert self.rows("teilnehmer_pro_funktion") == [
+            ("Meister", 3, 7, 3),
+        ]
+
+    def test_umsatz_pro_organisation_ohne_stornos(self):
+        assert self.rows("umsatz_pro_organisation") == [
+            ("Innung", 2, 3, Decimal("300.00")),
+            ("Ohne Organisation", 1, 1, Decimal("100.00")),
+        ]
+
+    def test_anwesenheit(self):
+        assert self.rows("anwesenheit") == [
+            ("Brandschutz", 2, 0, 0, 0, None),
+            ("Kehrtechnik", 0, 3, 1, 1, 60.0),
+        ]
+
+    def test_zeitraum_includes_the_last_day(self):
+        assert self.rows(
+            "teilnehmer_pro_schulung", von=date(2026, 4, 1), bis=date(2026, 4, 30)
+        ) == [("Kehrtechnik", 1, 2, 1)]
+
+    def test_every_report_is_one_query(self, django_assert_num_queries):
+        for report in REPORTS.values():
+            with django_assert_num_queries(1):
+                list(report.rows())
+
+    def test_csv(self):
+        output = BytesIO()
+        write_report(REPORTS["umsatz_pro_organisation"], "csv", output)
+        header, *rows = csv_rows(output.getvalue())
+        assert header == ["Organisation", "Bestellungen", "Plätze", "Umsatz"]
+        # SQLite drops the scale of the sum, compare the amounts as numbers
+        assert [row[:3] + [Decimal(row[3])] for row in rows] == [
+            ["Innung", "2", "3", Decimal("300")],
+            ["Ohne Organisation", "1", "1", Decimal("100")],
+        ]
+
+    def test_csv_response_is_streamed(self):
+        response = report_response(REPORTS["teilnehmer_pro_schulung"], "csv")
+
+        assert response.streaming
+        assert (
+            response["Content-Disposition"]
+            == 'attachment; filename="teilnehmer_pro_schulung.csv"'
+        )
+        assert csv_rows(b"".join(response.streaming_content))[1] == [
+            "Brandschutz",
+            "1",
+            "2",
+            "0",
+        ]
+
+    def test_csv_response_is_async_under_asgi(self):
+        response = report_response(
+            REPORTS["teilnehmer_pro_schulung"],
+            "csv",
+            request=AsyncRequestFactory().get("/"),
+        )
+
+        assert response.is_async
+
+    @pytest.mark.parametrize("format", ["xlsx", "parquet"])
+    def test_missing_library(self, format, without_library):
+        without_library("openpyxl", "pyarrow")
+        with pytest.raises(FormatNotAvailable):
+            write_report(REPORTS["anwesenheit"], format, BytesIO())
+
+    def test_xlsx(self):
+        openpyxl = pytest.importorskip("openpyxl")
+        output = BytesIO()
+        write_report(REPORTS["umsatz_pro_organisation"], "xlsx", output)
+
+        output.seek(0)
+        sheet = openpyxl.load_workbook(output).active
+        assert [list(row) for row in sheet.iter_rows(values_only=True)] == [
+            ["Organisation", "Bestellungen", "Plätze", "Umsatz"],
+            ["Innung", 2, 3, 300],
+            ["Ohne Organisation", 1, 1, 100],
+        ]
+
+    def test_parquet(self):
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+
+        output = BytesIO()
+        write_report(REPORTS["anwesenheit"], "parquet", output)
+
+        output.seek(0)
+        table = pq.read_table(output)
+        assert table.column_names == REPORTS["anwesenheit"].headers
+        assert table.column("Anwesenheitsquote %").to_pylist() == [None, 60.0]
+
+
+@pytest.mark.django_db
+class TestExportReportCommand:
+    def test_writes_file(self, tmp_path):
+        Schulung.objects.create(name="Kehrtechnik", beschreibung="")
+        output = tmp_path / "schulungen.csv"
+        stdout = StringIO()
+
+        call_command(
+            "export_report",
+            "teilnehmer_pro_schulung",
+            "--von",
+            "2026-01-01",
+            "-o",
+            str(output),
+            stdout=stdout,
+        )
+
+        assert csv_rows(output.read_bytes()) == [
+            ["Schulung", "Termine", "Teilnehmer", "Teilgenommen"]
+        ]
+        assert "Teilnehmer pro Schulung geschrieben" in stdout.getvalue()
+
+    def test_missing_library_writes_no_file(self, tmp_path, without_library):
+        without_library("pyarrow")
+        output = tmp_path / "anwesenheit.parquet"
+
+        with pytest.raises(CommandError, match="pyarrow"):
+            call_command(
+                "export_report", "anwesenheit", "--format", "parquet", "-o", output
+            )
+        assert not output.exists()
+
+
+@pytest.mark.django_db
+class TestReportsAdminView:
+    def setup_method(self):
+        self.client = Client()
+        self.url = reverse("reports")
+
+    def test_requires_staff(self):
+        user = User.objects.create_user("user", "user@example.com", "pw")
+        self.client.force_login(user)
+
+        response = self.client.get(self.url)
+
+        assert response.status_code == 302
+        assert "/admin/login/" in response["Location"]
+
+    def test_form_and_download(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin_user)
+
+        response = self.client.get(self.url)
+        assert response.status_code == 200
+        assert b"Umsatz pro Organisation" in response.content
+
+        response = self.client.get(
+            self.url,
+            {"report": "anwesenheit", "format": "csv", "von": "2026-01-01"},
+        )
+        assert response.status_code == 200
+        assert (
+            response["Content-Disposition"]
+            == 'attachment; filename="anwesenheit_von_2026-01-01.csv"'
+        )
+
+    def test_invalid_zeitraum(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin_user)
+
+        response = self.client.get(
+            self.url,
+            {
+                "report": "anwesenheit",
+                "format": "csv",
+                "von": "2026-02-01",
+                "bis": "2026-01-01",
+            },
+        )
+
+        assert response.status_code == 200
+        assert "Das Ende liegt vor dem Beginn." in response.content.decode()
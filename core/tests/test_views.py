@@ -1,4 +1,4 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
@@ -140,6 +140,582 @@ class TestIndexView:
         assert "Buchung nicht erlaubt" in content
         assert f"/checkout/{termin.id}/" not in content
 
+    def _create_termine(self, count, betrieb):
+        funktion = Funktion.objects.create(name="Geselle")
+        for i in range(count):
+            schulung = Schulung.objects.create(
+                name=f"Training {i}",
+                beschreibung="Test",
+                preis_standard=Decimal("100.00"),
+            )
+            schulung.suitable_for_funktionen.add(funktion)
+            termin = SchulungsTermin.objects.create(
+                datum_von=timezone.now() + timedelta(days=7 + i),
+                datum_bis=timezone.now() + timedelta(days=7 + i, hours=4),
+                schulung=schulung,
+                ort=SchulungsOrt.objects.create(name=f"Ort {i}"),
+                buchbar=True,
+                max_teilnehmer=10,
+            )
+            teilnehmer = Person.objects.create(
+                vorname="Teil", nachname=f"Nehmer{i}", betrieb=betrieb
+            )
+            SchulungsTeilnehmer.objects.create(
+                schulungstermin=termin, person=teilnehmer
+            )
+
+    def _count_index_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("index"))
+        assert response.status_code == 200
+        return len(queries)
+
+    def test_index_query_count_independent_of_termine(self):
+        user = User.objects.create_user(username="testuser", password="testpass")
+        betrieb = Betrieb.objects.create(name="Test Betrieb")
+        person = Person.objects.create(
+            benutzer=user,
+            vorname="Test",
+            nachname="User",
+            betrieb=betrieb,
+            is_activated=True,
+        )
+        betrieb.geschaeftsfuehrer = person
+        betrieb.save()
+        self.client.login(username="testuser", password="testpass")
+
+        self._create_termine(2, betrieb)
+        few = self._count_index_queries()
+        self._create_termine(8, betrieb)
+        many = self._count_index_queries()
+
+        assert few == many
+
+    def test_index_shows_betrieb_angemeldet(self):
+        user = User.objects.create_user(username="testuser", password="testpass")
+        betrieb = Betrieb.objects.create(name="Test Betrieb")
+        Person.objects.create(
+            benutzer=user,
+            vorname="Test",
+            nachname="User",
+            betrieb=betrieb,
+            is_activated=True,
+        )
+        self._create_termine(1, betrieb)
+        self.client.login(username="testuser", password="testpass")
+
+        response = self.client.get(reverse("index"))
+
+        termin = response.context["schulungstermine"][0]
+        assert termin.betrieb_angemeldet is True
+        assert termin.teilnehmer_count == 1
+        assert termin.freie_plaetze == 9
+        assert "Ihr Betrieb ist angemeldet" in response.content.decode()
+
+
+@pytest.mark.django_db
+class TestIndexFilterAndPagination:
+    def setup_method(self):
+        self.client = Client()
+        self.art = SchulungsArt.objects.create(name="Grundkurs")
+        self.ort = SchulungsOrt.objects.create(name="Eisenstadt")
+        self.schulung = Schulung.objects.create(
+            name="Kehrtechnik", preis_standard=Decimal("100.00"), art=self.art
+        )
+
+    def create_termin(self, days, schulung=None, **kwargs):
+        kwargs.setdefault("buchbar", True)
+        return SchulungsTermin.objects.create(
+            datum_von=timezone.now() + timedelta(days=days),
+            datum_bis=timezone.now() + timedelta(days=days, hours=4),
+            schulung=schulung or self.schulung,
+            max_teilnehmer=10,
+            **kwargs,
+        )
+
+    def get_termine(self, **params):
+        response = self.client.get(reverse("index"), params)
+        assert response.status_code == 200
+        return response.context["schulungstermine"]
+
+    def test_not_bookable_termine_are_not_loaded(self):
+        bookable = self.create_termin(7)
+        self.create_termin(8, buchbar=False)
+        assert self.get_termine() == [bookable]
+
+    def test_filter_by_art_and_ort(self):
+        other_schulung = Schulung.objects.create(
+            name="Messtechnik",
+            preis_standard=Decimal("100.00"),
+            art=SchulungsArt.objects.create(name="Aufbaukurs"),
+        )
+        in_eisenstadt = self.create_termin(7, ort=self.ort)
+        other_art = self.create_termin(8, schulung=other_schulung, ort=self.ort)
+        elsewhere = self.create_termin(9)
+
+        assert self.get_termine(art=self.art.pk) == [in_eisenstadt, elsewhere]
+        assert self.get_termine(ort=self.ort.pk) == [in_eisenstadt, other_art]
+        assert self.get_termine(art=self.art.pk, ort=self.ort.pk) == [in_eisenstadt]
+
+    def test_filter_by_month(self):
+        termin = self.create_termin(40)
+        self.create_termin(100)
+        monat = termin.datum_von.strftime("%Y-%m")
+        assert self.get_termine(monat=monat) == [termin]
+
+    def test_filter_by_month_includes_the_last_day(self):
+        last_day = SchulungsTermin.objects.create(
+            datum_von=datetime(2099, 1, 31, 23, 0),
+            datum_bis=datetime(2099, 1, 31, 23, 30),
+            schulung=self.schulung,
+            max_teilnehmer=10,
+        )
+        SchulungsTermin.objects.create(
+            datum_von=datetime(2099, 2, 1, 0, 0),
+            datum_bis=datetime(2099, 2, 1, 4, 0),
+            schulung=self.schulung,
+            max_teilnehmer=10,
+        )
+        assert self.get_termine(monat="2099-01") == [last_day]
+
+    def test_invalid_filter_is_ignored(self):
+        termin = self.create_termin(7)
+        assert self.get_termine(monat="kein-monat", art="abc") == [termin]
+
+    def test_filter_by_suitability_for_funktion(self):
+        meister = Funktion.objects.create(name="Meister")
+        geselle = Funktion.objects.create(name="Geselle")
+        user = User.objects.create_user(username="testuser", password="testpass")
+        Person.objects.create(
+            benutzer=user,
+            vorname="Test",
+            nachname="User",
+            funktion=meister,
+            is_activated=True,
+        )
+        nur_geselle = Schulung.objects.create(
+            name="Gesellenkurs", preis_standard=Decimal("100.00")
+        )
+        nur_geselle.suitable_for_funktionen.add(geselle)
+        fuer_meister = Schulung.objects.create(
+            name="Meisterkurs", preis_standard=Decimal("100.00")
+        )
+        fuer_meister.suitable_for_funktionen.add(meister, geselle)
+        offen = self.create_termin(7)
+        self.create_termin(8, schulung=nur_geselle)
+        meister_termin = self.create_termin(9, schulung=fuer_meister)
+
+        self.client.login(username="testuser", password="testpass")
+        assert len(self.get_termine()) == 3
+        assert self.get_termine(passend="on") == [offen, meister_termin]
+
+    def test_keyset_pagination(self, monkeypatch):
+        monkeypatch.setattr("core.views.views.INDEX_PAGE_SIZE", 3)
+        termine = [self.create_termin(7 + i, ort=self.ort) for i in range(5)]
+        # Same start as the third Termin, ordered after it by id
+        termine.insert(3, self.create_termin(9, ort=self.ort))
+        SchulungsTermin.objects.filter(pk=termine[3].pk).update(
+            datum_von=termine[2].datum_von
+        )
+
+        response = self.client.get(reverse("index"), {"ort": self.ort.pk})
+        assert response.context["schulungstermine"] == termine[:3]
+        next_query = response.context["next_query"]
+        assert f"ort={self.ort.pk}" in next_query
+        assert response.context["first_query"] is None
+
+        response = self.client.get(reverse("index") + "?" + next_query)
+        assert [t.pk for t in response.context["schulungstermine"]] == [
+            t.pk for t in termine[3:]
+        ]
+        assert response.context["next_query"] is None
+        assert response.context["first_query"] == f"ort={self.ort.pk}"
+
+    def test_broken_cursor_shows_first_page(self):
+        termin = self.create_termin(7)
+        assert self.get_termine(nach="kaputt") == [termin]
+
+
+@pytest.mark.django_db
+class TestIndexCardCache:
+    """The static card body is cached, the footer is rendered per request."""
+
+    def setup_method(self):
+        self.client = Client()
+        self.schulung = Schulung.objects.create(
+            name="Kehrtechnik",
+            beschreibung="Grundkurs",
+            preis_standard=Decimal("100.00"),
+        )
+        self.ort = SchulungsOrt.objects.create(name="Wien")
+        self.termin = SchulungsTermin.objects.create(
+            datum_von=timezone.now() + timedelta(days=7),
+            datum_bis=timezone.now() + timedelta(days=7, hours=4),
+            schulung=self.schulung,
+            ort=self.ort,
+            buchbar=True,
+            max_teilnehmer=10,
+        )
+
+    def get_index(self):
+        return self.client.get(reverse("index")).content.decode()
+
+    def test_card_body_is_served_from_cache(self):
+        assert "Kehrtechnik" in self.get_index()
+
+        # update() sends no signal and keeps the timestamps: cached card
+        Schulung.objects.filter(pk=self.schulung.pk).update(name="Geändert")
+        assert "Kehrtechnik" in self.get_index()
+
+    def test_footer_is_not_cached(self):
+        assert "10 Freie Plätze" in self.get_index()
+
+        self.termin.adjust_belegte_plaetze(3)
+        assert "7 Freie Plätze" in self.get_index()
+
+    def test_schulung_save_invalidates_card(self):
+        self.get_index()
+        self.schulung.name = "Messtechnik"
+        self.schulung.save()
+        assert "Messtechnik" in self.get_index()
+
+    def test_ort_save_invalidates_card(self):
+        self.get_index()
+        self.ort.name = "Graz"
+        self.ort.save()
+        assert "Graz" in self.get_index()
+
+    def test_termin_save_invalidates_card(self):
+        self.get_index()
+        self.termin.dauer = "2 Tage"
+        self.termin.save()
+        assert "Dauer: 2 Tage" in self.get_index()
+
+    def test_funktionen_change_invalidates_card(self):
+        assert "Nur für folgende Funktionen" not in self.get_index()
+
+        funktion = Funktion.objects.create(name="Meister")
+        self.schulung.suitable_for_funktionen.add(funktion)
+        assert "Meister" in self.get_index()
+
+        Funktion.objects.filter(pk=funktion.pk).update(name="Geselle")
+        funktion.refresh_from_db()
+        funktion.save()
+        assert "Geselle" in self.get_index()
+
+
+@pytest.mark.django_db
+class TestAnonymousIndexCache:
+    """Conditional GET and short-lived response cache for anonymous visitors."""
+
+    @pytest.fixture(autouse=True)
+    def index_cache(self, settings):
+        settings.INDEX_CACHE_TIMEOUT = 30
+
+    def setup_method(self):
+        self.client = Client()
+        self.schulung = Schulung.objects.create(
+            name="Kehrtechnik",
+            beschreibung="Grundkurs",
+            preis_standard=Decimal("100.00"),
+        )
+        self.termin = SchulungsTermin.objects.create(
+            datum_von=timezone.now() + timedelta(days=7),
+            datum_bis=timezone.now() + timedelta(days=7, hours=4),
+            schulung=self.schulung,
+            buchbar=True,
+            max_teilnehmer=10,
+        )
+
+    def test_validators_and_not_modified(self):
+        response = self.client.get(reverse("index"))
+        assert response.status_code == 200
+        assert response["ETag"]
+        assert response["Last-Modified"]
+        assert "Cookie" in response["Vary"]
+
+        response = self.client.get(
+            reverse("index"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        assert response.status_code == 304
+
+    def test_repeat_hits_do_not_query_the_database(self, django_assert_num_queries):
+        first = self.client.get(reverse("index"))
+
+        with django_assert_num_queries(0):
+            response = self.client.get(reverse("index"))
+            not_modified = self.client.get(
+                reverse("index"), HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+        assert response.content == first.content
+        assert not_modified.status_code == 304
+
+    def test_booking_changes_etag(self, django_capture_on_commit_callbacks):
+        etag = self.client.get(reverse("index"))["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self.termin.adjust_belegte_plaetze(2)
+        response = self.client.get(reverse("index"), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+        assert "8 Freie Plätze" in response.content.decode()
+
+    def test_schulung_change_changes_etag(self):
+        etag = self.client.get(reverse("index"))["ETag"]
+
+        self.schulung.name = "Messtechnik"
+        self.schulung.save()
+        response = self.client.get(reverse("index"), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert "Messtechnik" in response.content.decode()
+
+    def test_authenticated_users_are_not_cached(self):
+        user = User.objects.create_user(username="testuser", password="testpass")
+        Person.objects.create(
+            benutzer=user, vorname="Test", nachname="User", is_activated=True
+        )
+        etag = self.client.get(reverse("index"))["ETag"]
+
+        self.client.login(username="testuser", password="testpass")
+        response = self.client.get(reverse("index"), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert not response.has_header("ETag")
+        assert "Servus testuser" in response.content.decode()
+
+
+@pytest.mark.django_db
+class TestTermineAvailabilityAPI:
+    def setup_method(self):
+        self.client = Client()
+        self.url = reverse("termine_availability")
+        schulung = Schulung.objects.create(
+            name="Kehrtechnik", preis_standard=Decimal("100.00")
+        )
+        self.termin = SchulungsTermin.objects.create(
+            datum_von=timezone.now() + timedelta(days=7),
+            datum_bis=timezone.now() + timedelta(days=7, hours=4),
+            schulung=schulung,
+            buchbar=True,
+            max_teilnehmer=10,
+        )
+        # Neither listed: not bookable, in the past
+        SchulungsTermin.objects.create(
+            datum_von=timezone.now() + timedelta(days=8),
+            datum_bis=timezone.now() + timedelta(days=8, hours=4),
+            schulung=schulung,
+            buchbar=False,
+            max_teilnehmer=10,
+        )
+        SchulungsTermin.objects.create(
+            datum_von=timezone.now() - timedelta(days=8),
+            datum_bis=timezone.now() - timedelta(days=8),
+            schulung=schulung,
+            buchbar=True,
+            max_teilnehmer=10,
+        )
+
+    def test_lists_bookable_upcoming_termine_in_one_query(
+        self, django_assert_num_queries
+    ):
+        self.termin.adjust_belegte_plaetze(4)
+
+        with django_assert_num_queries(1):
+            response = self.client.get(self.url)
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert "public" in response["Cache-Control"]
+        assert response.json() == {
+            "termine": [
+                {
+                    "id": self.termin.id,
+                    "max_teilnehmer": 10,
+                    "belegte_plaetze": 4,
+                    "freie_plaetze": 6,
+                }
+            ]
+        }
+
+    def test_if_none_match_without_database(self, django_assert_num_queries):
+        etag = self.client.get(self.url)["ETag"]
+
+        with django_assert_num_queries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+    def test_seat_changes_are_visible_after_commit(
+        self, django_capture_on_commit_callbacks
+    ):
+        etag = self.client.get(self.url)["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            self.termin.adjust_belegte_plaetze(10)
+        # Until the booking commits, others still see the committed count
+        assert self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        for callback in callbacks:
+            callback()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()["termine"][0]["freie_plaetze"] == 0
+
+    def test_termin_changes_are_visible_immediately(self):
+        self.client.get(self.url)
+
+        self.termin.max_teilnehmer = 20
+        self.termin.save()
+        response = self.client.get(self.url)
+        assert response.json()["termine"][0]["freie_plaetze"] == 20
+
+    def test_read_only(self):
+        assert self.client.post(self.url).status_code == 405
+
+
+@pytest.mark.django_db
+class TestHealthCheck:
+    def setup_method(self):
+        self.client = Client()
+        self.url = reverse("health")
+
+    def test_healthy(self):
+        response = self.client.get(self.url)
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok", "database": "ok", "cache": "ok"}
+        assert "no-cache" in response["Cache-Control"]
+
+    def test_database_down(self):
+        from django.db import OperationalError
+
+        with patch(
+            "core.views.api_views.connection.cursor",
+            side_effect=OperationalError("connection refused"),
+        ):
+            response = self.client.get(self.url)
+
+        assert response.status_code == 503
+        assert response.json()["database"] == "error"
+        assert response.json()["cache"] == "ok"
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBenchmarkDbConnections:
+    def test_reports_modes_and_restores_settings(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+        from django.db import connection
+
+        settings_dict = dict(connection.settings_dict)
+        out = StringIO()
+        call_command("benchmark_db_connections", requests=3, stdout=out)
+
+        output = out.getvalue()
+        assert "ohne Persistenz (CONN_MAX_AGE=0)" in output
+        assert "persistent (CONN_MAX_AGE=60)" in output
+        assert "Pool übersprungen" in output
+        assert connection.settings_dict == settings_dict
+
+
+@pytest.mark.django_db
+class TestTeilnehmerlistePdf:
+    def setup_method(self):
+        schulung = Schulung.objects.create(name="Kehrtechnik", beschreibung="")
+        betrieb = Betrieb.objects.create(name="Betrieb A")
+        self.termine = []
+        for i in range(3):
+            termin = SchulungsTermin.objects.create(
+                schulung=schulung,
+                datum_von=timezone.now() + timedelta(days=10 - i),
+                datum_bis=timezone.now() + timedelta(days=10 - i, hours=8),
+            )
+            self.termine.append(termin)
+            for k in range(5):
+                person = Person.objects.create(
+                    vorname=f"V{i}{k}", nachname="N", betrieb=betrieb
+                )
+                SchulungsTeilnehmer.objects.create(
+                    schulungstermin=termin,
+                    person=person,
+                    vorname=person.vorname,
+                    nachname=person.nachname,
+                )
+            SchulungsTeilnehmer.objects.create(
+                schulungstermin=termin, vorname="Extern", nachname="E"
+            )
+
+    def pages(self, content):
+        import re
+
+        return len(re.findall(rb"/Type /Page\b(?!s)", content))
+
+    def test_view_queries_do_not_grow_with_participants(
+        self, django_assert_num_queries
+    ):
+        # Termin with Schulung, then the participants with Person and Betrieb
+        with django_assert_num_queries(2):
+            response = Client().get(
+                reverse("export_teilnehmer_pdf", args=(self.termine[0].pk,))
+            )
+            content = b"".join(response.streaming_content)
+
+        assert response["Content-Type"] == "application/pdf"
+        assert (
+            response["Content-Disposition"]
+            == f'attachment; filename="teilnehmerliste_{self.termine[0].pk}.pdf"'
+        )
+        assert content.startswith(b"%PDF")
+        assert self.pages(content) == 1
+
+    def test_rows(self):
+        from core.services.teilnehmerliste import (
+            teilnehmerliste_row,
+            teilnehmerliste_teilnehmer,
+        )
+
+        rows = [
+            teilnehmerliste_row(t)
+            for t in teilnehmerliste_teilnehmer([self.termine[0]])
+        ]
+        assert rows[0] == ["V00 N", "Betrieb A", "", "", "", "Nein"]
+        assert rows[-1] == ["Extern E", "", "", "", "", ""]
+
+    def test_batch_has_a_page_per_termin(self):
+        from core.admin import export_teilnehmerliste_pdf
+
+        response = export_teilnehmerliste_pdf(None, None, SchulungsTermin.objects.all())
+
+        assert self.pages(b"".join(response.streaming_content)) == 3
+
+    def test_sample_stylesheet_is_not_changed(self):
+        from reportlab.lib.styles import getSampleStyleSheet
+
+        from core.services.teilnehmerliste import build_teilnehmerliste, get_styles
+
+        build_teilnehmerliste(SchulungsTermin.objects.select_related("schulung"))
+
+        assert get_styles()["footnote"].fontSize == 8
+        assert getSampleStyleSheet()["Normal"].fontSize == 10
+        assert getSampleStyleSheet()["Heading2"].alignment == 0
+
+    def test_benchmark_command(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("benchmark_teilnehmerliste", teilnehmer=5, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        assert "Vorher (pro Zeile)" in output
+        assert "select_related" in output
+        # Generated data is rolled back
+        assert Person.objects.count() == 15
+
 
 @pytest.mark.django_db
 class TestRegisterView:
@@ -308,6 +884,14 @@ class TestCheckoutView:
         # Individual user should have name prepopulated
         assert response.context["invoice_data"]["name"] == "Test User"
 
+    def test_checkout_checks_availability_before_submit(self):
+        self.client.login(username="testuser", password="testpass")
+
+        response = self.client.get(reverse("checkout", args=[self.termin.id]))
+        content = response.content.decode()
+        assert reverse("termine_availability") in content
+        assert "checkAvailability()" in content
+
     def test_checkout_view_without_organisation(self):
         self.person.organisation = None
         self.person.save()
@@ -500,6 +1084,84 @@ class TestConfirmOrderView:
         assert response.status_code == 400
         assert "bereits für diese Schulung angemeldet" in response.json()["message"]
 
+    def test_confirm_order_rejects_same_person_twice(self):
+        self.client.login(username="testuser", password="testpass")
+        person = Person.objects.create(
+            vorname="Doppelt",
+            nachname="Gebucht",
+            betrieb=Betrieb.objects.create(name="Test"),
+        )
+
+        response = self.client.post(
+            reverse("confirm_order"),
+            {
+                "schulungstermin_id": self.termin.id,
+                "quantity": "2",
+                "person-0": str(person.id),
+                "meal-0": "Standard",
+                "person-1": str(person.id),
+                "meal-1": "Standard",
+            },
+        )
+
+        # The unique constraint rejects the second row, nothing is saved
+        assert response.status_code == 409
+        assert "bereits für diese Schulung angemeldet" in response.json()["message"]
+        assert not Bestellung.objects.exists()
+        self.termin.refresh_from_db()
+        assert self.termin.belegte_plaetze == 0
+
+    def _post_related_persons(self, persons):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        data = {"schulungstermin_id": self.termin.id, "quantity": str(len(persons))}
+        for i, p in enumerate(persons):
+            data[f"person-{i}"] = str(p.id)
+            data[f"meal-{i}"] = "Standard"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("confirm_order"), data)
+        assert response.status_code == 200
+        return len(queries)
+
+    @patch("core.views.checkout_view.send_order_confirmation_email")
+    def test_confirm_order_query_count_independent_of_participants(
+        self, mock_send_email
+    ):
+        persons = [
+            Person.objects.create(
+                vorname=f"Mit{i}", nachname="Arbeiter", betrieb=self.betrieb
+            )
+            for i in range(17)
+        ]
+        self.client.login(username="testuser", password="testpass")
+
+        few = self._post_related_persons(persons[:2])
+        many = self._post_related_persons(persons[2:])
+
+        assert few == many
+        self.termin.refresh_from_db()
+        assert self.termin.belegte_plaetze == 17
+        teilnehmer = SchulungsTeilnehmer.objects.filter(schulungstermin=self.termin)
+        assert teilnehmer.count() == 17
+
+    def test_confirm_order_unknown_person(self):
+        self.client.login(username="testuser", password="testpass")
+
+        response = self.client.post(
+            reverse("confirm_order"),
+            {
+                "schulungstermin_id": self.termin.id,
+                "quantity": "1",
+                "person-0": "999999",
+                "meal-0": "Standard",
+            },
+        )
+
+        assert response.status_code == 400
+        assert "nicht gefunden" in response.json()["message"]
+        assert not Bestellung.objects.exists()
+
     def test_confirm_order_blocked_without_booking_permission(self):
         self.person.can_book_schulungen = False
         self.person.save()
@@ -746,8 +1408,13 @@ class TestMySchulungenView:
         )
 
         # Create non-completed participation (should not appear)
+        other_termin = SchulungsTermin.objects.create(
+            datum_von=timezone.now() - timedelta(days=10),
+            datum_bis=timezone.now() - timedelta(days=9),
+            schulung=schulung,
+        )
         SchulungsTeilnehmer.objects.create(
-            schulungstermin=termin, person=self.person, status="Angemeldet"
+            schulungstermin=other_termin, person=self.person, status="Angemeldet"
         )
 
         response = self.client.get(reverse("my_schulungen"))
@@ -815,6 +1482,172 @@ class TestDocumentsView:
         assert restricted_doc not in documents
 
 
+@pytest.mark.django_db
+class TestPersonLookupPerRequest:
+    """The Person of the logged-in user is loaded once per request."""
+
+    def setup_method(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.person = Person.objects.create(
+            benutzer=self.user,
+            vorname="Test",
+            nachname="User",
+            funktion=Funktion.objects.create(name="Meister"),
+            organisation=Organisation.objects.create(name="Org"),
+            is_activated=True,
+            can_book_schulungen=True,
+        )
+        self.termin = SchulungsTermin.objects.create(
+            datum_von=timezone.now() + timedelta(days=7),
+            datum_bis=timezone.now() + timedelta(days=7, hours=4),
+            schulung=Schulung.objects.create(
+                name="Test Schulung",
+                beschreibung="Test",
+                preis_standard=Decimal("150.00"),
+            ),
+        )
+        self.client.login(username="testuser", password="testpass")
+
+    def _person_lookups(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        assert response.status_code == 200
+        return [
+            query["sql"]
+            for query in queries
+            if '"core_person"."benutzer_id" =' in query["sql"]
+        ]
+
+    @pytest.mark.parametrize("url_name", ["index", "my_schulungen", "documents"])
+    def test_person_loaded_once(self, url_name):
+        lookups = self._person_lookups(reverse(url_name))
+
+        assert len(lookups) == 1
+        # betrieb, organisation and funktion come with the same query
+        assert "core_organisation" in lookups[0]
+        assert "core_funktion" in lookups[0]
+
+    def test_checkout_loads_person_once(self):
+        lookups = self._person_lookups(reverse("checkout", args=[self.termin.id]))
+
+        assert len(lookups) == 1
+
+    def test_get_request_person_caches_on_request(self):
+        from django.contrib.auth.models import AnonymousUser
+        from django.db import connection
+        from django.test import RequestFactory
+        from django.test.utils import CaptureQueriesContext
+
+        from core.utils import get_request_person
+
+        request = RequestFactory().get("/")
+        request.user = self.user
+        assert get_request_person(request) == self.person
+        # Repeated calls are served from the request
+        with CaptureQueriesContext(connection) as queries:
+            get_request_person(request)
+        assert len(queries) == 0
+
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        assert get_request_person(request) is None
+
+
+@pytest.mark.django_db
+class TestPersonCache:
+    """The Person is cached between requests and dropped when it changes."""
+
+    @pytest.fixture(autouse=True)
+    def person_cache(self, settings):
+        settings.PERSON_CACHE_TIMEOUT = 60
+
+    def setup_method(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.person = Person.objects.create(
+            benutzer=self.user,
+            vorname="Test",
+            nachname="User",
+            is_activated=True,
+        )
+        self.client.login(username="testuser", password="testpass")
+
+    def _person_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [q for q in queries if '"core_person"' in q["sql"]]
+
+    def test_second_request_skips_person_table(self):
+        self._person_queries(reverse("documents"))
+
+        response, queries = self._person_queries(reverse("documents"))
+
+        assert response.status_code == 200
+        assert queries == []
+
+    def test_deactivate_action_invalidates_cache(self):
+        from django.contrib.admin.sites import AdminSite
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from django.test import RequestFactory
+
+        from core.admin import PersonAdmin, deactivate_users
+
+        assert self.client.get(reverse("documents")).status_code == 200
+
+        request = RequestFactory().post("/admin/")
+        request.user = User.objects.create_superuser(username="admin")
+        request.session = "session"
+        request._messages = FallbackStorage(request)
+        deactivate_users(
+            PersonAdmin(Person, AdminSite()),
+            request,
+            Person.objects.filter(pk=self.person.pk),
+        )
+
+        response = self.client.get(reverse("documents"))
+        # The deactivated User is logged out, not served from the cache
+        assert response.status_code == 302
+
+    def test_person_save_invalidates_cache(self):
+        self.client.get(reverse("documents"))
+
+        self.person.is_activated = False
+        self.person.save()
+
+        response = self.client.get(reverse("documents"))
+        assert response.status_code == 302
+        assert response.url == reverse("activation_pending")
+
+    def _cached_person(self):
+        from django.test import RequestFactory
+
+        from core.utils import get_request_person
+
+        request = RequestFactory().get("/")
+        request.user = self.user
+        return get_request_person(request)
+
+    def test_organisation_changes_invalidate_cache(self):
+        organisation = Organisation.objects.create(name="Innung")
+        self.person.organisation = organisation
+        self.person.save()
+        assert not self._cached_person().organisation.preisrabatt
+
+        organisation.preisrabatt = True
+        organisation.save()
+        assert self._cached_person().organisation.preisrabatt
+
+        organisation.delete()
+        assert self._cached_person().organisation is None
+
+
 @pytest.mark.django_db
 class TestLogoutView:
     def setup_method(self):
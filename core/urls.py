@@ -1,6 +1,13 @@
 from django.urls import include, path
 
-from .views import auth_views, checkout_view, orders_view, views
+from .views import (
+    api_views,
+    auth_views,
+    checkout_view,
+    orders_view,
+    report_views,
+    views,
+)
 
 urlpatterns = [
     path("", views.index, name="index"),
@@ -31,6 +38,11 @@ urlpatterns = [
     ),
     path("accounts/", include("django.contrib.auth.urls")),
     path("send-reminder/<int:pk>/", views.send_reminder, name="send_reminder"),
+    path(
+        "email-versand/<int:pk>/",
+        views.email_versand_status,
+        name="email_versand_status",
+    ),
     path(
         "meine_bestellungen/",
         orders_view.UserBestellungenListView.as_view(),
@@ -46,6 +58,18 @@ urlpatterns = [
         views.export_schulungsteilnehmer_pdf,
         name="export_teilnehmer_pdf",
     ),
+    path(
+        "schulungstermin/<int:pk>/teilnahmebestaetigungen/",
+        views.download_teilnahmebestaetigungen,
+        name="download_certificates_for_termin",
+    ),
+    path(
+        "api/termine/availability/",
+        api_views.termine_availability,
+        name="termine_availability",
+    ),
+    path("admin/auswertungen/", report_views.reports, name="reports"),
+    path("healthz/", api_views.health, name="health"),
     path("documents/", views.documents, name="documents"),
     path("meine-schulungen/", views.my_schulungen, name="my_schulungen"),
     path(
@@ -2,6 +2,11 @@
 Utility functions for the core application.
 """
 
+from django.conf import settings
+
+from core.cache import person_cache
+from core.models import Person
+
 
 def get_site_domain(request):
     """
@@ -21,3 +26,37 @@ def get_site_domain(request):
 
     # Fallback to default domain if no request available
     return "https://bildungsplattform.rauchfangkehrer.or.at"
+
+
+def get_request_person(request):
+    """
+    Get the Person of the logged-in user, loaded once per request.
+
+    Decorators, context processors and views all call this, so the lookup
+    (with betrieb, organisation and funktion) runs at most once per request,
+    the same way Django caches request.user. Between requests the Person is
+    kept in the cache for settings.PERSON_CACHE_TIMEOUT seconds; the signals
+    drop it when the Person (e.g. its activation) or its Betrieb changes.
+
+    Returns:
+        Person or None for anonymous users and users without Person
+    """
+    if not hasattr(request, "_cached_person"):
+        person = None
+        if request.user.is_authenticated:
+            person = person_cache.get_or_set(
+                request.user.pk,
+                lambda: Person.objects.select_related(
+                    "betrieb", "organisation", "funktion"
+                )
+                .filter(benutzer=request.user)
+                .first(),
+                timeout=getattr(settings, "PERSON_CACHE_TIMEOUT", 60),
+            )
+        request._cached_person = person
+    return request._cached_person
+
+
+def invalidate_person_cache(user_ids):
+    """Forget the cached Person of the given users."""
+    person_cache.delete_many([user_id for user_id in user_ids if user_id is not None])
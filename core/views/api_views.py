@@ -0,0 +1,63 @@
+import logging
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from core.services.availability import aget_termine_availability
+
+logger = logging.getLogger(__name__)
+
+# Seconds clients and proxies may reuse the availability without asking
+AVAILABILITY_MAX_AGE = 10
+
+
+@require_GET
+async def termine_availability(request):
+    """
+    Free seats of all bookable upcoming Termine as JSON, the same for every
+    visitor. Supports If-None-Match, polling clients get a 304 while nothing
+    changed. Async, so under ASGI polling never ties up a worker thread.
+    """
+    etag, content = await aget_termine_availability()
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type="application/json")
+    response.headers["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=AVAILABILITY_MAX_AGE)
+    return response
+
+
+@never_cache
+@require_GET
+def health(request):
+    """
+    Liveness/readiness probe: runs ``SELECT 1`` on the database (through the
+    persistent connection or the pool) and a round trip through the cache.
+    Answers 503 if one of them fails.
+    """
+    checks = {}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        checks["database"] = "ok"
+    except DatabaseError as e:
+        logger.error(f"Health check: database unavailable: {str(e)}")
+        checks["database"] = "error"
+    try:
+        cache.set("healthz", 1, 10)
+        checks["cache"] = "ok" if cache.get("healthz") == 1 else "error"
+    except Exception as e:
+        logger.error(f"Health check: cache unavailable: {str(e)}")
+        checks["cache"] = "error"
+
+    healthy = all(status == "ok" for status in checks.values())
+    return JsonResponse(
+        {"status": "ok" if healthy else "error", **checks},
+        status=200 if healthy else 503,
+    )
@@ -4,6 +4,7 @@ from django.shortcuts import redirect, render
 
 from ..forms import CombinedRegistrationForm
 from ..models import Person
+from ..utils import get_request_person
 
 
 def register(request):
@@ -67,14 +68,13 @@ def activation_pending(request):
     """
     Show activation pending message for users whose accounts are not yet activated.
     """
-    try:
-        person = Person.objects.get(benutzer=request.user)
-        if person.is_activated:
-            # User is already activated, redirect to home
-            return redirect("index")
-    except Person.DoesNotExist:
+    person = get_request_person(request)
+    if person is None:
         messages.error(request, "Kein Personenprofil gefunden.")
         return redirect("index")
+    if person.is_activated:
+        # User is already activated, redirect to home
+        return redirect("index")
 
     return render(
         request,
@@ -1,7 +1,7 @@
 import logging
 
 from django.contrib import messages
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.http import HttpRequest, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_POST
@@ -9,6 +9,7 @@ from django.views.decorators.http import require_POST
 from core.decorators import login_and_activation_required
 from core.models import Bestellung, Person, SchulungsTeilnehmer, SchulungsTermin
 from core.services.email import send_order_confirmation_email
+from core.utils import get_request_person
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +21,8 @@ def checkout(request: HttpRequest, schulungstermin_id: int):
     if not request.user.is_authenticated:
         return redirect("login")
 
-    try:
-        person = Person.objects.get(benutzer=request.user)
-    except Person.DoesNotExist:
+    person = get_request_person(request)
+    if person is None:
         messages.error(request, "Kein Personenprofil gefunden.")
         return redirect("index")
 
@@ -94,8 +94,8 @@ def confirm_order(request: HttpRequest):
             SchulungsTermin, id=data["schulungstermin_id"]
         )
 
-        # Fetch the person and validate permissions
-        person = get_object_or_404(Person, benutzer=request.user)
+        # The activation decorator guarantees the person, validate permissions
+        person = get_request_person(request)
 
         # Check if person has booking permission
         if not person.can_book_schulungen:
@@ -124,13 +124,17 @@ def confirm_order(request: HttpRequest):
             ).values_list("person_id", flat=True)
         )
 
+        # Resolve all related persons with a single query
+        related_persons = Person.objects.in_bulk(
+            [int(data[f"person-{i}"]) for i in range(anzahl) if f"person-{i}" in data]
+        )
+
         for i in range(anzahl):
             if f"person-{i}" in data:
                 # For related persons
                 person_id = data[f"person-{i}"]
-                try:
-                    participant_person = Person.objects.get(id=person_id)
-                except Person.DoesNotExist:
+                participant_person = related_persons.get(int(person_id))
+                if participant_person is None:
                     logger.error(f"Person with id {person_id} not found")
                     return JsonResponse(
                         {
@@ -188,6 +192,27 @@ def confirm_order(request: HttpRequest):
 
         # Wrap everything in an atomic transaction
         with transaction.atomic():
+            # Lock the Termin row so concurrent bookings are checked against
+            # the capacity one after another
+            schulungstermin = SchulungsTermin.objects.select_for_update().get(
+                pk=schulungstermin.pk
+            )
+            if anzahl > schulungstermin.freie_plaetze:
+                logger.warning(
+                    f"Not enough seats for schulungstermin {schulungstermin.id}: "
+                    f"requested {anzahl}, free {schulungstermin.freie_plaetze}"
+                )
+                return JsonResponse(
+                    {
+                        "status": "error",
+                        "message": (
+                            "Nicht genügend freie Plätze. "
+                            f"Verfügbar: {max(schulungstermin.freie_plaetze, 0)}."
+                        ),
+                    },
+                    status=409,
+                )
+
             # Create the Bestellung object
             einzelpreis = preis or 0
             bestellung = Bestellung.objects.create(
@@ -203,25 +228,33 @@ def confirm_order(request: HttpRequest):
                 rechnungsadresse_ort=rechnungsadresse_ort,
             )
 
-            # Create SchulungsTeilnehmer objects
-            for participant in participants_data:
-                SchulungsTeilnehmer.objects.create(
-                    schulungstermin=schulungstermin,
-                    bestellung=bestellung,
-                    vorname=participant["vorname"],
-                    nachname=participant["nachname"],
-                    email=participant["email"],
-                    verpflegung=participant["verpflegung"],
-                    person=participant["person"],
-                    status="Angemeldet",
-                )
+            # Create SchulungsTeilnehmer objects in one INSERT. bulk_create
+            # bypasses the post_save signals: the seat counter is adjusted
+            # explicitly below, and certificates are not relevant for
+            # "Angemeldet" participants.
+            SchulungsTeilnehmer.objects.bulk_create(
+                [
+                    SchulungsTeilnehmer(
+                        schulungstermin=schulungstermin,
+                        bestellung=bestellung,
+                        vorname=participant["vorname"],
+                        nachname=participant["nachname"],
+                        email=participant["email"],
+                        verpflegung=participant["verpflegung"],
+                        person=participant["person"],
+                        status="Angemeldet",
+                    )
+                    for participant in participants_data
+                ]
+            )
+            schulungstermin.adjust_belegte_plaetze(len(participants_data))
 
-            # Send confirmation email
+            # Queue confirmation email, it is delivered after commit
             try:
                 send_order_confirmation_email(request.user.email, bestellung, request)
             except Exception as e:
                 logger.error(
-                    f"Failed to send order confirmation email for bestellung {bestellung.id}: {str(e)}"
+                    f"Failed to queue order confirmation email for bestellung {bestellung.id}: {str(e)}"
                 )
                 # Continue anyway - order is created successfully
 
@@ -230,6 +263,16 @@ def confirm_order(request: HttpRequest):
         )
         return JsonResponse({"status": "success", "bestellung_id": bestellung.id})
 
+    except IntegrityError as e:
+        # A concurrent order registered the same Person (unique constraint)
+        logger.warning(f"Duplicate participant in order: {str(e)}")
+        return JsonResponse(
+            {
+                "status": "error",
+                "message": "Ein Teilnehmer ist bereits für diese Schulung angemeldet.",
+            },
+            status=409,
+        )
     except KeyError as e:
         logger.error(f"Missing required field in order data: {str(e)}")
         return JsonResponse(
@@ -0,0 +1,37 @@
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+
+from core.forms import ReportForm
+from core.services.reporting import REPORTS, FormatNotAvailable, report_response
+
+
+@staff_member_required
+def reports(request):
+    """
+    Admin page of the reports: the form submits by GET, a valid selection
+    answers with the download.
+    """
+    form = ReportForm(request.GET or None)
+    if form.is_valid():
+        data = form.cleaned_data
+        try:
+            return report_response(
+                REPORTS[data["report"]],
+                data["format"],
+                data["von"],
+                data["bis"],
+                request,
+            )
+        except FormatNotAvailable as e:
+            form.add_error("format", str(e))
+    return render(
+        request,
+        "admin/auswertungen.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Auswertungen",
+            "form": form,
+            "reports": REPORTS.values(),
+        },
+    )
@@ -1,38 +1,202 @@
-import requests
-from django.contrib import messages
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib import admin, messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import logout
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
 from django.forms import inlineformset_factory
-from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, JsonResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.http import (
+    FileResponse,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+)
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
 from django.template import loader
 from django.urls import reverse
-from django.utils import timezone
-
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import (
+    http_date,
+    quote_etag,
+    urlsafe_base64_decode,
+    urlsafe_base64_encode,
+)
+
+from core.cache import (
+    dokumente_cache,
+    seiten_cache,
+    termine_cache,
+    verfuegbarkeit_cache,
+)
 from core.decorators import login_and_activation_required
-from core.models import Betrieb, Document, Person, SchulungsTeilnehmer, SchulungsTermin
-from core.services.email import send_reminder_to_all_teilnehmer
+from core.forms import TerminFilterForm
+from core.models import (
+    Betrieb,
+    Document,
+    EmailVersand,
+    Person,
+    SchulungsTeilnehmer,
+    SchulungsTermin,
+)
+from core.services.email import asend_reminder_to_all_teilnehmer
+from core.utils import get_request_person
 
 
 def index(request):
-    # Using select_related to prefetch related SchulungsOrt and Schulung objects
-    schulungstermine = (
-        SchulungsTermin.objects.filter(datum_von__gte=timezone.now())
-        .select_related("ort", "schulung")
-        .order_by("datum_von")
-    )
+    if request.method in ("GET", "HEAD") and not request.user.is_authenticated:
+        return anonymous_index(request)
+    return render_index(request)
+
+
+# Termine per page of the index listing
+INDEX_PAGE_SIZE = 20
+
+
+def encode_termin_cursor(termin):
+    """Opaque keyset cursor pointing after the given Termin."""
+    value = f"{termin.datum_von.isoformat()}|{termin.pk}"
+    return urlsafe_base64_encode(value.encode())
+
+
+def decode_termin_cursor(cursor):
+    """Returns (datum_von, pk) or None for a missing or broken cursor."""
+    try:
+        datum_von, pk = urlsafe_base64_decode(cursor).decode().split("|")
+        return datetime.fromisoformat(datum_von), int(pk)
+    except ValueError:
+        return None
+
+
+def render_index(request):
     template = loader.get_template("home/index.html")
-    user = request.user
-    person = None
-    if not (user.is_anonymous):
-        person = Person.objects.get(Q(benutzer=user))
-    context = {"schulungstermine": schulungstermine, "person": person}
+    person = get_request_person(request)
+    filter_form = TerminFilterForm(
+        request.GET, funktion=person.funktion if person else None
+    )
+    schulungstermine = filter_form.filter(SchulungsTermin.objects.bookable_upcoming())
+    cursor = decode_termin_cursor(request.GET.get("nach", ""))
+    if cursor:
+        schulungstermine = schulungstermine.after(*cursor)
+    # Seat counts and the Betrieb registration are annotated in the main query,
+    # so the number of queries does not grow with the number of Termine.
+    # Keyset pagination on (datum_von, id): one row more tells if there is a
+    # next page, without counting.
+    schulungstermine = list(
+        schulungstermine.select_related("ort", "schulung", "schulung__art")
+        .with_availability(betrieb=person.betrieb if person else None)
+        .order_by("datum_von", "pk")[: INDEX_PAGE_SIZE + 1]
+    )
+    next_query = None
+    if len(schulungstermine) > INDEX_PAGE_SIZE:
+        schulungstermine = schulungstermine[:INDEX_PAGE_SIZE]
+        query = request.GET.copy()
+        query["nach"] = encode_termin_cursor(schulungstermine[-1])
+        next_query = query.urlencode()
+    first_query = None
+    if cursor:
+        query = request.GET.copy()
+        del query["nach"]
+        first_query = query.urlencode()
+
+    context = {
+        "schulungstermine": schulungstermine,
+        "person": person,
+        "filter_form": filter_form,
+        "next_query": next_query,
+        "first_query": first_query,
+        # Part of the card fragment cache keys, bumped by the signals
+        "termine_version": termine_cache.version(),
+    }
     return HttpResponse(template.render(context, request))
 
 
+def index_validators():
+    """
+    ETag and Last-Modified of the anonymous index page.
+
+    Computed in one aggregate query over the bookable upcoming Termine: the
+    newest ``updated`` of the Termine and their Schulungen plus the seat
+    counter, so bookings change the ETag too. The result is cached until the signals
+    bump termine_cache, a seat change bumps verfuegbarkeit_cache, or
+    settings.INDEX_CACHE_TIMEOUT expires (Termine that start drop out).
+
+    Returns:
+        tuple: (etag, last_modified datetime or None)
+    """
+    termine_version = termine_cache.version()
+    verfuegbarkeit_version = verfuegbarkeit_cache.version()
+
+    def compute():
+        stats = SchulungsTermin.objects.bookable_upcoming().aggregate(
+            anzahl=Count("id"),
+            belegt=Sum("belegte_plaetze"),
+            termin_updated=Max("updated"),
+            schulung_updated=Max("schulung__updated"),
+        )
+        last_modified = max(
+            filter(None, [stats["termin_updated"], stats["schulung_updated"]]),
+            default=None,
+        )
+        fingerprint = repr(
+            (sorted(stats.items()), termine_version, verfuegbarkeit_version)
+        )
+        return hashlib.md5(fingerprint.encode()).hexdigest(), last_modified
+
+    return seiten_cache.get_or_set(
+        ("index-validators", termine_version, verfuegbarkeit_version),
+        compute,
+        timeout=settings.INDEX_CACHE_TIMEOUT,
+    )
+
+
+def anonymous_index(request):
+    """
+    Index page for anonymous visitors, the same for all of them.
+
+    Answers conditional requests with 304 and otherwise serves the body
+    cached for the current ETag, so repeat hits only read the cache.
+    """
+    etag, last_modified = index_validators()
+    etag = quote_etag(etag)
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        key = ("index", etag, request.get_host(), request.get_full_path())
+        content = seiten_cache.get(*key)
+        if content is None:
+            content = render_index(request).content
+            seiten_cache.set(*key, value=content, timeout=settings.INDEX_CACHE_TIMEOUT)
+        response = HttpResponse(content)
+
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    # Browsers revalidate every time; logged-in users get their own page
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ["Cookie"])
+    return response
+
+
 def is_overbooked(request, schulungsterminId):
-    schulungstermin = SchulungsTermin.objects.get(id=schulungsterminId)
+    """
+    Check whether the submitted registrations exceed the capacity.
+
+    Must be called inside a transaction: the Termin row stays locked until
+    the registrations have been saved.
+    """
+    schulungstermin = SchulungsTermin.objects.select_for_update().get(
+        id=schulungsterminId
+    )
     teilnehmer = list(
         SchulungsTeilnehmer.objects.filter(schulungstermin=schulungstermin).values_list(
             "person_id", flat=True
@@ -61,22 +225,21 @@ def register(request: HttpRequest, id: int):
     # form has been submitted
     if request.method == "POST":
         print(list(request.POST.keys()))
-        if is_overbooked(request, id):
-            messages.warning(request, "Nicht genügend Plätze!")
-        else:
-            for param in list(request.POST.keys()):
-                if param.startswith("ma_"):
-                    mitarbeiterId = request.POST.get(param)
-                    if request.POST.get("cb_" + mitarbeiterId):
-                        addPersonToSchulungstermin(id, mitarbeiterId)
-                    else:
-                        removePersonFromSchulungstermin(id, mitarbeiterId)
-            messages.success(request, "Anmeldung gespeichtert!")
-
-    user = request.user
-    try:
-        person = Person.objects.get(Q(benutzer=user))
-    except Person.DoesNotExist:
+        with transaction.atomic():
+            if is_overbooked(request, id):
+                messages.warning(request, "Nicht genügend Plätze!")
+            else:
+                for param in list(request.POST.keys()):
+                    if param.startswith("ma_"):
+                        mitarbeiterId = request.POST.get(param)
+                        if request.POST.get("cb_" + mitarbeiterId):
+                            addPersonToSchulungstermin(id, mitarbeiterId)
+                        else:
+                            removePersonFromSchulungstermin(id, mitarbeiterId)
+                messages.success(request, "Anmeldung gespeichtert!")
+
+    person = get_request_person(request)
+    if person is None:
         messages.error(request, "Kein Personenprofil gefunden.")
         return redirect("index")
 
@@ -140,8 +303,7 @@ def mitarbeiter(request):
         Person,
         fields=["vorname", "nachname", "email", "funktion"],
     )
-    user = request.user
-    person = Person.objects.get(Q(benutzer=user))
+    person = get_request_person(request)
     betrieb = Betrieb.objects.get(geschaeftsfuehrer=person)
     queryset = Person.objects.filter(betrieb=betrieb).order_by("funktion")
     if request.method == "POST":
@@ -159,135 +321,60 @@ def mitarbeiter(request):
 
 
 def export_schulungsteilnehmer_pdf(request, pk):
-    from io import BytesIO
-
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+    from core.services.teilnehmerliste import build_teilnehmerliste
 
-    schulungstermin = get_object_or_404(SchulungsTermin, pk=pk)
-    buffer = BytesIO()
-    # Use landscape orientation and add margins
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=15,
-        leftMargin=15,
-        topMargin=30,
-        bottomMargin=30,
+    schulungstermin = get_object_or_404(
+        SchulungsTermin.objects.select_related("schulung"), pk=pk
     )
-    doc.pagesize = A4[1], A4[0]  # Swap dimensions for landscape
-    elements = []
-
-    # Add title
-    styles = getSampleStyleSheet()
-    title_style = styles["Heading2"]
-    title_style.alignment = 1  # Center alignment
-    schulung_datum = schulungstermin.datum_von.strftime("%d.%m.%Y")
-    title = Paragraph(
-        f"{schulungstermin.schulung.name} - {schulung_datum}",
-        title_style,
+    return FileResponse(
+        build_teilnehmerliste([schulungstermin]),
+        as_attachment=True,
+        filename=f"teilnehmerliste_{schulungstermin.pk}.pdf",
+        content_type="application/pdf",
     )
-    elements.append(title)
-
-    # Create table data
-    data = [["Name", "Betrieb", "Email", "Telefon", "Unterschrift", "DSV*"]]
-    for teilnehmer in schulungstermin.schulungsteilnehmer_set.all():
-        if teilnehmer.person:
-            data.append(
-                [
-                    f"{teilnehmer.person.vorname} {teilnehmer.person.nachname}",
-                    str(teilnehmer.person.betrieb) if teilnehmer.person.betrieb else "",
-                    teilnehmer.person.email or "",
-                    teilnehmer.person.telefon or "",
-                    "",  # Empty signature column
-                    "Ja" if teilnehmer.person.dsv_akzeptiert else "Nein",
-                ]
-            )
-        else:
-            data.append(
-                [
-                    f"{teilnehmer.vorname} {teilnehmer.nachname}",
-                    "",
-                    teilnehmer.email or "",
-                    "",
-                    "",  # Empty signature column
-                    "",
-                ]
-            )
-    # Add empty row at the end
-    data.append([""] * 6)
-
-    # Create table with larger column widths
-    colWidths = [160, 160, 170, 120, 120, 70]
-    table = Table(data, colWidths=colWidths)
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 14),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-                ("FONTSIZE", (0, 1), (-1, -1), 12),
-                ("TOPPADDING", (0, 1), (-1, -1), 12),
-                ("BOTTOMPADDING", (0, 1), (-1, -1), 12),
-            ]
-        )
+
+
+@staff_member_required
+async def send_reminder(request, pk):
+    versand = await asend_reminder_to_all_teilnehmer(pk, request)
+    messages.success(
+        request,
+        "Erinnerung an alle Teilnehmer mit email-adresse wird versendet.",
     )
-    elements.append(table)
-
-    # Add footnote
-    footnote_style = styles["Normal"]
-    footnote_style.fontSize = 8
-    footnote = Paragraph("* DSV = Datenschutzvereinbarung akzeptiert", footnote_style)
-    elements.append(Paragraph("<br/><br/>", footnote_style))  # Add some space
-    elements.append(footnote)
-
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-
-    # Create response
-    response = HttpResponse(buffer, content_type="application/pdf")
-    response[
-        "Content-Disposition"
-    ] = f'attachment; filename="teilnehmerliste_{schulungstermin.pk}.pdf"'
-    return response
+    return HttpResponseRedirect(reverse("email_versand_status", args=(versand.pk,)))
 
 
-def send_reminder(request, pk):
-    try:
-        send_reminder_to_all_teilnehmer(pk, request)
-        messages.success(
-            request, "Erinnerung an alle Teilnehmer mit email-adresse verschickt."
-        )
-    except requests.exceptions.RequestException as e:
-        # Handle request errors
-        messages.error(request, f"Email konnte nicht versendet werden: {e}")
-    return HttpResponseRedirect(
-        reverse("admin:core_schulungstermin_change", args=(pk,))
+@staff_member_required
+def email_versand_status(request, pk):
+    """Progress of a bulk email dispatch, reloads itself until done."""
+    versand = get_object_or_404(
+        EmailVersand.objects.select_related("schulungstermin__schulung"), pk=pk
+    )
+    statistik = versand.statistik()
+    return render(
+        request,
+        "admin/email_versand_status.html",
+        {
+            **admin.site.each_context(request),
+            "title": versand.betreff,
+            "versand": versand,
+            "statistik": statistik,
+            "abgeschlossen": statistik["offen"] == 0,
+            "emails": versand.emails.order_by("empfaenger"),
+        },
     )
 
 
 @login_and_activation_required
 def my_schulungen(request):
-    user = request.user
-    try:
-        person = Person.objects.get(benutzer=user)
-        schulungen = (
-            SchulungsTeilnehmer.objects.filter(person=person, status="Teilgenommen")
-            .select_related(
-                "schulungstermin", "schulungstermin__schulung", "schulungstermin__ort"
-            )
-            .prefetch_related("schulungstermin__schulung__unterlagen")
+    person = get_request_person(request)
+    schulungen = (
+        SchulungsTeilnehmer.objects.filter(person=person, status="Teilgenommen")
+        .select_related(
+            "schulungstermin", "schulungstermin__schulung", "schulungstermin__ort"
         )
-    except Person.DoesNotExist:
-        schulungen = []
+        .prefetch_related("schulungstermin__schulung__unterlagen")
+    )
 
     return render(
         request, "home/my_schulungen.html", {"schulungen": schulungen, "person": person}
@@ -296,15 +383,18 @@ def my_schulungen(request):
 
 @login_and_activation_required
 def documents(request):
-    user = request.user
-    try:
-        person = Person.objects.get(benutzer=user)
-        # Get documents with no restrictions or where user's function is allowed
-        documents = Document.objects.filter(
-            Q(allowed_funktionen__isnull=True) | Q(allowed_funktionen=person.funktion)
-        ).distinct()
-    except Person.DoesNotExist:
-        documents = Document.objects.filter(allowed_funktionen__isnull=True)
+    person = get_request_person(request)
+    # Get documents with no restrictions or where user's function is allowed,
+    # cached per Funktion until a Document changes
+    documents = dokumente_cache.get_or_set(
+        person.funktion_id,
+        lambda: list(
+            Document.objects.filter(
+                Q(allowed_funktionen__isnull=True)
+                | Q(allowed_funktionen=person.funktion_id)
+            ).distinct()
+        ),
+    )
 
     return render(request, "home/documents.html", {"documents": documents})
 
@@ -323,19 +413,17 @@ def download_teilnahmebestaetigung(request, pk):
     schulungsteilnehmer = get_object_or_404(SchulungsTeilnehmer, pk=pk)
 
     # Security check: Verify that the logged-in user owns this certificate
-    user = request.user
-    try:
-        person = Person.objects.get(benutzer=user)
-        # Check if this certificate belongs to the logged-in user
-        if schulungsteilnehmer.person != person:
-            messages.error(
-                request,
-                "Sie haben keine Berechtigung, " "dieses Zertifikat herunterzuladen.",
-            )
-            return redirect("my_schulungen")
-    except Person.DoesNotExist:
+    person = get_request_person(request)
+    if person is None:
         messages.error(request, "Kein Personenprofil gefunden.")
         return redirect("index")
+    # Check if this certificate belongs to the logged-in user
+    if schulungsteilnehmer.person_id != person.pk:
+        messages.error(
+            request,
+            "Sie haben keine Berechtigung, " "dieses Zertifikat herunterzuladen.",
+        )
+        return redirect("my_schulungen")
 
     # Check if status is "Teilgenommen"
     if schulungsteilnehmer.status != "Teilgenommen":
@@ -359,6 +447,33 @@ def download_teilnahmebestaetigung(request, pk):
     return response
 
 
+@staff_member_required
+def download_teilnahmebestaetigungen(request, pk):
+    """
+    Download all Teilnahmebestätigungen of a SchulungsTermin as ZIP, or as
+    one merged PDF with ?format=pdf.
+    """
+    from core.services.certificate import (
+        build_certificate_batch,
+        completed_teilnehmer_for_termine,
+    )
+
+    schulungstermin = get_object_or_404(SchulungsTermin, pk=pk)
+    format = "pdf" if request.GET.get("format") == "pdf" else "zip"
+    teilnehmer = completed_teilnehmer_for_termine([schulungstermin])
+    if not teilnehmer.exists():
+        messages.warning(request, "Keine Teilnehmer mit Status 'Teilgenommen'.")
+        return HttpResponseRedirect(
+            reverse("admin:core_schulungstermin_change", args=(pk,))
+        )
+
+    return FileResponse(
+        build_certificate_batch(teilnehmer, format=format),
+        as_attachment=True,
+        filename=f"teilnahmebestaetigungen_{schulungstermin.pk}.{format}",
+    )
+
+
 def terms_and_conditions(request: HttpRequest):
     return render(request, "home/terms_and_conditions.html")
 
@@ -368,9 +483,8 @@ def impressum(request):
 
 
 @staff_member_required
-def get_person_details(request, person_id):
-    print(person_id)
-    person = get_object_or_404(Person, id=person_id)
+async def get_person_details(request, person_id):
+    person = await aget_object_or_404(Person, id=person_id)
     return JsonResponse(
         {
             "vorname": person.vorname,
@@ -23,6 +23,8 @@ echo "Python version: $(/opt/venv/bin/python --version)"
 # Run migrations at startup
 echo "Running database migrations..."
 /opt/venv/bin/python manage.py migrate --noinput
+# Table of the database cache (CACHE_BACKEND=db), no-op for other backends
+/opt/venv/bin/python manage.py createcachetable
 
 echo "Migrations completed. Now testing Django configuration..."
 
@@ -33,13 +35,10 @@ echo "Testing WSGI application import..."
 # Test if we can import the WSGI application (but don't fail if this has issues)
 /opt/venv/bin/python -c "from bildungsplattform.wsgi import application; print('WSGI application imported successfully')" 2>&1 || echo "WSGI import had issues but continuing..."
 
-# Start gunicorn with simplified configuration first
-echo "Starting gunicorn on port ${RUN_PORT} (simplified config)..."
-/opt/venv/bin/gunicorn bildungsplattform.wsgi:application \
+# Start gunicorn, workers/threads/recycling come from gunicorn.conf.py
+echo "Starting gunicorn on port ${RUN_PORT} (${GUNICORN_WORKER_CLASS:-gthread} workers)..."
+/opt/venv/bin/gunicorn -c gunicorn.conf.py \
     --bind "0.0.0.0:${RUN_PORT}" \
-    --workers 1 \
-    --timeout 120 \
-    --log-level info \
     --daemon
 
 echo "Gunicorn command executed. Waiting for startup..."
@@ -52,14 +51,15 @@ else
     echo "ERROR: Gunicorn is not running. Checking processes:"
     ps aux | grep -E "(python|gunicorn)" || echo "No relevant processes found"
     echo "Attempting to start gunicorn in foreground for debugging:"
-    /opt/venv/bin/gunicorn bildungsplattform.wsgi:application \
+    /opt/venv/bin/gunicorn -c gunicorn.conf.py \
         --bind "0.0.0.0:${RUN_PORT}" \
-        --workers 1 \
-        --timeout 120 \
         --log-level debug
     exit 1
 fi
 
+echo "Starting email outbox worker..."
+/opt/venv/bin/python manage.py process_email_outbox --loop &
+
 echo "Starting nginx..."
 # Start nginx in the foreground
 exec nginx -g 'daemon off;'
@@ -0,0 +1,153 @@
+"""
+Gunicorn configuration, loaded by entrypoint.sh with ``-c gunicorn.conf.py``.
+
+Every value can be overridden from the environment:
+
+    GUNICORN_WORKER_CLASS   sync, gthread (default), gevent or uvicorn (ASGI)
+    GUNICORN_WORKERS        worker processes, 0 = derived from the CPU count
+    GUNICORN_MAX_WORKERS    upper limit of the derived worker count (default 8)
+    GUNICORN_THREADS        threads per gthread worker (default 4)
+    GUNICORN_WORKER_CONNECTIONS  concurrent requests per gevent worker (100)
+    GUNICORN_MAX_REQUESTS   restart a worker after this many requests (1000)
+    GUNICORN_MAX_REQUESTS_JITTER  random extra requests before the restart
+    GUNICORN_PRELOAD        import the app once in the master (default true,
+                            false with gevent)
+    GUNICORN_TIMEOUT        seconds before a silent worker is killed (120)
+
+A slow email API call or PDF render only occupies one thread (gthread) or one
+greenlet (gevent) instead of the whole process. uvicorn serves
+bildungsplattform.asgi: async views share the event loop, sync views run in
+a thread each. Every thread or greenlet
+holds its own database connection: keep workers × threads (or × worker
+connections) below the ``max_connections`` of Postgres, or bound them with
+DB_POOL.
+"""
+
+import os
+import sys
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def env_bool(name, default):
+    return os.getenv(name, default).lower() in ("true", "1", "yes")
+
+
+def cpu_count():
+    """CPUs this process may run on, which is the container's share."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers(worker_class, cpus, max_workers):
+    """
+    Sync workers serve one request each and wait on I/O, the classic
+    2 × CPUs + 1 applies. Threaded, gevent and uvicorn workers overlap I/O
+    within a process, one per CPU (at least two, so a restart never leaves no worker).
+    """
+    workers = 2 * cpus + 1 if worker_class == "sync" else max(cpus, 2)
+    return min(workers, max_workers)
+
+
+def uvicorn_worker():
+    """Import path of the uvicorn worker, None if uvicorn is not installed."""
+    try:
+        import uvicorn_worker  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        return "uvicorn_worker.UvicornWorker"
+    try:
+        import uvicorn.workers  # noqa: F401
+    except ImportError:
+        return None
+    return "uvicorn.workers.UvicornWorker"
+
+
+def resolve_worker_class(worker_class):
+    if worker_class not in ("sync", "gthread", "gevent", "uvicorn"):
+        raise ValueError(
+            f"GUNICORN_WORKER_CLASS must be sync, gthread, gevent or uvicorn, "
+            f"not {worker_class!r}"
+        )
+    if worker_class == "gevent":
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            print(
+                "gunicorn.conf: gevent is not installed (pip install gevent), "
+                "falling back to gthread",
+                file=sys.stderr,
+            )
+            return "gthread"
+    if worker_class == "uvicorn" and uvicorn_worker() is None:
+        print(
+            "gunicorn.conf: uvicorn is not installed (pip install uvicorn), "
+            "falling back to gthread",
+            file=sys.stderr,
+        )
+        return "gthread"
+    return worker_class
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8001")
+
+worker_mode = resolve_worker_class(os.getenv("GUNICORN_WORKER_CLASS", "gthread"))
+if worker_mode == "uvicorn":
+    worker_class = uvicorn_worker()
+    wsgi_app = "bildungsplattform.asgi:application"
+else:
+    worker_class = worker_mode
+    wsgi_app = "bildungsplattform.wsgi:application"
+workers = env_int("GUNICORN_WORKERS", "0") or default_workers(
+    worker_mode, cpu_count(), env_int("GUNICORN_MAX_WORKERS", "8")
+)
+threads = env_int("GUNICORN_THREADS", "4") if worker_class == "gthread" else 1
+worker_connections = env_int("GUNICORN_WORKER_CONNECTIONS", "100")
+
+# Recycle workers regularly so slow leaks (PDF rendering, caches) stay bounded,
+# the jitter keeps them from restarting all at once
+max_requests = env_int("GUNICORN_MAX_REQUESTS", "1000")
+max_requests_jitter = env_int(
+    "GUNICORN_MAX_REQUESTS_JITTER", str(max(max_requests // 10, 0))
+)
+
+# Import Django once in the master: faster worker (re)starts and shared
+# copy-on-write memory. Database connections are opened lazily, pre_fork
+# below makes sure none is inherited by the workers. Not with gevent by
+# default: its worker monkey-patches only after the fork, modules imported
+# before would keep the blocking socket and thread primitives.
+preload_app = env_bool(
+    "GUNICORN_PRELOAD", "false" if worker_class == "gevent" else "true"
+)
+
+timeout = env_int("GUNICORN_TIMEOUT", "120")
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", "30")
+keepalive = env_int("GUNICORN_KEEPALIVE", "5")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+# Worker heartbeat files on tmpfs, a disk-backed /tmp can stall the workers
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def pre_fork(server, worker):
+    """Close connections the preloaded app may have opened in the master."""
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def when_ready(server):
+    server.log.info(
+        f"{workers} {worker_mode} workers ({wsgi_app})"
+        + (f" × {threads} threads" if worker_class == "gthread" else "")
+        + (f" × {worker_connections} connections" if worker_class == "gevent" else "")
+        + f", max_requests {max_requests} (+{max_requests_jitter} jitter)"
+        + f", preload_app {preload_app}"
+    )
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Load test for the index and checkout pages, optionally across gunicorn modes.
+
+Against a running server:
+
+    python scripts/load_test.py --url http://127.0.0.1:8001
+
+Start gunicorn (gunicorn.conf.py) once per worker class and compare:
+
+    python scripts/load_test.py --modes sync gthread gevent uvicorn --duration 20
+
+The checkout page needs a logged-in, activated user: pass the ``sessionid``
+cookie of such a user and a bookable Termin with ``--sessionid`` and
+``--termin``, otherwise only the index page is loaded. Only the standard
+library is used.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects (e.g. to the login page) instead of following them."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def fetch(opener, url, headers):
+    request = urllib.request.Request(url, headers=headers)
+    start = time.perf_counter()
+    try:
+        with opener.open(request, timeout=30) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = "Fehler"
+    return status, (time.perf_counter() - start) * 1000
+
+
+def run_load(url, headers, concurrency, duration):
+    """Request ``url`` from ``concurrency`` threads for ``duration`` seconds."""
+    opener = urllib.request.build_opener(NoRedirect)
+    deadline = time.monotonic() + duration
+
+    def client():
+        results = []
+        while time.monotonic() < deadline:
+            results.append(fetch(opener, url, headers))
+        return results
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(client) for _ in range(concurrency)]
+        results = [result for future in futures for result in future.result()]
+    return results, time.monotonic() - started
+
+
+def report(label, results, elapsed):
+    if not results:
+        print(f"  {label}: keine Antworten")
+        return
+    timings = sorted(ms for status, ms in results if status == 200)
+    statuses = Counter(str(status) for status, _ in results)
+    line = f"  {label}: {len(timings) / elapsed:.1f} req/s"
+    if timings:
+        p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+        line += f", Median {statistics.median(timings):.1f} ms, p95 {p95:.1f} ms"
+    line += f", Status {dict(statuses)}"
+    print(line)
+
+
+def wait_until_healthy(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/healthz/", timeout=2):
+                return True
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    return False
+
+
+def start_gunicorn(mode, port, workers):
+    env = {**os.environ, "GUNICORN_WORKER_CLASS": mode}
+    if workers:
+        env["GUNICORN_WORKERS"] = str(workers)
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--log-level",
+            "warning",
+        ],
+        cwd=BASE_DIR,
+        env=env,
+    )
+
+
+def load_endpoints(base_url, args):
+    endpoints = [("Index", f"{base_url}/", {})]
+    if args.sessionid and args.termin:
+        endpoints.append(
+            (
+                "Checkout",
+                f"{base_url}/checkout/{args.termin}/",
+                {"Cookie": f"sessionid={args.sessionid}"},
+            )
+        )
+    for label, url, headers in endpoints:
+        results, elapsed = run_load(url, headers, args.concurrency, args.duration)
+        report(label, results, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8001")
+    parser.add_argument(
+        "--modes",
+        nargs="*",
+        choices=["sync", "gthread", "gevent", "uvicorn"],
+        help="Start gunicorn with each worker class instead of using --url",
+    )
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="GUNICORN_WORKERS for --modes"
+    )
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15, help="Seconds")
+    parser.add_argument("--sessionid", help="Session cookie of an activated user")
+    parser.add_argument("--termin", type=int, help="SchulungsTermin for checkout")
+    args = parser.parse_args()
+
+    if not (args.sessionid and args.termin):
+        print("Checkout übersprungen (--sessionid und --termin angeben).")
+
+    if not args.modes:
+        print(f"{args.url} mit {args.concurrency} parallelen Clients:")
+        load_endpoints(args.url.rstrip("/"), args)
+        return
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    for mode in args.modes:
+        process = start_gunicorn(mode, args.port, args.workers)
+        try:
+            if not wait_until_healthy(base_url):
+                print(f"{mode}: gunicorn ist nicht gestartet")
+                continue
+            print(f"{mode} mit {args.concurrency} parallelen Clients:")
+            load_endpoints(base_url, args)
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+
+
+if __name__ == "__main__":
+    main()